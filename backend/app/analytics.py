@@ -0,0 +1,124 @@
+"""
+Local reporting queries over the columnar export.
+
+Reads the Parquet files written by `app.tasks.analytics_export` and never
+connects to the database. Month partitions outside the requested range are
+skipped without being opened, and only the referenced columns are read.
+
+Usage:
+    python -m app.analytics revenue --from 2025-01-01 --to 2025-02-01 [--by specialty|doctor|month]
+    python -m app.analytics packages --from 2025-01-01 --to 2025-02-01
+"""
+
+from app.tasks.analytics_export import ANALYTICS_EXPORT_DIR, month_range
+from datetime import date, timedelta
+from typing import List, Optional
+import argparse
+import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+REVENUE_GROUPINGS = ("specialty", "doctor", "month")
+TOTAL = pa.decimal128(18, 2)
+
+def dataset(name: str, root: str = ANALYTICS_EXPORT_DIR) -> ds.Dataset:
+    path = os.path.join(root, name)
+    if not os.path.isdir(path):
+        raise SystemExit(f"No exported {name} under {root}; run python -m app.tasks.analytics_export first")
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+def _months_between(start: date, end: date) -> List[str]:
+    months = []
+    month = start.replace(day=1)
+    while month < end:
+        months.append(month.strftime("%Y-%m"))
+        month = month_range(month.strftime("%Y-%m"))[1]
+    return months
+
+def load(
+    name: str,
+    date_column: str,
+    start: date,
+    end: date,
+    columns: Optional[List[str]] = None,
+    filter: Optional[ds.Expression] = None,
+    root: str = ANALYTICS_EXPORT_DIR
+) -> pa.Table:
+    """Rows of a fact table with start <= date_column < end; partitions are pruned by month."""
+    expression = (
+        ds.field("month").isin(_months_between(start, end))
+        & (ds.field(date_column) >= pa.scalar(start, pa.date32()))
+        & (ds.field(date_column) < pa.scalar(end, pa.date32()))
+    )
+    if filter is not None:
+        expression = expression & filter
+    return dataset(name, root).to_table(columns=columns, filter=expression)
+
+def appointments(start: date, end: date, root: str = ANALYTICS_EXPORT_DIR, **kwargs) -> pa.Table:
+    """Appointments in the date range joined with the doctor and specialty dimensions."""
+    table = load("appointments", "appointment_date", start, end, root=root, **kwargs)
+    doctors = dataset("doctors", root).to_table()
+    specialties = dataset("specialties", root).to_table()
+    return table.join(doctors.drop_columns(["consultation_fee_onsite", "consultation_fee_online"]), "doctor_id").join(
+        specialties, "specialty_id"
+    )
+
+def revenue_report(start: date, end: date, by: str = "specialty", root: str = ANALYTICS_EXPORT_DIR) -> pa.Table:
+    """Completed consultations and their fees, grouped by specialty, doctor or month."""
+    table = appointments(
+        start, end, root,
+        columns=["id", "doctor_id", "appointment_date", "consultation_fee"],
+        filter=ds.field("status") == "completed"
+    )
+    table = table.set_column(
+        table.schema.get_field_index("consultation_fee"), "consultation_fee",
+        pc.cast(table.column("consultation_fee"), TOTAL)
+    )
+    if by == "month":
+        table = table.append_column("month", pc.strftime(table.column("appointment_date"), format="%Y-%m"))
+    keys = {"specialty": ["specialty_name"], "doctor": ["doctor_id", "doctor_name", "specialty_name"], "month": ["month"]}[by]
+    grouped = table.group_by(keys).aggregate([("id", "count"), ("consultation_fee", "sum")])
+    grouped = grouped.rename_columns([
+        {"id_count": "appointments", "consultation_fee_sum": "revenue"}.get(name, name) for name in grouped.column_names
+    ])
+    return grouped.sort_by([("revenue", "descending")])
+
+def package_report(start: date, end: date, root: str = ANALYTICS_EXPORT_DIR) -> pa.Table:
+    """Paid package bookings per package for bookings made in the date range."""
+    table = load(
+        "package_bookings", "booking_date", start, end,
+        columns=["id", "package_id", "amount_paid"],
+        filter=ds.field("payment_status") == "completed",
+        root=root
+    )
+    table = table.set_column(2, "amount_paid", pc.cast(table.column("amount_paid"), TOTAL))
+    grouped = table.group_by(["package_id"]).aggregate([("id", "count"), ("amount_paid", "sum")])
+    grouped = grouped.join(dataset("health_packages", root).to_table(columns=["package_id", "package_name"]), "package_id")
+    grouped = grouped.rename_columns([
+        {"id_count": "bookings", "amount_paid_sum": "revenue"}.get(name, name) for name in grouped.column_names
+    ])
+    return grouped.sort_by([("revenue", "descending")])
+
+def _print(table: pa.Table) -> None:
+    print("\t".join(table.column_names))
+    for row in table.to_pylist():
+        print("\t".join("" if value is None else str(value) for value in row.values()))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reports over the local analytics export.")
+    parser.add_argument("report", choices=["revenue", "packages"])
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=date.today().replace(day=1))
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=None, help="exclusive")
+    parser.add_argument("--by", choices=REVENUE_GROUPINGS, default="specialty")
+    parser.add_argument("--root", default=ANALYTICS_EXPORT_DIR)
+    args = parser.parse_args()
+
+    end = args.end or (args.start + timedelta(days=32)).replace(day=1)
+    if args.report == "revenue":
+        _print(revenue_report(args.start, end, args.by, args.root))
+    else:
+        _print(package_report(args.start, end, args.root))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.services import UserImportService
+from app.services.user_import_service import IMPORT_FORMATS
+from app.schemas import UserImportResult
+from app.auth import require_admin
+from app.models import User
+from app.query_log import slow_query_stats
+
+router = APIRouter()
+
+def _detect_format(upload: UploadFile, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    filename = (upload.filename or "").lower()
+    if filename.endswith(".csv") or upload.content_type == "text/csv":
+        return "csv"
+    if filename.endswith((".ndjson", ".jsonl")) or upload.content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    raise HTTPException(status_code=400, detail="Could not detect file format; pass format=csv or format=ndjson")
+
+@router.post("/users/import", response_model=UserImportResult)
+def import_users(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv or ndjson (detected from the file name if omitted)"),
+    dry_run: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin)
+):
+    fmt = _detect_format(file, format)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+    
+    service = UserImportService(db)
+    return service.import_stream(file.file, fmt, dry_run)
+
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(require_admin)
+):
+    # Per-process view: each server worker keeps its own aggregates.
+    return slow_query_stats.snapshot(limit)
\ No newline at end of file
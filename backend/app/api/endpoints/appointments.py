@@ -4,8 +4,9 @@ from typing import List
 
 from app.database import get_db
 from app.services import AppointmentService
-from app.schemas import AppointmentCreate, AppointmentResponse
-from app.auth import get_current_user, require_patient_or_doctor
+from app.services.appointment_service import BULK_TRANSITION_MAX
+from app.schemas import AppointmentCreate, AppointmentResponse, AppointmentTransitionRequest, AppointmentTransitionResponse
+from app.auth import get_current_user, require_patient_or_doctor, require_staff
 from app.models import User
 
 router = APIRouter()
@@ -26,6 +27,8 @@ def create_appointment(
     
     service = AppointmentService(db)
     appointment = service.create_appointment(appointment_data, patient_id)
+    if not appointment:
+        raise HTTPException(status_code=409, detail="This slot is already booked or held for a waitlisted patient")
     
     return {
         "id": appointment.id,
@@ -102,10 +105,48 @@ def get_appointment(appointment_id: int, db: Session = Depends(get_db)):
         "updatedAt": appointment.updated_at.isoformat()
     }
 
+@router.post("/transitions", response_model=AppointmentTransitionResponse)
+def transition_appointments(
+    request: AppointmentTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_staff)
+):
+    # Doctors may only move their own appointments; admins and front-desk staff any.
+    doctor_id = None
+    if current_user.user_type == "doctor":
+        if not current_user.doctor:
+            raise HTTPException(status_code=400, detail="Doctor profile not found")
+        doctor_id = current_user.doctor.id
+
+    size = len(request.reschedules) if request.action == "reschedule" else len(request.appointmentIds)
+    if size > BULK_TRANSITION_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_TRANSITION_MAX} appointments per request")
+
+    service = AppointmentService(db)
+    if request.action == "reschedule":
+        results = service.reschedule_appointments(
+            [(item.appointmentId, item.appointmentDate, item.appointmentTime) for item in request.reschedules],
+            doctor_id=doctor_id
+        )
+    else:
+        results = service.transition_appointments(
+            request.action, request.appointmentIds, reason=request.reason, doctor_id=doctor_id
+        )
+
+    updated = sum(1 for result in results if result["result"] == "updated")
+    return {
+        "action": request.action,
+        "updated": updated,
+        "failed": len(results) - updated,
+        "results": results
+    }
+
 @router.post("/{appointment_id}/cancel")
 def cancel_appointment(appointment_id: int, db: Session = Depends(get_db)):
     service = AppointmentService(db)
-    success = service.cancel_appointment(appointment_id)
-    if not success:
+    result = service.cancel_appointment(appointment_id)
+    if result["result"] == "not_found":
         raise HTTPException(status_code=404, detail="Appointment not found")
+    if result["result"] != "updated":
+        raise HTTPException(status_code=409, detail=f"Cannot cancel a {result['status']} appointment")
     return {"message": "Appointment cancelled successfully"}
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, session_branch
 from app.services import AuthService
 from app.schemas import LoginRequest, RegisterRequest, UserResponse
 from app.auth import create_access_token, get_current_user
@@ -18,7 +18,7 @@ def login(credentials: LoginRequest, db: Session = Depends(get_db)):
             detail="Incorrect email or password"
         )
     
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": user.id, "branch": session_branch(db)})
     
     return {
         "access_token": access_token,
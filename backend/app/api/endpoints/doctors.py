@@ -1,41 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, shard_router, session_branch, branch_location, DEFAULT_BRANCH
 from app.services import DoctorService
 from app.schemas import DoctorResponse, DoctorDetail
+from app.services.availability_service import is_available_today
+from app.services.doctor_service import DOCTOR_SORT_OPTIONS, doctor_sort_key
+from app.snapshot import shared_snapshot, with_fields
+import itertools
 
 router = APIRouter()
 
+MISSING_BRANCHES_HEADER = "X-Missing-Branches"
+
+def _merge_branches(fanned_out: tuple, response: Response, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+    """Merge per-branch lists of (sort key, response) into one page.
+
+    Branches that did not answer are named in the X-Missing-Branches header.
+    """
+    results, missing = fanned_out
+    if missing:
+        response.headers[MISSING_BRANCHES_HEADER] = ",".join(missing)
+    merged = sorted(itertools.chain.from_iterable(results.values()), key=lambda item: item[0])
+    end = None if limit is None else offset + limit
+    return [response for _, response in merged[offset:end]]
+
+# Served live from doctor_next_slots; the snapshot stores everything else.
+AVAILABILITY_FIELDS = ("availableToday", "nextAvailableSlot")
+
+def availability_fields(is_available: bool, next_slot_at) -> dict:
+    return {
+        "availableToday": bool(is_available) and is_available_today(next_slot_at),
+        "nextAvailableSlot": next_slot_at.isoformat() if next_slot_at else None
+    }
+
+def doctor_to_response(doctor) -> dict:
+    next_slot_at = doctor.next_slot.next_slot_at if doctor.next_slot else None
+    return {
+        "id": str(doctor.id),
+        "name": doctor.user.full_name,
+        "specialty": doctor.specialty.name if doctor.specialty else "",
+        "experience": doctor.experience_years,
+        "rating": float(doctor.rating) if doctor.rating else 0.0,
+        "reviewCount": doctor.total_reviews,
+        "consultationFee": float(doctor.consultation_fee_onsite) if doctor.consultation_fee_onsite else 0,
+        "location": branch_location(doctor.branch),
+        "branch": doctor.branch,
+        **availability_fields(doctor.is_available, next_slot_at),
+        "profileImage": doctor.user.profile_image_url,
+        "languages": doctor.languages or [],
+        "qualifications": doctor.qualification or [],
+        "bio": doctor.bio
+    }
+
 @router.get("/", response_model=List[DoctorResponse])
 def get_doctors(
+    response: Response,
     specialty_id: Optional[int] = Query(None),
     limit: int = Query(10, le=50),
     offset: int = Query(0, ge=0),
+    sort: str = Query("next_available", description="next_available or rating"),
+    available_today: bool = Query(False),
+    all_branches: bool = Query(False),
     db: Session = Depends(get_db)
 ):
+    if sort not in DOCTOR_SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(DOCTOR_SORT_OPTIONS)}")
+    
+    if all_branches:
+        # Each branch returns its first offset+limit doctors in listing order; the merge pages them.
+        def fetch(branch_db: Session):
+            doctors = DoctorService(branch_db).get_all_doctors(specialty_id, offset + limit, 0, sort, available_today)
+            return [(doctor_sort_key(doctor, sort), doctor_to_response(doctor)) for doctor in doctors]
+        return _merge_branches(shard_router.fan_out(fetch), response, offset, limit)
+    
+    # The default listing is ordered and given availability live from doctor_next_slots,
+    # which bookings keep current; the rest of each entry comes from the snapshot.
+    if sort == "next_available" and not available_today and session_branch(db) == DEFAULT_BRANCH and shared_snapshot.ready():
+        page = DoctorService(db).next_available_page(specialty_id, limit, offset)
+        cached = [shared_snapshot.get(f"doctor:{doctor_id}") for doctor_id, _ in page]
+        # A doctor added since the last snapshot build sends the page down the full query.
+        if all(blob is not None for blob in cached):
+            items = [with_fields(blob, availability_fields(True, next_slot_at)) for blob, (_, next_slot_at) in zip(cached, page)]
+            return Response(content=b"[" + b",".join(items) + b"]", media_type="application/json")
+    
     service = DoctorService(db)
-    doctors = service.get_all_doctors(specialty_id, limit, offset)
+    doctors = service.get_all_doctors(specialty_id, limit, offset, sort, available_today)
     
     # Transform to match frontend expectations
     result = []
     for doctor in doctors:
-        result.append({
-            "id": str(doctor.id),
-            "name": doctor.user.full_name,
-            "specialty": doctor.specialty.name if doctor.specialty else "",
-            "experience": doctor.experience_years,
-            "rating": float(doctor.rating) if doctor.rating else 0.0,
-            "reviewCount": doctor.total_reviews,
-            "consultationFee": float(doctor.consultation_fee_onsite) if doctor.consultation_fee_onsite else 0,
-            "location": "Chennai",  # Default location
-            "availableToday": doctor.is_available,
-            "profileImage": doctor.user.profile_image_url,
-            "languages": doctor.languages or [],
-            "qualifications": doctor.qualification or [],
-            "bio": doctor.bio
-        })
+        result.append(doctor_to_response(doctor))
+    
+    return result
+
+# Declared before /{doctor_id}, which would otherwise capture "search" as an id.
+@router.get("/search")
+def search_doctors(
+    response: Response,
+    q: str = Query(..., min_length=2),
+    specialty_id: Optional[int] = Query(None),
+    all_branches: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    if all_branches:
+        def fetch(branch_db: Session):
+            doctors = DoctorService(branch_db).search_doctors(q, specialty_id)
+            return [(doctor_sort_key(doctor, "rating"), doctor_to_response(doctor)) for doctor in doctors]
+        return _merge_branches(shard_router.fan_out(fetch), response)
+    
+    service = DoctorService(db)
+    doctors = service.search_doctors(q, specialty_id)
+    
+    result = []
+    for doctor in doctors:
+        result.append(doctor_to_response(doctor))
     
     return result
 
@@ -47,19 +127,7 @@ def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Doctor not found")
     
     return {
-        "id": str(doctor.id),
-        "name": doctor.user.full_name,
-        "specialty": doctor.specialty.name if doctor.specialty else "",
-        "experience": doctor.experience_years,
-        "rating": float(doctor.rating) if doctor.rating else 0.0,
-        "reviewCount": doctor.total_reviews,
-        "consultationFee": float(doctor.consultation_fee_onsite) if doctor.consultation_fee_onsite else 0,
-        "location": "Chennai",
-        "availableToday": doctor.is_available,
-        "profileImage": doctor.user.profile_image_url,
-        "languages": doctor.languages or [],
-        "qualifications": doctor.qualification or [],
-        "bio": doctor.bio,
+        **doctor_to_response(doctor),
         "awards": doctor.awards or [],
         "specializations": [doctor.specialty.name] if doctor.specialty else [],
         "workingHours": {
@@ -71,32 +139,3 @@ def get_doctor(doctor_id: int, db: Session = Depends(get_db)):
             "saturday": "9:00 AM - 1:00 PM"
         }
     }
-
-@router.get("/search")
-def search_doctors(
-    q: str = Query(..., min_length=2),
-    specialty_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db)
-):
-    service = DoctorService(db)
-    doctors = service.search_doctors(q, specialty_id)
-    
-    result = []
-    for doctor in doctors:
-        result.append({
-            "id": str(doctor.id),
-            "name": doctor.user.full_name,
-            "specialty": doctor.specialty.name if doctor.specialty else "",
-            "experience": doctor.experience_years,
-            "rating": float(doctor.rating) if doctor.rating else 0.0,
-            "reviewCount": doctor.total_reviews,
-            "consultationFee": float(doctor.consultation_fee_onsite) if doctor.consultation_fee_onsite else 0,
-            "location": "Chennai",
-            "availableToday": doctor.is_available,
-            "profileImage": doctor.user.profile_image_url,
-            "languages": doctor.languages or [],
-            "qualifications": doctor.qualification or [],
-            "bio": doctor.bio
-        })
-    
-    return result
\ No newline at end of file
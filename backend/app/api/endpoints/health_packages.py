@@ -1,35 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 
 from app.database import get_db
-from app.services import HealthPackageService
-from app.schemas import HealthPackageResponse
+from app.services import HealthPackageService, PackageBookingService
+from app.schemas import HealthPackageResponse, HealthPackageFilters, HealthPackageFacets, PackageAvailability
+from app.snapshot import shared_snapshot
 
 router = APIRouter()
 
+def package_to_response(package) -> dict:
+    return {
+        "id": package.id,
+        "title": package.name,
+        "description": package.description,
+        "price": float(package.price),
+        "originalPrice": float(package.original_price) if package.original_price else None,
+        "items": package.tests_included or [],
+        "duration": f"{package.duration_hours} hours" if package.duration_hours else None,
+        "imageUrl": None,
+        "category": package.category,
+        "popular": package.is_popular
+    }
+
+def get_package_filters(
+    category: Optional[str] = Query(None),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_discount: Optional[float] = Query(None, ge=0, le=100),
+    max_duration: Optional[int] = Query(None, ge=0),
+    tests: List[str] = Query([])
+) -> HealthPackageFilters:
+    return HealthPackageFilters(
+        category=category,
+        minPrice=min_price,
+        maxPrice=max_price,
+        minDiscountPercent=min_discount,
+        maxDurationHours=max_duration,
+        tests=tests
+    )
+
 @router.get("/", response_model=List[HealthPackageResponse])
-def get_health_packages(db: Session = Depends(get_db)):
+def get_health_packages(
+    filters: HealthPackageFilters = Depends(get_package_filters),
+    db: Session = Depends(get_db)
+):
+    if filters == HealthPackageFilters():
+        cached = shared_snapshot.get("health_packages")
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+    
     service = HealthPackageService(db)
-    packages = service.get_all_packages()
+    packages = service.get_all_packages(filters)
     
     result = []
     for package in packages:
-        result.append({
-            "id": package.id,
-            "title": package.name,
-            "description": package.description,
-            "price": float(package.price),
-            "originalPrice": float(package.original_price) if package.original_price else None,
-            "items": package.tests_included or [],
-            "duration": f"{package.duration_hours} hours" if package.duration_hours else None,
-            "imageUrl": None,
-            "category": package.category,
-            "popular": package.is_popular
-        })
+        result.append(package_to_response(package))
     
     return result
 
+@router.get("/facets", response_model=HealthPackageFacets)
+def get_health_package_facets(
+    filters: HealthPackageFilters = Depends(get_package_filters),
+    db: Session = Depends(get_db)
+):
+    service = HealthPackageService(db)
+    return service.get_facets(filters)
+
 @router.get("/{package_id}", response_model=HealthPackageResponse)
 def get_health_package(package_id: int, db: Session = Depends(get_db)):
     service = HealthPackageService(db)
@@ -37,15 +75,23 @@ def get_health_package(package_id: int, db: Session = Depends(get_db)):
     if not package:
         raise HTTPException(status_code=404, detail="Health package not found")
     
+    return package_to_response(package)
+
+@router.get("/{package_id}/availability", response_model=PackageAvailability)
+def get_package_availability(
+    package_id: int,
+    date: str = Query(..., description="YYYY-MM-DD"),
+    db: Session = Depends(get_db)
+):
+    package = HealthPackageService(db).get_package_by_id(package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Health package not found")
+    
+    scheduled_date = datetime.strptime(date, "%Y-%m-%d").date()
+    remaining = PackageBookingService(db).get_remaining_capacity(package, scheduled_date)
     return {
-        "id": package.id,
-        "title": package.name,
-        "description": package.description,
-        "price": float(package.price),
-        "originalPrice": float(package.original_price) if package.original_price else None,
-        "items": package.tests_included or [],
-        "duration": f"{package.duration_hours} hours" if package.duration_hours else None,
-        "imageUrl": None,
-        "category": package.category,
-        "popular": package.is_popular
+        "packageId": package.id,
+        "date": scheduled_date.isoformat(),
+        "capacity": package.daily_capacity,
+        "remaining": remaining
     }
\ No newline at end of file
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.database import get_db
+from app.services import MedicalRecordService
+from app.schemas import MedicalRecordCreate, MedicalRecordTimeline, MedicalRecordDetail
+from app.auth import require_doctor, require_patient_or_doctor
+from app.models import User
+
+router = APIRouter()
+
+def _check_patient_access(current_user: User, patient_id: int) -> None:
+    # Doctors and admins can read any record, patients only their own
+    if current_user.user_type in ["doctor", "admin"]:
+        return
+    if not current_user.patient or current_user.patient.id != patient_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+def _record_to_response(record) -> dict:
+    return {
+        "id": record.id,
+        "patientId": record.patient_id,
+        "doctorId": record.doctor_id,
+        "appointmentId": record.appointment_id,
+        "visitDate": record.visit_date.isoformat(),
+        "chiefComplaint": record.chief_complaint,
+        "historyOfPresentIllness": record.history_of_present_illness,
+        "physicalExamination": record.physical_examination,
+        "diagnosis": record.diagnosis,
+        "treatmentPlan": record.treatment_plan,
+        "prescription": record.prescription,
+        "vitals": {
+            "bloodPressure": record.blood_pressure,
+            "heartRate": record.heart_rate,
+            "temperature": float(record.temperature) if record.temperature is not None else None,
+            "respiratoryRate": record.respiratory_rate,
+            "oxygenSaturation": record.oxygen_saturation
+        },
+        "followUpRequired": record.follow_up_required,
+        "followUpDate": record.follow_up_date.isoformat() if record.follow_up_date else None,
+        "followUpNotes": record.follow_up_notes,
+        "createdAt": record.created_at.isoformat(),
+        "updatedAt": record.updated_at.isoformat()
+    }
+
+@router.post("/", response_model=MedicalRecordDetail)
+def create_medical_record(
+    data: MedicalRecordCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_doctor)
+):
+    doctor_id = current_user.doctor.id if current_user.doctor else None
+    if not doctor_id:
+        raise HTTPException(status_code=400, detail="Doctor profile not found")
+    
+    service = MedicalRecordService(db)
+    record = service.create_record(data, doctor_id)
+    return _record_to_response(record)
+
+@router.get("/patients/{patient_id}/timeline", response_model=MedicalRecordTimeline)
+def get_patient_timeline(
+    patient_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    _check_patient_access(current_user, patient_id)
+    
+    service = MedicalRecordService(db)
+    try:
+        rows, next_cursor = service.get_timeline(patient_id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return {
+        "items": [
+            {
+                "id": row.id,
+                "visitDate": row.visit_date.isoformat(),
+                "doctorId": row.doctor_id,
+                "doctorName": row.doctor_name,
+                "diagnosisSummary": row.diagnosis_summary,
+                "vitals": {
+                    "bloodPressure": row.blood_pressure,
+                    "heartRate": row.heart_rate,
+                    "temperature": float(row.temperature) if row.temperature is not None else None,
+                    "respiratoryRate": row.respiratory_rate,
+                    "oxygenSaturation": row.oxygen_saturation
+                }
+            }
+            for row in rows
+        ],
+        "nextCursor": next_cursor
+    }
+
+@router.get("/{record_id}", response_model=MedicalRecordDetail)
+def get_medical_record(
+    record_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = MedicalRecordService(db)
+    record = service.get_record(record_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Medical record not found")
+    _check_patient_access(current_user, record.patient_id)
+    
+    return _record_to_response(record)
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+from datetime import datetime, date
+
+from app.database import get_db
+from app.services import HealthPackageService, PackageBookingService
+from app.schemas import PackageBookingCreate, PackageBookingResponse
+from app.auth import require_patient_or_doctor
+from app.models import User
+
+router = APIRouter()
+
+def _booking_to_response(booking) -> dict:
+    return {
+        "id": booking.id,
+        "patientId": booking.patient_id,
+        "packageId": booking.package_id,
+        "packageTitle": booking.package.name if booking.package else None,
+        "bookingDate": booking.booking_date.isoformat(),
+        "scheduledDate": booking.scheduled_date.isoformat(),
+        "status": booking.status.value,
+        "amountPaid": float(booking.amount_paid) if booking.amount_paid else None,
+        "paymentStatus": booking.payment_status.value,
+        "createdAt": booking.created_at.isoformat()
+    }
+
+def _current_patient_id(current_user: User) -> int:
+    patient_id = current_user.patient.id if current_user.patient else None
+    if not patient_id:
+        raise HTTPException(status_code=400, detail="Patient profile not found")
+    return patient_id
+
+@router.post("/", response_model=PackageBookingResponse)
+def book_package(
+    data: PackageBookingCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    if current_user.user_type != "patient":
+        raise HTTPException(status_code=403, detail="Only patients can book health packages")
+    patient_id = _current_patient_id(current_user)
+    
+    scheduled_date = datetime.strptime(data.scheduledDate, "%Y-%m-%d").date()
+    if scheduled_date < date.today():
+        raise HTTPException(status_code=400, detail="Scheduled date is in the past")
+    
+    package = HealthPackageService(db).get_package_by_id(data.packageId)
+    if not package:
+        raise HTTPException(status_code=404, detail="Health package not found")
+    
+    service = PackageBookingService(db)
+    booking = service.book_package(package, patient_id, scheduled_date)
+    if not booking:
+        raise HTTPException(status_code=409, detail="No lab capacity left for this date")
+    
+    return _booking_to_response(booking)
+
+@router.get("/", response_model=List[PackageBookingResponse])
+def get_my_bookings(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = PackageBookingService(db)
+    bookings = service.get_bookings_by_patient(_current_patient_id(current_user))
+    return [_booking_to_response(booking) for booking in bookings]
+
+@router.post("/{booking_id}/cancel")
+def cancel_booking(
+    booking_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = PackageBookingService(db)
+    
+    # Staff can cancel any booking, patients only their own
+    patient_id = None if current_user.user_type in ["doctor", "admin"] else _current_patient_id(current_user)
+    if not service.cancel_booking(booking_id, patient_id):
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return {"message": "Booking cancelled successfully"}
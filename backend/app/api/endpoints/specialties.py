@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
 from app.services import SpecialtyService
 from app.schemas import SpecialtyResponse
+from app.snapshot import shared_snapshot
 
 router = APIRouter()
 
 @router.get("/", response_model=List[SpecialtyResponse])
 def get_specialties(db: Session = Depends(get_db)):
+    cached = shared_snapshot.get("specialties")
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
     service = SpecialtyService(db)
     specialties = service.get_all_specialties()
     return specialties
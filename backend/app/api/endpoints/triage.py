@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services import TriageService
+from app.schemas import TriageRequest, TriageResponse
+from app.api.endpoints.doctors import doctor_to_response
+
+router = APIRouter()
+
+DISCLAIMER = (
+    "This symptom checker is not a substitute for professional medical advice. "
+    "Always consult with a qualified healthcare provider for diagnosis and treatment."
+)
+
+@router.post("/", response_model=TriageResponse)
+def triage_symptoms(request: TriageRequest, db: Session = Depends(get_db)):
+    service = TriageService(db)
+    result = service.triage(request.symptoms, use_llm=request.useLlmFallback)
+    
+    return {
+        "source": result["source"],
+        "specialties": [
+            {
+                "id": item["specialty"].id,
+                "name": item["specialty"].name,
+                "score": item["score"],
+                "matchedTerms": item["matchedTerms"]
+            }
+            for item in result["specialties"]
+        ],
+        "doctors": [
+            doctor_to_response(doctor)
+            for doctor in result["doctors"]
+        ],
+        "disclaimer": DISCLAIMER
+    }
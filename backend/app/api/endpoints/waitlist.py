@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.services import WaitlistService
+from app.schemas import WaitlistCreate, WaitlistResponse, AppointmentResponse
+from app.auth import require_patient_or_doctor
+from app.models import User
+
+router = APIRouter()
+
+def _entry_to_response(entry) -> dict:
+    return {
+        "id": entry.id,
+        "patientId": entry.patient_id,
+        "doctorId": entry.doctor_id,
+        "desiredDate": entry.desired_date.isoformat(),
+        "preferredTimeFrom": entry.preferred_time_from.strftime("%H:%M") if entry.preferred_time_from else None,
+        "preferredTimeTo": entry.preferred_time_to.strftime("%H:%M") if entry.preferred_time_to else None,
+        "priority": entry.priority,
+        "status": entry.status.value,
+        "offeredTime": entry.offered_time.strftime("%H:%M") if entry.offered_time else None,
+        "offerExpiresAt": entry.offer_expires_at.isoformat() if entry.offer_expires_at else None,
+        "appointmentId": entry.appointment_id,
+        "createdAt": entry.created_at.isoformat()
+    }
+
+def _current_patient_id(current_user: User) -> int:
+    patient_id = current_user.patient.id if current_user.patient else None
+    if not patient_id:
+        raise HTTPException(status_code=400, detail="Patient profile not found")
+    return patient_id
+
+@router.post("/", response_model=WaitlistResponse)
+def join_waitlist(
+    data: WaitlistCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = WaitlistService(db)
+    
+    # Front desk (doctor/admin) can queue a patient and set priority; patients queue themselves.
+    if current_user.user_type in ["doctor", "admin"]:
+        if not data.patientId:
+            raise HTTPException(status_code=400, detail="patientId is required")
+        entry = service.join_waitlist(data, data.patientId, data.priority)
+    else:
+        entry = service.join_waitlist(data, _current_patient_id(current_user))
+    
+    return _entry_to_response(entry)
+
+@router.get("/", response_model=List[WaitlistResponse])
+def get_my_waitlist(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = WaitlistService(db)
+    entries = service.get_entries_by_patient(_current_patient_id(current_user))
+    return [_entry_to_response(entry) for entry in entries]
+
+@router.post("/{entry_id}/claim", response_model=AppointmentResponse)
+def claim_waitlist_offer(
+    entry_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = WaitlistService(db)
+    appointment = service.claim_offer(entry_id, _current_patient_id(current_user))
+    if not appointment:
+        raise HTTPException(status_code=409, detail="No active offer for this waitlist entry")
+    
+    return {
+        "id": appointment.id,
+        "patientId": appointment.patient_id,
+        "doctorId": appointment.doctor_id,
+        "appointmentDate": appointment.appointment_date.isoformat(),
+        "appointmentTime": appointment.appointment_time.strftime("%H:%M"),
+        "status": appointment.status.value,
+        "reason": appointment.reason_for_visit,
+        "patientNotes": appointment.notes,
+        "doctorNotes": None,
+        "consultationFee": float(appointment.consultation_fee) if appointment.consultation_fee else None,
+        "type": "offline" if appointment.consultation_mode == "onsite" else "online",
+        "createdAt": appointment.created_at.isoformat(),
+        "updatedAt": appointment.updated_at.isoformat()
+    }
+
+@router.delete("/{entry_id}")
+def leave_waitlist(
+    entry_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_patient_or_doctor)
+):
+    service = WaitlistService(db)
+    entry = service.leave_waitlist(entry_id, _current_patient_id(current_user))
+    if not entry:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    return {"message": "Removed from waitlist"}
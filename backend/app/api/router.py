@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import specialties, doctors, appointments, health_packages, auth
+from .endpoints import specialties, doctors, appointments, health_packages, auth, triage, waitlist, medical_records, package_bookings, admin
 
 api_router = APIRouter()
 
@@ -7,4 +7,9 @@ api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(specialties.router, prefix="/specialties", tags=["Specialties"])
 api_router.include_router(doctors.router, prefix="/doctors", tags=["Doctors"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["Appointments"])
-api_router.include_router(health_packages.router, prefix="/health-packages", tags=["Health Packages"])
\ No newline at end of file
+api_router.include_router(health_packages.router, prefix="/health-packages", tags=["Health Packages"])
+api_router.include_router(triage.router, prefix="/triage", tags=["Triage"])
+api_router.include_router(waitlist.router, prefix="/waitlist", tags=["Waitlist"])
+api_router.include_router(medical_records.router, prefix="/medical-records", tags=["Medical Records"])
+api_router.include_router(package_bookings.router, prefix="/package-bookings", tags=["Package Bookings"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
\ No newline at end of file
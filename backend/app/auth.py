@@ -2,7 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, shard_router, session_branch, UnknownBranch
 from app.models import User
 from datetime import datetime, timedelta
 import os
@@ -22,15 +22,21 @@ def create_access_token(data: dict):
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return user_id
+        return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def get_current_user(db: Session = Depends(get_db), user_id: int = Depends(verify_token)):
-    user = db.query(User).filter(User.id == user_id).first()
+def get_current_user(db: Session = Depends(get_db), claims: dict = Depends(verify_token)):
+    # User ids are per database, so a token is only valid against the database that issued it.
+    try:
+        same_database = shard_router.same_database(claims.get("branch"), session_branch(db))
+    except UnknownBranch:
+        same_database = False
+    if not same_database:
+        raise HTTPException(status_code=401, detail="Token was issued for another branch")
+    user = db.query(User).filter(User.id == claims["sub"]).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
@@ -40,7 +46,17 @@ def require_doctor(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Doctor access required")
     return current_user
 
+def require_staff(current_user: User = Depends(get_current_user)):
+    if current_user.user_type not in ["doctor", "admin", "staff"]:
+        raise HTTPException(status_code=403, detail="Staff access required")
+    return current_user
+
 def require_patient_or_doctor(current_user: User = Depends(get_current_user)):
     if current_user.user_type not in ["patient", "doctor", "admin"]:
         raise HTTPException(status_code=403, detail="Access denied")
+    return current_user
+
+def require_admin(current_user: User = Depends(get_current_user)):
+    if current_user.user_type != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
\ No newline at end of file
@@ -0,0 +1,341 @@
+"""
+Idempotency-Key support for retried POST requests.
+
+A client sends `Idempotency-Key: <unique value>` with a mutating request. The
+first request with a key inserts an `idempotency_keys` row inside a
+transaction that stays open while the endpoint runs; the response bytes are
+written into that row and committed with it. A retry that arrives later
+replays the stored status, content type and body without running the
+endpoint again. A retry that arrives while the first is still running blocks
+on the row's unique constraint (or, in the same worker, on an in-memory
+event) until the first one commits, then replays it. If the first request
+fails with a 5xx or an exception, its transaction rolls back and the waiting
+retry runs the endpoint itself. If the endpoint succeeded but its response
+cannot be stored (too large, or the write fails), the key is still recorded
+as used, so retries get a 409 instead of repeating the booking.
+
+Keys are scoped by method, path, X-Branch and the caller's Authorization
+header, and each key remembers a hash of its request body: reusing a key for a
+different request is rejected. Rows expire after IDEMPOTENCY_TTL_HOURS and are deleted
+by a background sweeper.
+"""
+
+from sqlalchemy import create_engine, select, delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from app.database import SessionLocal, shard_router
+from app.models import IdempotencyKey
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_WAIT_MS = int(os.getenv("IDEMPOTENCY_WAIT_MS", "10000"))
+IDEMPOTENCY_MAX_RESPONSE_BYTES = int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", "65536"))
+IDEMPOTENCY_POOL_SIZE = int(os.getenv("IDEMPOTENCY_POOL_SIZE", "5"))
+IDEMPOTENCY_SWEEP_SECONDS = int(os.getenv("IDEMPOTENCY_SWEEP_SECONDS", "300"))
+IDEMPOTENCY_SWEEP_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH_SIZE", "5000"))
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# Claims hold a connection for the length of the request; a separate pool keeps
+# them from starving the endpoint's own sessions. Keys live in the default
+# branch's database, next to the sweeper's sessions.
+key_engine = create_engine(
+    shard_router.engine().url,
+    pool_size=IDEMPOTENCY_POOL_SIZE,
+    max_overflow=IDEMPOTENCY_POOL_SIZE,
+    pool_timeout=IDEMPOTENCY_WAIT_MS / 1000
+)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def request_scope(method: str, path: str, authorization: str, branch: str = "") -> str:
+    caller = hashlib.sha256(authorization.encode("utf-8")).hexdigest() if authorization else ""
+    return hashlib.sha256(f"{method} {path.rstrip('/')} {caller} {branch}".encode("utf-8")).hexdigest()
+
+class KeyInProgress(Exception):
+    """The first request with this key, or the key pool, did not free up within IDEMPOTENCY_WAIT_MS."""
+
+class IdempotencyStore:
+    def __init__(self, engine=key_engine, ttl_hours: int = IDEMPOTENCY_TTL_HOURS, wait_ms: int = IDEMPOTENCY_WAIT_MS):
+        self.engine = engine
+        self.ttl_hours = ttl_hours
+        self.wait_ms = wait_ms
+
+    def claim(self, scope: str, key: str, request_hash: str) -> Tuple[Optional[Connection], Optional[Row]]:
+        """Either take ownership of the key (open connection) or return the stored result.
+
+        Raises KeyInProgress if another request holds the key for too long, or
+        if every pooled connection is held by other claims for as long.
+        """
+        while True:
+            try:
+                connection = self.engine.connect()
+            except PoolTimeoutError as e:
+                raise KeyInProgress() from e
+            try:
+                connection.execute(text(f"SET LOCAL lock_timeout = {int(self.wait_ms)}"))
+                stmt = insert(IdempotencyKey).values(
+                    scope=scope, key=key, request_hash=request_hash,
+                    expires_at=_utcnow() + timedelta(hours=self.ttl_hours)
+                )
+                # An expired row is taken over as if it were new.
+                claimed = connection.execute(
+                    stmt.on_conflict_do_update(
+                        constraint="uq_idempotency_keys_scope_key",
+                        set_={
+                            "request_hash": stmt.excluded.request_hash,
+                            "expires_at": stmt.excluded.expires_at,
+                            "created_at": func.now(),
+                            "status_code": None,
+                            "content_type": None,
+                            "response_body": None
+                        },
+                        where=IdempotencyKey.expires_at <= func.now()
+                    ).returning(IdempotencyKey.id)
+                ).scalar()
+                if claimed is not None:
+                    return connection, None
+
+                stored = connection.execute(
+                    select(
+                        IdempotencyKey.request_hash, IdempotencyKey.status_code,
+                        IdempotencyKey.content_type, IdempotencyKey.response_body
+                    ).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                ).first()
+            except OperationalError as e:
+                self.release(connection)
+                if getattr(e.orig, "pgcode", None) == "55P03":
+                    raise KeyInProgress() from e
+                raise
+            except Exception:
+                self.release(connection)
+                raise
+            self.release(connection)
+            # None only if the sweeper removed the row in between; claim again.
+            if stored is not None:
+                return None, stored
+
+    def complete(
+        self, connection: Connection, scope: str, key: str,
+        status_code: Optional[int], content_type: Optional[str], body: Optional[bytes]
+    ) -> None:
+        """Commit the claim with its response; a None status records the key as used without one."""
+        try:
+            if status_code is not None:
+                connection.execute(
+                    IdempotencyKey.__table__.update()
+                    .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                    .values(status_code=status_code, content_type=content_type, response_body=body)
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def mark_used(self, scope: str, key: str, request_hash: str) -> None:
+        """Record a key whose request ran but whose claim could not be committed."""
+        with self.engine.begin() as connection:
+            connection.execute(
+                insert(IdempotencyKey).values(
+                    scope=scope, key=key, request_hash=request_hash,
+                    expires_at=_utcnow() + timedelta(hours=self.ttl_hours)
+                ).on_conflict_do_nothing(constraint="uq_idempotency_keys_scope_key")
+            )
+
+    def release(self, connection: Connection) -> None:
+        """Drop an unfinished claim so the next retry runs the request again."""
+        try:
+            connection.rollback()
+        finally:
+            connection.close()
+
+    def evict_expired(self, db: Session, batch_size: int = IDEMPOTENCY_SWEEP_BATCH_SIZE) -> int:
+        evicted = 0
+        while True:
+            expired = select(IdempotencyKey.id).where(IdempotencyKey.expires_at <= func.now()).limit(batch_size)
+            count = db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired.scalar_subquery()))).rowcount
+            db.commit()
+            evicted += count
+            if count < batch_size:
+                return evicted
+
+async def _send_json(send, status_code: int, detail: str, headers: Iterable[Tuple[bytes, bytes]] = ()) -> None:
+    body = json.dumps({"detail": detail}, separators=(",", ":")).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class IdempotencyMiddleware:
+    """ASGI middleware applying Idempotency-Key handling to the given POST paths.
+
+    Requests without the header pass through untouched.
+    """
+
+    def __init__(self, app, paths: Iterable[str], store: Optional[IdempotencyStore] = None):
+        self.app = app
+        self.paths = {path.rstrip("/") for path in paths}
+        self.store = store or IdempotencyStore()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].rstrip("/") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = bytes(body)
+        key_scope = request_scope(
+            scope["method"], scope["path"], headers.get("authorization", ""), headers.get("x-branch", "")
+        )
+        request_hash = hashlib.sha256(body).hexdigest()
+
+        # Duplicates within this worker wait here without holding a database connection.
+        local = (key_scope, key)
+        while local in self._in_flight:
+            await self._in_flight[local].wait()
+        event = self._in_flight[local] = asyncio.Event()
+        try:
+            await self._handle(scope, receive, send, key_scope, key, request_hash, body)
+        finally:
+            del self._in_flight[local]
+            event.set()
+
+    async def _handle(self, scope, receive, send, key_scope: str, key: str, request_hash: str, body: bytes) -> None:
+        try:
+            connection, stored = await run_in_threadpool(self.store.claim, key_scope, key, request_hash)
+        except KeyInProgress:
+            await _send_json(send, 409, "A request with this Idempotency-Key is still in progress", [(b"retry-after", b"1")])
+            return
+
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                await _send_json(send, 422, "Idempotency-Key was already used with a different request")
+                return
+            if stored.status_code is None:
+                await _send_json(send, 409, "A request with this Idempotency-Key already completed; its response was not stored")
+                return
+            stored_body = bytes(stored.response_body)
+            response_headers = [
+                (b"content-length", str(len(stored_body)).encode()),
+                (b"idempotent-replayed", b"true")
+            ]
+            if stored.content_type:
+                response_headers.append((b"content-type", stored.content_type.encode("latin-1")))
+            await send({"type": "http.response.start", "status": stored.status_code, "headers": response_headers})
+            await send({"type": "http.response.body", "body": stored_body})
+            return
+
+        body_sent = False
+
+        async def replay_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "content_type": None, "body": bytearray()}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                response["body"].extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except Exception:
+            await run_in_threadpool(self.store.release, connection)
+            raise
+
+        # Server errors are not stored; a retry runs the request again.
+        if response["status"] >= 500:
+            await run_in_threadpool(self.store.release, connection)
+            return
+        # The endpoint has committed its work, so from here on the key must end up recorded.
+        stored = len(response["body"]) <= IDEMPOTENCY_MAX_RESPONSE_BYTES
+        try:
+            await run_in_threadpool(
+                self.store.complete, connection, key_scope, key,
+                response["status"] if stored else None, response["content_type"], bytes(response["body"]) if stored else None
+            )
+        except Exception as e:
+            logger.error(f"Could not store idempotent response for key {key!r}: {e}")
+            try:
+                await run_in_threadpool(self.store.mark_used, key_scope, key, request_hash)
+            except Exception as e:
+                logger.error(f"Could not record idempotency key {key!r} as used; a retry will run again: {e}")
+
+class IdempotencyKeySweeper:
+    """Background thread that deletes expired idempotency keys."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sweep_seconds: int = IDEMPOTENCY_SWEEP_SECONDS,
+        store: Optional[IdempotencyStore] = None
+    ):
+        self.session_factory = session_factory
+        self.sweep_seconds = sweep_seconds
+        self.store = store or IdempotencyStore()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="idempotency-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                with self.session_factory() as db:
+                    evicted = self.store.evict_expired(db)
+                if evicted:
+                    logger.info(f"Evicted {evicted} expired idempotency keys")
+            except Exception as e:
+                logger.error(f"Idempotency key sweep failed: {e}")
+
+idempotency_sweeper = IdempotencyKeySweeper()
@@ -4,5 +4,11 @@ from .doctor import Doctor
 from .specialty import Specialty
 from .appointment import Appointment
 from .health_package import HealthPackage
+from .waitlist import WaitlistEntry
+from .reminder import Reminder
+from .medical_record import MedicalRecord
+from .package_booking import PackageBooking, PackageCapacityShard
+from .doctor_availability import DoctorNextSlot
+from .idempotency_key import IdempotencyKey
 
-__all__ = ["User", "Patient", "Doctor", "Specialty", "Appointment", "HealthPackage"]
\ No newline at end of file
+__all__ = ["User", "Patient", "Doctor", "Specialty", "Appointment", "HealthPackage", "WaitlistEntry", "Reminder", "MedicalRecord", "PackageBooking", "PackageCapacityShard", "DoctorNextSlot", "IdempotencyKey"]
\ No newline at end of file
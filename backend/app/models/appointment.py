@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, Date, Time, Text, DECIMAL, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, Date, Time, Text, DECIMAL, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, BranchScoped
 import enum
 
 class AppointmentStatus(str, enum.Enum):
@@ -29,11 +29,11 @@ class PaymentStatus(str, enum.Enum):
     FAILED = "failed"
     REFUNDED = "refunded"
 
-class Appointment(Base):
+class Appointment(BranchScoped, Base):
     __tablename__ = "appointments"
     
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, index=True)
     
     # Appointment Details
@@ -61,4 +61,17 @@ class Appointment(Base):
     
     # Relationships
     patient = relationship("Patient", back_populates="appointments")
-    doctor = relationship("Doctor", back_populates="appointments")
\ No newline at end of file
+    doctor = relationship("Doctor", back_populates="appointments")
+    
+    __table_args__ = (
+        # Slot conflict checks and per-doctor schedules only look at live appointments.
+        Index(
+            "idx_appointments_doctor_slot",
+            doctor_id, appointment_date, appointment_time,
+            postgresql_where=(status != AppointmentStatus.CANCELLED)
+        ),
+        # A patient's history, newest first; also serves plain patient_id lookups.
+        Index("idx_appointments_patient_date", patient_id, appointment_date.desc()),
+        # Incremental analytics export picks up rows changed since its watermark.
+        Index("idx_appointments_updated_at", updated_at),
+    )
\ No newline at end of file
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DECIMAL, Time, ARRAY, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Text, DECIMAL, Time, ARRAY, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, BranchScoped
 
-class Doctor(Base):
+class Doctor(BranchScoped, Base):
     __tablename__ = "doctors"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -33,7 +33,7 @@ class Doctor(Base):
     total_reviews = Column(Integer, default=0)
     
     # Status
-    is_available = Column(Boolean, default=True, index=True)
+    is_available = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -42,4 +42,16 @@ class Doctor(Base):
     # Relationships
     user = relationship("User", back_populates="doctor")
     specialty = relationship("Specialty", back_populates="doctors")
-    appointments = relationship("Appointment", back_populates="doctor")
\ No newline at end of file
+    appointments = relationship("Appointment", back_populates="doctor")
+    next_slot = relationship("DoctorNextSlot", back_populates="doctor", uselist=False)
+    
+    __table_args__ = (
+        # The directory lists available doctors only, best rated first.
+        Index(
+            "idx_doctors_available_rating",
+            rating.desc(), total_reviews.desc(),
+            postgresql_where=(is_available == True)
+        ),
+        # Branches that share a database list their own doctors, often by specialty.
+        Index("idx_doctors_branch_specialty", "branch", specialty_id),
+    )
\ No newline at end of file
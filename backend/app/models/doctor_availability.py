@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class DoctorNextSlot(Base):
+    """Precomputed earliest free slot per doctor, used to order the directory.
+
+    Kept current by the booking and cancellation paths and a periodic sweep;
+    next_slot_at is NULL when the doctor has no free slot within the horizon.
+    """
+    __tablename__ = "doctor_next_slots"
+    
+    doctor_id = Column(Integer, ForeignKey("doctors.id", ondelete="CASCADE"), primary_key=True)
+    next_slot_at = Column(DateTime(timezone=True))
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    doctor = relationship("Doctor", back_populates="next_slot")
+    
+    __table_args__ = (
+        Index("idx_doctor_next_slots_next", next_slot_at, doctor_id),
+        Index("idx_doctor_next_slots_computed", computed_at),
+    )
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, ARRAY, DateTime
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, DateTime, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from app.database import Base
 
 class HealthPackage(Base):
     __tablename__ = "health_packages"
+    __table_args__ = (
+        Index("idx_health_packages_tests", "tests_included", postgresql_using="gin"),
+        Index("idx_health_packages_active_category", "is_active", "category", "price"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -16,6 +21,7 @@ class HealthPackage(Base):
     duration_hours = Column(Integer)
     category = Column(String(100))
     is_popular = Column(Boolean, default=False)
+    daily_capacity = Column(Integer, default=50, nullable=False)  # lab slots per day
     
     # Status
     is_active = Column(Boolean, default=True)
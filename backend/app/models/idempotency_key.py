@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """Stored response of the first request made with a client Idempotency-Key.
+
+    The row is inserted without committing before the request runs and is
+    committed together with the response, so a concurrent duplicate blocks on
+    the unique constraint until the first request finishes or fails.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(64), nullable=False)  # hash of method, path and caller
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    content_type = Column(String(255))
+    response_body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        Index("idx_idempotency_keys_expires", expires_at),
+    )
@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, Text, Date, Boolean, DECIMAL, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.types import CompressedText
+
+DIAGNOSIS_SUMMARY_LENGTH = 160
+
+class MedicalRecord(Base):
+    __tablename__ = "medical_records"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False, index=True)
+    appointment_id = Column(Integer, ForeignKey("appointments.id"))
+    
+    # Record Details
+    visit_date = Column(Date, nullable=False, index=True)
+    chief_complaint = Column(Text)
+    diagnosis_summary = Column(String(DIAGNOSIS_SUMMARY_LENGTH))
+    
+    # Narrative fields: compressed at rest and only loaded when a full record is opened
+    history_of_present_illness = deferred(Column(CompressedText()), group="narrative")
+    physical_examination = deferred(Column(CompressedText()), group="narrative")
+    diagnosis = deferred(Column(CompressedText()), group="narrative")
+    treatment_plan = deferred(Column(CompressedText()), group="narrative")
+    prescription = deferred(Column(CompressedText()), group="narrative")
+    follow_up_notes = deferred(Column(CompressedText()), group="narrative")
+    
+    # Vital Signs
+    blood_pressure = Column(String(20))
+    heart_rate = Column(Integer)
+    temperature = Column(DECIMAL(4, 2))
+    respiratory_rate = Column(Integer)
+    oxygen_saturation = Column(Integer)
+    
+    # Follow-up
+    follow_up_required = Column(Boolean, default=False)
+    follow_up_date = Column(Date)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Covers the timeline page query so it is answered from the index alone.
+        Index(
+            "idx_medical_records_timeline",
+            patient_id, visit_date.desc(), id.desc(),
+            postgresql_include=[
+                "doctor_id", "diagnosis_summary", "blood_pressure", "heart_rate",
+                "temperature", "respiratory_rate", "oxygen_saturation"
+            ]
+        ),
+    )
+    
+    # Relationships
+    patient = relationship("Patient")
+    doctor = relationship("Doctor")
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, Integer, Text, Date, DECIMAL, DateTime, ForeignKey, Enum, CheckConstraint, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.appointment import AppointmentStatus, PaymentStatus
+
+class PackageBooking(Base):
+    __tablename__ = "package_bookings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    package_id = Column(Integer, ForeignKey("health_packages.id"), nullable=False)
+    
+    # Booking Details
+    booking_date = Column(Date, nullable=False)
+    scheduled_date = Column(Date, index=True)
+    status = Column(Enum(AppointmentStatus), default=AppointmentStatus.PENDING)
+    capacity_shard = Column(Integer)
+    
+    # Payment
+    amount_paid = Column(DECIMAL(10, 2))
+    payment_status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
+    
+    # Results
+    report_url = Column(Text)
+    report_generated_at = Column(DateTime(timezone=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    patient = relationship("Patient")
+    package = relationship("HealthPackage")
+    
+    __table_args__ = (
+        Index("idx_package_bookings_updated_at", updated_at),
+    )
+
+class PackageCapacityShard(Base):
+    """One slice of a package's lab capacity for a day.
+
+    A day's capacity is split across several rows so concurrent bookings
+    increment different rows instead of queueing on a single counter.
+    """
+    __tablename__ = "package_capacity_shards"
+    
+    package_id = Column(Integer, ForeignKey("health_packages.id", ondelete="CASCADE"), primary_key=True)
+    scheduled_date = Column(Date, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    capacity = Column(Integer, nullable=False)
+    booked = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        CheckConstraint("booked >= 0 AND booked <= capacity", name="ck_capacity_shard_bounds"),
+    )
@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, Text, DECIMAL, Date, ForeignKey, ARRAY, Enum, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, BranchScoped
 import enum
 
 class GenderType(str, enum.Enum):
@@ -9,7 +9,7 @@ class GenderType(str, enum.Enum):
     FEMALE = "female"
     OTHER = "other"
 
-class Patient(Base):
+class Patient(BranchScoped, Base):
     __tablename__ = "patients"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+class ReminderKind(str, enum.Enum):
+    APPOINTMENT_24H = "appointment_24h"
+    APPOINTMENT_1H = "appointment_1h"
+    PAYMENT_PENDING = "payment_pending"
+
+class ReminderStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+class Reminder(Base):
+    __tablename__ = "appointment_reminders"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    appointment_id = Column(Integer, ForeignKey("appointments.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(Enum(ReminderKind), nullable=False)
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # Delivery state; locked_until is a lease so a crashed scheduler's batch is retried.
+    status = Column(Enum(ReminderStatus), default=ReminderStatus.PENDING, nullable=False)
+    locked_until = Column(DateTime(timezone=True))
+    attempts = Column(Integer, default=0, nullable=False)
+    channel = Column(String(50))
+    last_error = Column(String(500))
+    sent_at = Column(DateTime(timezone=True))
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # One reminder of each kind per appointment makes scheduling idempotent.
+        UniqueConstraint("appointment_id", "kind", name="uq_reminder_appointment_kind"),
+        Index("idx_reminders_due", due_at, postgresql_where=(status == ReminderStatus.PENDING)),
+    )
+    
+    # Relationships
+    appointment = relationship("Appointment")
@@ -0,0 +1,24 @@
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+from typing import Optional
+import zlib
+
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a BYTEA column."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, level: int = 6, **kwargs):
+        super().__init__(**kwargs)
+        self.level = level
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return zlib.compress(value.encode("utf-8"), self.level)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return zlib.decompress(value).decode("utf-8")
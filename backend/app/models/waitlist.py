@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, Date, Time, Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+import enum
+
+class WaitlistStatus(str, enum.Enum):
+    WAITING = "waiting"
+    OFFERED = "offered"
+    CLAIMED = "claimed"
+    EXPIRED = "expired"
+    CANCELLED = "cancelled"
+
+class WaitlistEntry(Base):
+    __tablename__ = "appointment_waitlist"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=False)
+    
+    # Requested slot window
+    desired_date = Column(Date, nullable=False)
+    preferred_time_from = Column(Time)
+    preferred_time_to = Column(Time)
+    priority = Column(Integer, default=0, nullable=False)
+    reason_for_visit = Column(Text)
+    
+    # Offer / hold state
+    status = Column(Enum(WaitlistStatus), default=WaitlistStatus.WAITING, nullable=False)
+    offered_time = Column(Time)
+    offer_expires_at = Column(DateTime(timezone=True))
+    appointment_id = Column(Integer, ForeignKey("appointments.id"))
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Queue order per doctor/day; only waiting entries are ever popped.
+        Index(
+            "idx_waitlist_queue",
+            doctor_id, desired_date, priority.desc(), created_at,
+            postgresql_where=(status == WaitlistStatus.WAITING)
+        ),
+        Index("idx_waitlist_offer_expiry", offer_expires_at, postgresql_where=(status == WaitlistStatus.OFFERED)),
+    )
+    
+    # Relationships
+    patient = relationship("Patient")
+    doctor = relationship("Doctor")
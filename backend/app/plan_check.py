@@ -0,0 +1,156 @@
+"""
+Query plan regression check.
+
+Runs the key read paths of the services against a seeded local database,
+captures the SQL they emit and asserts that the planner uses the index each
+path was designed around. Sequential scans are disabled while planning
+(unless --natural is given) so a small local dataset still shows whether the
+intended index is usable for the query shape; a failure means the index or
+the query changed in a way that would fall back to a scan in production.
+
+Usage:
+    python -m app.plan_check [--natural] [--verbose]
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Appointment, HealthPackage, MedicalRecord, Patient
+from app.query_log import capture_statements, explain
+from app.schemas.health_package import HealthPackageFilters
+from app.services import (
+    AppointmentService, DoctorService, HealthPackageService, MedicalRecordService,
+    PackageBookingService, WaitlistService
+)
+from app.services.waitlist_service import slot_is_free
+from app.tasks.reminders import ReminderScheduler
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, List, Set, Tuple
+import argparse
+import json
+import sys
+
+@dataclass
+class PlanCheck:
+    name: str
+    run: Callable[[Session, dict], object]
+    indexes: Tuple[str, ...]  # passes if any of these is used (ORM and SQL-file names differ)
+
+PLAN_CHECKS: List[PlanCheck] = [
+    PlanCheck(
+        "appointments by patient",
+        lambda db, ids: AppointmentService(db).get_appointments_by_patient(ids["patient_id"]),
+        ("idx_appointments_patient_date",)
+    ),
+    PlanCheck(
+        "doctor slot lookup",
+        lambda db, ids: slot_is_free(db, ids["doctor_id"], ids["appointment_date"], ids["appointment_time"]),
+        ("idx_appointments_doctor_slot",)
+    ),
+    PlanCheck(
+        "doctor directory by rating",
+        lambda db, ids: DoctorService(db).get_all_doctors(sort="rating"),
+        ("idx_doctors_available_rating",)
+    ),
+    PlanCheck(
+        "doctors free today",
+        lambda db, ids: DoctorService(db).get_all_doctors(available_today=True),
+        ("idx_doctor_next_slots_next",)
+    ),
+    PlanCheck(
+        "medical record timeline",
+        lambda db, ids: MedicalRecordService(db).get_timeline(ids["record_patient_id"]),
+        ("idx_medical_records_timeline",)
+    ),
+    PlanCheck(
+        "due reminders",
+        lambda db, ids: ReminderScheduler(session_factory=lambda: db, channels=[]).load_window(db, datetime.now(timezone.utc)),
+        ("idx_reminders_due",)
+    ),
+    PlanCheck(
+        "health packages by included test",
+        lambda db, ids: HealthPackageService(db).get_all_packages(HealthPackageFilters(tests=[ids["package_test"]])),
+        ("idx_health_packages_tests",)
+    ),
+    PlanCheck(
+        "waitlist by patient",
+        lambda db, ids: WaitlistService(db).get_entries_by_patient(ids["patient_id"]),
+        ("ix_appointment_waitlist_patient_id", "idx_waitlist_patient")
+    ),
+    PlanCheck(
+        "package bookings by patient",
+        lambda db, ids: PackageBookingService(db).get_bookings_by_patient(ids["patient_id"]),
+        ("ix_package_bookings_patient_id", "idx_package_bookings_patient")
+    ),
+]
+
+def sample_ids(db: Session) -> dict:
+    """Pick realistic arguments: the busiest patient and doctor, a real slot, a real test name."""
+    patient_id = db.query(Appointment.patient_id).group_by(Appointment.patient_id).order_by(func.count().desc()).limit(1).scalar()
+    appointment = db.query(Appointment).order_by(Appointment.id.desc()).first()
+    record_patient_id = db.query(MedicalRecord.patient_id).group_by(MedicalRecord.patient_id).order_by(func.count().desc()).limit(1).scalar()
+    package_test = db.query(func.unnest(HealthPackage.tests_included)).limit(1).scalar()
+    if appointment is None:
+        raise SystemExit("plan check needs a seeded database with appointments")
+    return {
+        "patient_id": patient_id or db.query(Patient.id).limit(1).scalar(),
+        "doctor_id": appointment.doctor_id,
+        "appointment_date": appointment.appointment_date,
+        "appointment_time": appointment.appointment_time,
+        "record_patient_id": record_patient_id or patient_id,
+        "package_test": package_test or "CBC"
+    }
+
+def _index_names(plan: dict) -> Set[str]:
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= _index_names(child)
+    return names
+
+def plan_indexes(db: Session, statement: str, parameters, natural: bool = False) -> Set[str]:
+    connection = db.connection()
+    if not natural:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    raw = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    document = raw if isinstance(raw, list) else json.loads(raw)
+    return _index_names(document[0]["Plan"])
+
+def run_checks(db: Session, natural: bool = False, verbose: bool = False) -> List[Tuple[PlanCheck, bool, Set[str]]]:
+    ids = sample_ids(db)
+    results = []
+    for check in PLAN_CHECKS:
+        with capture_statements() as captured:
+            check.run(db, ids)
+        selects = [(statement, parameters) for statement, parameters in captured if statement.lstrip()[:6].upper() == "SELECT"]
+        used: Set[str] = set()
+        for statement, parameters in selects:
+            used |= plan_indexes(db, statement, parameters, natural)
+        passed = any(index in used for index in check.indexes)
+        if verbose or not passed:
+            for statement, parameters in selects:
+                print(f"--- {check.name}\n{statement}\n{explain(db.connection(), statement, parameters, analyze=False)}\n")
+        db.rollback()
+        results.append((check, passed, used))
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Assert that key service queries use their intended indexes.")
+    parser.add_argument("--natural", action="store_true", help="plan with sequential scans enabled")
+    parser.add_argument("--verbose", action="store_true", help="print every captured statement and its plan")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        results = run_checks(db, natural=args.natural, verbose=args.verbose)
+
+    failed = 0
+    for check, passed, used in results:
+        failed += not passed
+        status = "PASS" if passed else "FAIL"
+        print(f"{status}  {check.name}: expected {' or '.join(check.indexes)}; used {', '.join(sorted(used)) or 'no index'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Slow-query log built on SQLAlchemy engine events.
+
+Every statement is timed between before/after_cursor_execute. Statements over
+SLOW_QUERY_MS are logged with a fingerprint (literals and IN lists collapsed,
+so one query shape maps to one id) and the first application frame that
+issued them, and aggregated per fingerprint in memory. A sample of slow
+SELECTs is re-run under EXPLAIN (ANALYZE, BUFFERS) on a background thread
+with its own connection so the plan can be inspected without slowing the
+request that triggered it.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.05"))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_BACKEND_DIR = os.path.dirname(_APP_DIR)
+
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,?)+\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(?:\([^()]*\)\s*,?\s*)+", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_UNSAFE_TO_EXPLAIN = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE)\b|pg_(?:try_)?advisory|nextval\(", re.IGNORECASE)
+
+def normalize(statement: str) -> str:
+    """Collapse a statement to its shape: literals, parameters and lists become `?`."""
+    text = _SPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _PARAM.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (?)", text)
+    return _VALUES_LIST.sub("VALUES (?) ", text).strip()
+
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize(statement).encode("utf-8")).hexdigest()[:16]
+
+def call_site() -> str:
+    """First frame in application code outside this module, e.g. `app/services/x.py:42 get_x`."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(_BACKEND_DIR) and filename != os.path.abspath(__file__) and "site-packages" not in filename:
+            return f"{os.path.relpath(filename, _BACKEND_DIR)}:{frame.lineno} {frame.name}"
+    return "unknown"
+
+def is_explainable(statement: str) -> bool:
+    head = statement.lstrip()[:6].upper()
+    return head == "SELECT" and not _UNSAFE_TO_EXPLAIN.search(statement)
+
+class SlowQueryStats:
+    """Per-fingerprint aggregates of slow statements seen by this process."""
+
+    def __init__(self, max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, statement: str, duration_ms: float, site: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    # Keep the shapes that cost the most in total.
+                    cheapest = min(self._entries, key=lambda k: self._entries[k]["totalMs"])
+                    del self._entries[cheapest]
+                entry = self._entries[key] = {
+                    "fingerprint": key,
+                    "statement": normalize(statement),
+                    "count": 0,
+                    "totalMs": 0.0,
+                    "maxMs": 0.0,
+                    "callSites": {},
+                    "plan": None,
+                    "explainedAt": None
+                }
+            entry["count"] += 1
+            entry["totalMs"] += duration_ms
+            entry["maxMs"] = max(entry["maxMs"], duration_ms)
+            entry["callSites"][site] = entry["callSites"].get(site, 0) + 1
+
+    def should_explain(self, key: str, interval_seconds: int = SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            last = entry.get("_explainQueuedAt")
+            now = time.time()
+            if last is not None and now - last < interval_seconds:
+                return False
+            entry["_explainQueuedAt"] = now
+            return True
+
+    def set_plan(self, key: str, plan: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["plan"] = plan
+                entry["explainedAt"] = time.time()
+
+    def snapshot(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            entries = sorted(self._entries.values(), key=lambda e: e["totalMs"], reverse=True)[:limit]
+            return [
+                {
+                    **{k: v for k, v in entry.items() if not k.startswith("_")},
+                    "avgMs": entry["totalMs"] / entry["count"],
+                    "callSites": dict(entry["callSites"])
+                }
+                for entry in entries
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+slow_query_stats = SlowQueryStats()
+
+_capture = threading.local()
+_explainer: Optional[ThreadPoolExecutor] = None
+_explainer_lock = threading.Lock()
+
+@contextmanager
+def capture_statements() -> Iterator[List[Tuple[str, object]]]:
+    """Collect every (statement, parameters) executed on this thread inside the block."""
+    captured: List[Tuple[str, object]] = []
+    previous = getattr(_capture, "statements", None)
+    _capture.statements = captured
+    try:
+        yield captured
+    finally:
+        _capture.statements = previous
+
+def explain(connection, statement: str, parameters, analyze: bool = True) -> str:
+    options = "ANALYZE, BUFFERS, FORMAT TEXT" if analyze else "FORMAT TEXT"
+    rows = connection.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).all()
+    return "\n".join(row[0] for row in rows)
+
+def _explain_in_background(engine: Engine, key: str, statement: str, parameters) -> None:
+    try:
+        with engine.connect() as connection:
+            connection.info["query_log_internal"] = True
+            try:
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+                plan = explain(connection, statement, parameters)
+            finally:
+                connection.rollback()
+                connection.info.pop("query_log_internal", None)
+        slow_query_stats.set_plan(key, plan)
+        logger.info(f"Plan for slow query [{key}]:\n{plan}")
+    except Exception as e:
+        logger.warning(f"Could not explain slow query [{key}]: {e}")
+
+def _submit_explain(engine: Engine, key: str, statement: str, parameters) -> None:
+    global _explainer
+    with _explainer_lock:
+        if _explainer is None:
+            _explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+    _explainer.submit(_explain_in_background, engine, key, statement, parameters)
+
+def install_query_log(
+    engine: Engine,
+    threshold_ms: float = SLOW_QUERY_MS,
+    explain_rate: float = SLOW_QUERY_EXPLAIN_RATE
+) -> None:
+    """Attach the timing hooks to an engine. A negative threshold only enables capture."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        if context.connection is not None and context.connection.info.get("query_log_started"):
+            context.connection.info["query_log_started"].pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_log_started"].pop()
+        if conn.info.get("query_log_internal"):
+            return
+        captured = getattr(_capture, "statements", None)
+        if captured is not None and not executemany:
+            captured.append((statement, parameters))
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        if threshold_ms < 0 or duration_ms < threshold_ms:
+            return
+        key = fingerprint(statement)
+        site = call_site()
+        slow_query_stats.record(key, statement, duration_ms, site)
+        logger.warning(f"Slow query {duration_ms:.1f}ms [{key}] at {site}: {normalize(statement)[:300]}")
+
+        if (
+            not executemany
+            and explain_rate > 0
+            and random.random() < explain_rate
+            and is_explainable(statement)
+            and slow_query_stats.should_explain(key)
+        ):
+            _submit_explain(engine, key, statement, parameters)
@@ -0,0 +1,193 @@
+"""
+Schema upgrade for databases created before the current models.
+
+create_all only creates missing tables; it never adds columns or indexes to
+tables that already exist. This adds them to every branch database, with
+the DDL generated from the models so names, types and enum labels match
+what the application writes. Every statement is idempotent, so the script
+can be re-run. Indexes are built CONCURRENTLY and do not block writes.
+
+Existing doctors, patients and appointments are assigned to the first
+branch configured for their database; existing health packages get the
+default lab capacity of 50 a day.
+
+Medical record narratives that are still TEXT are compressed in Python in
+id-ordered batches into shadow BYTEA columns, which then replace the
+originals in one short locked transaction; diagnosis_summary is backfilled
+in the same pass. An interrupted run resumes where it stopped. Run it with
+the API stopped: narratives edited by the old code mid-run are not re-read.
+
+Usage:
+    python -m app.schema_upgrade [--dry-run] [--batch-size 1000]
+"""
+
+from sqlalchemy import Index, LargeBinary, String, Integer, column, func, table, text, update, values
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+from app.database import shard_router
+from app.models import Appointment, Doctor, HealthPackage, MedicalRecord, PackageBooking, Patient
+from app.models.medical_record import DIAGNOSIS_SUMMARY_LENGTH
+from app.models.types import CompressedText
+from app.services.medical_record_service import summarize
+from typing import List
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+BRANCH_TABLES = [Doctor.__table__, Patient.__table__, Appointment.__table__]
+# Columns added to tables that already existed, with the constraint clause used
+# to add them; the DEFAULT also fills existing rows.
+ADDED_COLUMNS = [
+    (HealthPackage.__table__.c.daily_capacity, "NOT NULL DEFAULT 50"),
+    (PackageBooking.__table__.c.capacity_shard, ""),
+    (MedicalRecord.__table__.c.diagnosis_summary, ""),
+]
+# Indexes superseded by a model index under a new name; dropped once it exists.
+RETIRED_INDEXES = ["idx_medical_records_patient"]
+
+NARRATIVE_COLUMNS = [c.name for c in MedicalRecord.__table__.columns if isinstance(c.type, CompressedText)]
+MIGRATION_BATCH_SIZE = 1000
+# Tables that predate the access-path indexes; tables added since get theirs from create_all.
+INDEXED_TABLES = [
+    Appointment.__table__, Doctor.__table__, HealthPackage.__table__,
+    MedicalRecord.__table__, PackageBooking.__table__
+]
+
+def _indexes() -> List[Index]:
+    # Generated rather than hand-written: partial index predicates must use the
+    # enum labels the application stores (names, e.g. 'CANCELLED') to be usable.
+    return [
+        index for table in INDEXED_TABLES
+        for index in sorted(table.indexes, key=lambda index: index.name)
+        if index.name.startswith("idx_")
+    ]
+
+def column_statements(engine: Engine, branch: str) -> List[str]:
+    dialect = engine.dialect
+    statements = []
+    for table in BRANCH_TABLES:
+        column_type = table.c.branch.type.compile(dialect=dialect)
+        default = branch.replace("'", "''")
+        statements.append(
+            f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS branch {column_type} NOT NULL DEFAULT '{default}'"
+        )
+    for column, constraints in ADDED_COLUMNS:
+        column_type = column.type.compile(dialect=dialect)
+        statements.append(
+            f"ALTER TABLE {column.table.name} ADD COLUMN IF NOT EXISTS {column.name} {column_type} {constraints}".rstrip()
+        )
+    return statements
+
+def index_statements(engine: Engine) -> List[str]:
+    statements = []
+    for index in _indexes():
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+        statements.append(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+    statements += [f"DROP INDEX CONCURRENTLY IF EXISTS {name}" for name in RETIRED_INDEXES]
+    return statements
+
+def _text_narratives(connection: Connection) -> List[str]:
+    return list(connection.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = 'medical_records' "
+        "AND data_type = 'text' AND column_name = ANY(:names)"
+    ), {"names": NARRATIVE_COLUMNS}).scalars())
+
+def _compress_batch(connection: Connection, names: List[str], after_id: int, batch_size: int) -> int:
+    """Compress one id-ordered batch into the shadow columns; returns the last id seen, or 0 when done."""
+    rows = connection.execute(text(
+        f"SELECT id, {', '.join(names)} FROM medical_records WHERE id > :after ORDER BY id LIMIT :limit"
+    ), {"after": after_id, "limit": batch_size}).all()
+    if not rows:
+        return 0
+    codec = CompressedText()
+    changed = [
+        (row.id, *[codec.process_bind_param(getattr(row, name), None) for name in names],
+         summarize(row.diagnosis) if "diagnosis" in names else None)
+        for row in rows
+        if any(getattr(row, name) is not None for name in names)
+    ]
+    if changed:
+        source = values(
+            column("id", Integer), *[column(name, LargeBinary) for name in names],
+            column("summary", String(DIAGNOSIS_SUMMARY_LENGTH)), name="source"
+        ).data(changed)
+        target = table("medical_records", column("id"), column("diagnosis_summary"), *[column(f"{name}_zlib") for name in names])
+        connection.execute(
+            update(target)
+            .where(target.c.id == source.c.id)
+            .values(
+                diagnosis_summary=func.coalesce(target.c.diagnosis_summary, source.c.summary),
+                **{f"{name}_zlib": source.c[name] for name in names}
+            )
+        )
+    return rows[-1].id
+
+def _compress_from(connection: Connection, names: List[str], last_id: int, batch_size: int, database: str) -> int:
+    while True:
+        next_id = _compress_batch(connection, names, last_id, batch_size)
+        if not next_id:
+            return last_id
+        last_id = next_id
+        logger.info(f"{database}: compressed medical record narratives up to id {last_id}")
+
+def compress_narratives(engine: Engine, batch_size: int = MIGRATION_BATCH_SIZE) -> None:
+    """Convert narrative columns still stored as TEXT to zlib-compressed BYTEA."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        names = _text_narratives(connection)
+        if not names:
+            return
+        for name in names:
+            connection.execute(text(f"ALTER TABLE medical_records ADD COLUMN IF NOT EXISTS {name}_zlib BYTEA"))
+        # Batches commit in id order, so an interrupted run resumes after the last converted row.
+        converted = " OR ".join(f"{name}_zlib IS NOT NULL" for name in names)
+        last_id = connection.execute(text(f"SELECT coalesce(max(id), 0) FROM medical_records WHERE {converted}")).scalar()
+        last_id = _compress_from(connection, names, last_id, batch_size, engine.url.database)
+
+    with engine.begin() as connection:
+        # Rows inserted since the last batch are caught up under the lock, then the columns swap.
+        connection.execute(text("LOCK TABLE medical_records IN EXCLUSIVE MODE"))
+        _compress_from(connection, names, last_id, batch_size, engine.url.database)
+        for name in names:
+            connection.execute(text(f"ALTER TABLE medical_records DROP COLUMN {name}"))
+            connection.execute(text(f"ALTER TABLE medical_records RENAME COLUMN {name}_zlib TO {name}"))
+    logger.info(f"{engine.url.database}: medical record narratives now compressed ({', '.join(names)})")
+
+def upgrade_statements(engine: Engine, branch: str) -> List[str]:
+    return column_statements(engine, branch) + index_statements(engine)
+
+def upgrade(engine: Engine, branch: str, dry_run: bool = False, batch_size: int = MIGRATION_BATCH_SIZE) -> None:
+    if dry_run:
+        for statement in column_statements(engine, branch):
+            print(f"{statement};")
+        print(f"-- compress medical_records narratives still stored as TEXT, {batch_size} rows per batch")
+        for statement in index_statements(engine):
+            print(f"{statement};")
+        return
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for statement in column_statements(engine, branch):
+            logger.info(f"{engine.url.database}: {statement}")
+            connection.execute(text(statement))
+    # Before the indexes, so the covering timeline index is not churned by the backfill.
+    compress_narratives(engine, batch_size)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for statement in index_statements(engine):
+            logger.info(f"{engine.url.database}: {statement}")
+            connection.execute(text(statement))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Add new columns and indexes to existing branch databases.")
+    parser.add_argument("--dry-run", action="store_true", help="print the DDL instead of running it")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE, help="medical records per compression batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for branch in shard_router.database_branches():
+        if args.dry_run:
+            print(f"-- {branch}")
+        upgrade(shard_router.engine(branch), branch, args.dry_run, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 from .specialty import SpecialtyResponse
 from .doctor import DoctorResponse, DoctorDetail
-from .appointment import AppointmentCreate, AppointmentResponse
-from .health_package import HealthPackageResponse
+from .appointment import (
+    AppointmentCreate, AppointmentResponse, AppointmentTransitionRequest, AppointmentTransitionResponse
+)
+from .health_package import HealthPackageResponse, HealthPackageFilters, HealthPackageFacets
 from .auth import UserResponse, LoginRequest, RegisterRequest
+from .triage import TriageRequest, TriageResponse
+from .waitlist import WaitlistCreate, WaitlistResponse
+from .medical_record import MedicalRecordCreate, MedicalRecordTimeline, MedicalRecordDetail
+from .package_booking import PackageBookingCreate, PackageBookingResponse, PackageAvailability
+from .user_import import UserImportRow, UserImportResult
 
 __all__ = [
     "SpecialtyResponse", 
@@ -10,8 +17,24 @@ __all__ = [
     "DoctorDetail",
     "AppointmentCreate", 
     "AppointmentResponse",
+    "AppointmentTransitionRequest",
+    "AppointmentTransitionResponse",
     "HealthPackageResponse",
+    "HealthPackageFilters",
+    "HealthPackageFacets",
     "UserResponse",
     "LoginRequest",
-    "RegisterRequest"
+    "RegisterRequest",
+    "TriageRequest",
+    "TriageResponse",
+    "WaitlistCreate",
+    "WaitlistResponse",
+    "MedicalRecordCreate",
+    "MedicalRecordTimeline",
+    "MedicalRecordDetail",
+    "PackageBookingCreate",
+    "PackageBookingResponse",
+    "PackageAvailability",
+    "UserImportRow",
+    "UserImportResult"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import date, time
 from app.models.appointment import AppointmentStatus, AppointmentType
 
@@ -27,4 +27,34 @@ class AppointmentResponse(BaseModel):
     updatedAt: str
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class RescheduleItem(BaseModel):
+    appointmentId: int
+    appointmentDate: date
+    appointmentTime: time
+
+class AppointmentTransitionRequest(BaseModel):
+    action: Literal["confirm", "complete", "cancel", "reschedule"]
+    appointmentIds: List[int] = []
+    reschedules: List[RescheduleItem] = []
+    reason: Optional[str] = Field(None, max_length=500)
+
+    @model_validator(mode="after")
+    def check_targets(self):
+        if self.action == "reschedule" and not self.reschedules:
+            raise ValueError("reschedules is required for the reschedule action")
+        if self.action != "reschedule" and not self.appointmentIds:
+            raise ValueError("appointmentIds is required")
+        return self
+
+class AppointmentTransitionResult(BaseModel):
+    id: int
+    result: Literal["updated", "not_found", "invalid_transition", "invalid_target", "conflict"]
+    status: Optional[str] = None
+
+class AppointmentTransitionResponse(BaseModel):
+    action: str
+    updated: int
+    failed: int
+    results: List[AppointmentTransitionResult]
\ No newline at end of file
@@ -11,7 +11,9 @@ class DoctorResponse(BaseModel):
     reviewCount: int
     consultationFee: Optional[float] = None
     location: Optional[str] = None
+    branch: Optional[str] = None
     availableToday: bool = True
+    nextAvailableSlot: Optional[str] = None
     profileImage: Optional[str] = None
     languages: List[str] = []
     qualifications: List[str] = []
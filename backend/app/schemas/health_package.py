@@ -14,4 +14,24 @@ class HealthPackageResponse(BaseModel):
     popular: bool = False
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class HealthPackageFilters(BaseModel):
+    category: Optional[str] = None
+    minPrice: Optional[float] = None
+    maxPrice: Optional[float] = None
+    minDiscountPercent: Optional[float] = None
+    maxDurationHours: Optional[int] = None
+    tests: List[str] = []
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class HealthPackageFacets(BaseModel):
+    total: int
+    category: List[FacetCount] = []
+    priceRange: List[FacetCount] = []
+    discounted: List[FacetCount] = []
+    durationHours: List[FacetCount] = []
+    tests: List[FacetCount] = []
@@ -0,0 +1,62 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+class MedicalRecordCreate(BaseModel):
+    patientId: int
+    appointmentId: Optional[int] = None
+    visitDate: str
+    chiefComplaint: Optional[str] = None
+    historyOfPresentIllness: Optional[str] = None
+    physicalExamination: Optional[str] = None
+    diagnosis: Optional[str] = None
+    treatmentPlan: Optional[str] = None
+    prescription: Optional[str] = None
+    bloodPressure: Optional[str] = None
+    heartRate: Optional[int] = None
+    temperature: Optional[float] = None
+    respiratoryRate: Optional[int] = None
+    oxygenSaturation: Optional[int] = None
+    followUpRequired: bool = False
+    followUpDate: Optional[str] = None
+    followUpNotes: Optional[str] = None
+
+class Vitals(BaseModel):
+    bloodPressure: Optional[str] = None
+    heartRate: Optional[int] = None
+    temperature: Optional[float] = None
+    respiratoryRate: Optional[int] = None
+    oxygenSaturation: Optional[int] = None
+
+class MedicalRecordSummary(BaseModel):
+    id: int
+    visitDate: str
+    doctorId: int
+    doctorName: str
+    diagnosisSummary: Optional[str] = None
+    vitals: Vitals
+
+class MedicalRecordTimeline(BaseModel):
+    items: List[MedicalRecordSummary] = []
+    nextCursor: Optional[str] = None
+
+class MedicalRecordDetail(BaseModel):
+    id: int
+    patientId: int
+    doctorId: int
+    appointmentId: Optional[int] = None
+    visitDate: str
+    chiefComplaint: Optional[str] = None
+    historyOfPresentIllness: Optional[str] = None
+    physicalExamination: Optional[str] = None
+    diagnosis: Optional[str] = None
+    treatmentPlan: Optional[str] = None
+    prescription: Optional[str] = None
+    vitals: Vitals
+    followUpRequired: bool = False
+    followUpDate: Optional[str] = None
+    followUpNotes: Optional[str] = None
+    createdAt: str
+    updatedAt: str
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class PackageBookingCreate(BaseModel):
+    packageId: int
+    scheduledDate: str
+
+class PackageBookingResponse(BaseModel):
+    id: int
+    patientId: int
+    packageId: int
+    packageTitle: Optional[str] = None
+    bookingDate: str
+    scheduledDate: str
+    status: str
+    amountPaid: Optional[float] = None
+    paymentStatus: str
+    createdAt: str
+    
+    class Config:
+        from_attributes = True
+
+class PackageAvailability(BaseModel):
+    packageId: int
+    date: str
+    capacity: int
+    remaining: int
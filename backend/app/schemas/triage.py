@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List
+from .doctor import DoctorResponse
+
+class TriageRequest(BaseModel):
+    symptoms: str = Field(..., min_length=3, max_length=2000)
+    useLlmFallback: bool = True
+
+class TriageSpecialty(BaseModel):
+    id: int
+    name: str
+    score: float
+    matchedTerms: List[str] = []
+
+class TriageResponse(BaseModel):
+    source: str
+    specialties: List[TriageSpecialty] = []
+    doctors: List[DoctorResponse] = []
+    disclaimer: str
@@ -0,0 +1,67 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic.networks import validate_email
+from typing import Optional, List
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+import re
+from app.models.user import UserType
+from app.models.patient import GenderType
+
+_ASCII_LOCAL_PART = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+
+@lru_cache(maxsize=4096)
+def _normalized_domain(domain: str) -> str:
+    return validate_email(f"user@{domain}")[1].rsplit("@", 1)[1]
+
+def normalize_import_email(value: str) -> str:
+    """Same result as EmailStr, but domain checks are cached since imports repeat a few domains."""
+    local, _, domain = value.strip().rpartition("@")
+    if local and len(local) <= 64 and _ASCII_LOCAL_PART.match(local):
+        return f"{local}@{_normalized_domain(domain)}"
+    return validate_email(value)[1]
+
+class UserImportRow(BaseModel):
+    email: str
+    password: str = Field(min_length=1)
+    fullName: str = Field(min_length=1, max_length=255)
+    phone: Optional[str] = Field(None, max_length=20)
+    role: UserType
+    
+    # Doctor profile
+    licenseNumber: Optional[str] = Field(None, max_length=255)
+    specialty: Optional[str] = None
+    experienceYears: Optional[int] = Field(None, ge=0)
+    consultationFee: Optional[Decimal] = Field(None, ge=0)
+    
+    # Patient profile
+    dateOfBirth: Optional[date] = None
+    gender: Optional[GenderType] = None
+    bloodGroup: Optional[str] = Field(None, max_length=10)
+    city: Optional[str] = Field(None, max_length=100)
+    
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, value: str) -> str:
+        return normalize_import_email(value)
+    
+    @model_validator(mode="after")
+    def check_profile(self):
+        if self.role not in (UserType.patient, UserType.doctor):
+            raise ValueError("role must be patient or doctor")
+        if self.role == UserType.doctor and not self.licenseNumber:
+            raise ValueError("licenseNumber is required for doctors")
+        return self
+
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    errors: List[str]
+
+class UserImportResult(BaseModel):
+    processed: int
+    created: int
+    failed: int
+    dryRun: bool
+    errors: List[UserImportError]
+    errorsTruncated: bool
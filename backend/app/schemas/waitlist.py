@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class WaitlistCreate(BaseModel):
+    doctorId: int
+    desiredDate: str
+    preferredTimeFrom: Optional[str] = None
+    preferredTimeTo: Optional[str] = None
+    reason: Optional[str] = None
+    patientId: Optional[int] = None
+    priority: int = 0
+
+class WaitlistResponse(BaseModel):
+    id: int
+    patientId: int
+    doctorId: int
+    desiredDate: str
+    preferredTimeFrom: Optional[str] = None
+    preferredTimeTo: Optional[str] = None
+    priority: int
+    status: str
+    offeredTime: Optional[str] = None
+    offerExpiresAt: Optional[str] = None
+    appointmentId: Optional[int] = None
+    createdAt: str
+    
+    class Config:
+        from_attributes = True
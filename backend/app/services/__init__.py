@@ -3,11 +3,23 @@ from .doctor_service import DoctorService
 from .appointment_service import AppointmentService
 from .health_package_service import HealthPackageService
 from .auth_service import AuthService
+from .triage_service import TriageService
+from .waitlist_service import WaitlistService
+from .medical_record_service import MedicalRecordService
+from .package_booking_service import PackageBookingService
+from .availability_service import AvailabilityService
+from .user_import_service import UserImportService
 
 __all__ = [
     "SpecialtyService",
     "DoctorService", 
     "AppointmentService",
     "HealthPackageService",
-    "AuthService"
+    "AuthService",
+    "TriageService",
+    "WaitlistService",
+    "MedicalRecordService",
+    "PackageBookingService",
+    "AvailabilityService",
+    "UserImportService"
 ]
\ No newline at end of file
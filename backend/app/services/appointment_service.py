@@ -1,14 +1,42 @@
-from sqlalchemy.orm import Session, joinedload
-from app.models import Appointment, Patient, Doctor
+from sqlalchemy import select, update, delete, exists, or_, values, column, func, Integer, Date, Time
+from sqlalchemy.orm import Session, joinedload, aliased
+from app.database import session_branch
+from app.models import Appointment, Patient, Doctor, Reminder
+from app.models.appointment import AppointmentStatus
+from app.models.reminder import ReminderStatus
 from app.schemas.appointment import AppointmentCreate
-from typing import List, Optional
-from datetime import datetime, date, time
+from app.services.waitlist_service import waitlist_worker, lock_slot, lock_slots, slot_is_free
+from app.services.reminder_service import REMINDER_OFFSETS, ReminderService
+from app.services.availability_service import AvailabilityService, is_bookable_slot
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, date, time, timezone
+import os
+
+BULK_TRANSITION_MAX = int(os.getenv("BULK_TRANSITION_MAX", "5000"))
+
+# action -> (statuses it may start from, resulting status)
+APPOINTMENT_TRANSITIONS: Dict[str, Tuple[Tuple[AppointmentStatus, ...], AppointmentStatus]] = {
+    "confirm": ((AppointmentStatus.PENDING, AppointmentStatus.RESCHEDULED), AppointmentStatus.CONFIRMED),
+    "complete": ((AppointmentStatus.CONFIRMED,), AppointmentStatus.COMPLETED),
+    "cancel": (
+        (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.RESCHEDULED),
+        AppointmentStatus.CANCELLED
+    ),
+    "reschedule": (
+        (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.RESCHEDULED),
+        AppointmentStatus.RESCHEDULED
+    ),
+}
+
+def _unique(ids: Sequence[int]) -> List[int]:
+    return list(dict.fromkeys(ids))
 
 class AppointmentService:
     def __init__(self, db: Session):
         self.db = db
     
-    def create_appointment(self, appointment_data: AppointmentCreate, patient_id: int) -> Appointment:
+    def create_appointment(self, appointment_data: AppointmentCreate, patient_id: int) -> Optional[Appointment]:
+        """Book a slot, or return None when it is taken or held for a waitlisted patient."""
         appointment = Appointment(
             patient_id=patient_id,
             doctor_id=appointment_data.doctorId,
@@ -18,8 +46,17 @@ class AppointmentService:
             notes=appointment_data.patientNotes,
             consultation_mode="onsite" if appointment_data.type == "offline" else "online"
         )
-        
+
+        # Same lock the waitlist offers and claims take, so a hold cannot be booked over.
+        lock_slot(self.db, appointment.doctor_id, appointment.appointment_date, appointment.appointment_time)
+        if not slot_is_free(self.db, appointment.doctor_id, appointment.appointment_date, appointment.appointment_time):
+            self.db.rollback()
+            return None
+
         self.db.add(appointment)
+        self.db.flush()
+        ReminderService(self.db).schedule_for_appointment(appointment)
+        AvailabilityService(self.db).slot_booked(appointment.doctor_id, appointment.appointment_date, appointment.appointment_time)
         self.db.commit()
         self.db.refresh(appointment)
         return appointment
@@ -44,13 +81,194 @@ class AppointmentService:
             joinedload(Appointment.doctor).joinedload(Doctor.specialty)
         ).filter(Appointment.id == appointment_id).first()
     
-    def cancel_appointment(self, appointment_id: int, reason: Optional[str] = None) -> bool:
-        appointment = self.db.query(Appointment).filter(Appointment.id == appointment_id).first()
-        if appointment:
-            appointment.status = "cancelled"
-            appointment.cancelled_at = datetime.utcnow()
+    def cancel_appointment(self, appointment_id: int, reason: Optional[str] = None) -> dict:
+        return self.transition_appointments("cancel", [appointment_id], reason=reason)[0]
+
+    def transition_appointments(
+        self,
+        action: str,
+        appointment_ids: Sequence[int],
+        reason: Optional[str] = None,
+        doctor_id: Optional[int] = None
+    ) -> List[dict]:
+        """Apply a confirm, complete or cancel to many appointments with one UPDATE.
+
+        Only rows whose current status allows the action are changed; every
+        other id is reported as not_found or invalid_transition. `doctor_id`
+        restricts the batch to that doctor's appointments.
+        """
+        from_statuses, to_status = APPOINTMENT_TRANSITIONS[action]
+        appointment_ids = _unique(appointment_ids)
+        if not appointment_ids:
+            return []
+
+        changes = {"status": to_status}
+        if to_status == AppointmentStatus.COMPLETED:
+            changes["completed_at"] = func.now()
+        elif to_status == AppointmentStatus.CANCELLED:
+            changes["cancelled_at"] = func.now()
             if reason:
-                appointment.notes = f"Cancelled: {reason}"
-            self.db.commit()
-            return True
-        return False
\ No newline at end of file
+                changes["notes"] = f"Cancelled: {reason}"
+
+        stmt = update(Appointment).where(
+            Appointment.id.in_(appointment_ids),
+            Appointment.status.in_(from_statuses)
+        )
+        if doctor_id is not None:
+            stmt = stmt.where(Appointment.doctor_id == doctor_id)
+        updated = self.db.execute(
+            stmt.values(**changes)
+            .returning(Appointment.id, Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+        freed = [(row.doctor_id, row.appointment_date, row.appointment_time) for row in updated]
+        if to_status == AppointmentStatus.CANCELLED and freed:
+            AvailabilityService(self.db).slots_freed(freed)
+        self.db.commit()
+        if to_status == AppointmentStatus.CANCELLED:
+            for slot in freed:
+                waitlist_worker.notify_slot_freed(*slot, session_branch(self.db))
+
+        done = {row.id for row in updated}
+        results = self._unchanged_results([i for i in appointment_ids if i not in done], doctor_id)
+        for appointment_id in appointment_ids:
+            if appointment_id in done:
+                results[appointment_id] = {"id": appointment_id, "result": "updated", "status": to_status.value}
+        return [results[appointment_id] for appointment_id in appointment_ids]
+
+    def reschedule_appointments(
+        self,
+        moves: Sequence[Tuple[int, date, time]],
+        doctor_id: Optional[int] = None
+    ) -> List[dict]:
+        """Move many appointments to new slots with the same doctor in one UPDATE.
+
+        A move is refused with `invalid_target` if the target is in the past or
+        off the doctor's slot grid, and with `conflict` if the target slot is
+        already taken (including by another move in the batch) or the
+        appointment changed since it was read.
+        """
+        from_statuses, to_status = APPOINTMENT_TRANSITIONS["reschedule"]
+        targets_by_id: Dict[int, Tuple[date, time]] = {}
+        for appointment_id, new_date, new_time in moves:
+            targets_by_id.setdefault(appointment_id, (new_date, new_time))
+        appointment_ids = list(targets_by_id)
+        if not appointment_ids:
+            return []
+
+        stmt = select(
+            Appointment.id, Appointment.doctor_id, Appointment.appointment_date,
+            Appointment.appointment_time, Appointment.status
+        ).where(Appointment.id.in_(appointment_ids), Appointment.status.in_(from_statuses))
+        if doctor_id is not None:
+            stmt = stmt.where(Appointment.doctor_id == doctor_id)
+        current = {row.id: row for row in self.db.execute(stmt)}
+        schedules = {
+            doctor.id: doctor for doctor in self.db.execute(
+                select(
+                    Doctor.id, Doctor.available_days, Doctor.available_from,
+                    Doctor.available_to, Doctor.consultation_duration
+                ).where(Doctor.id.in_({row.doctor_id for row in current.values()}))
+            )
+        } if current else {}
+
+        now = datetime.now(timezone.utc)
+        rows, conflicts, invalid, claimed = [], set(), set(), set()
+        for appointment_id in appointment_ids:
+            row = current.get(appointment_id)
+            if row is None:
+                continue
+            new_date, new_time = targets_by_id[appointment_id]
+            doctor = schedules.get(row.doctor_id)
+            if doctor is None or not is_bookable_slot(
+                doctor.available_days, doctor.available_from, doctor.available_to,
+                doctor.consultation_duration, new_date, new_time, now
+            ):
+                invalid.add(appointment_id)
+                continue
+            slot = (row.doctor_id, new_date, new_time)
+            if slot in claimed:
+                conflicts.add(appointment_id)
+                continue
+            claimed.add(slot)
+            rows.append((appointment_id, row.doctor_id, row.appointment_date, row.appointment_time, new_date, new_time))
+
+        updated = []
+        if rows:
+            # Same per-slot locks as waitlist claims, so neither can double-book a slot.
+            lock_slots(self.db, claimed)
+            targets = values(
+                column("id", Integer), column("doctor_id", Integer),
+                column("old_date", Date), column("old_time", Time),
+                column("new_date", Date), column("new_time", Time),
+                name="targets"
+            ).data(rows)
+            live = aliased(Appointment)
+            updated = self.db.execute(
+                update(Appointment)
+                .where(
+                    Appointment.id == targets.c.id,
+                    Appointment.doctor_id == targets.c.doctor_id,
+                    Appointment.appointment_date == targets.c.old_date,
+                    Appointment.appointment_time == targets.c.old_time,
+                    Appointment.status.in_(from_statuses),
+                    ~exists().where(
+                        live.doctor_id == targets.c.doctor_id,
+                        live.appointment_date == targets.c.new_date,
+                        live.appointment_time == targets.c.new_time,
+                        live.status != AppointmentStatus.CANCELLED,
+                        live.id != targets.c.id
+                    )
+                )
+                .values(status=to_status, appointment_date=targets.c.new_date, appointment_time=targets.c.new_time)
+                .returning(
+                    Appointment.id, Appointment.doctor_id, Appointment.appointment_date,
+                    Appointment.appointment_time, Appointment.created_at
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+
+        done = {row.id for row in updated}
+        if updated:
+            # Reminders timed off the old slot go whatever their status: one already sent
+            # for the old date would otherwise block the new date's on the unique key.
+            self.db.execute(
+                delete(Reminder)
+                .where(
+                    Reminder.appointment_id.in_(done),
+                    or_(Reminder.kind.in_(list(REMINDER_OFFSETS)), Reminder.status == ReminderStatus.PENDING)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            ReminderService(self.db).schedule_for_appointments(updated)
+            AvailabilityService(self.db).refresh_doctors({row.doctor_id for row in updated})
+        self.db.commit()
+        old_slots = {row[0]: (row[1], row[2], row[3]) for row in rows}
+        for appointment_id in done:
+            waitlist_worker.notify_slot_freed(*old_slots[appointment_id], session_branch(self.db))
+
+        results = self._unchanged_results([i for i in appointment_ids if i not in current], doctor_id)
+        for appointment_id in appointment_ids:
+            if appointment_id in done:
+                results[appointment_id] = {"id": appointment_id, "result": "updated", "status": to_status.value}
+            elif appointment_id in invalid:
+                results[appointment_id] = {"id": appointment_id, "result": "invalid_target", "status": current[appointment_id].status.value}
+            elif appointment_id in current:
+                results[appointment_id] = {"id": appointment_id, "result": "conflict", "status": None}
+        return [results[appointment_id] for appointment_id in appointment_ids]
+
+    def _unchanged_results(self, appointment_ids: List[int], doctor_id: Optional[int]) -> Dict[int, dict]:
+        """Explain ids a transition skipped with one lookup of their current status."""
+        results = {
+            appointment_id: {"id": appointment_id, "result": "not_found", "status": None}
+            for appointment_id in appointment_ids
+        }
+        if not appointment_ids:
+            return results
+        stmt = select(Appointment.id, Appointment.status).where(Appointment.id.in_(appointment_ids))
+        if doctor_id is not None:
+            stmt = stmt.where(Appointment.doctor_id == doctor_id)
+        for appointment_id, status in self.db.execute(stmt):
+            results[appointment_id] = {"id": appointment_id, "result": "invalid_transition", "status": status.value}
+        return results
@@ -36,13 +36,13 @@ class AuthService:
         )
         
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        self.db.flush()
         
-        # Create patient profile if user is patient
+        # Create patient profile if user is patient; one commit covers both rows
         if user_data.role == "patient":
             patient = Patient(user_id=user.id)
             self.db.add(patient)
-            self.db.commit()
+        self.db.commit()
+        self.db.refresh(user)
         
         return user
\ No newline at end of file
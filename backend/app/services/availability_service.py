@@ -0,0 +1,271 @@
+from sqlalchemy import select, update, func, or_, values, column, Integer, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.database import branch_session_factory, shard_router
+from app.models import Appointment, Doctor, DoctorNextSlot
+from app.models.appointment import AppointmentStatus
+from app.services.reminder_service import HOSPITAL_TIMEZONE
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, date, time, timedelta, timezone
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_HORIZON_DAYS = int(os.getenv("AVAILABILITY_HORIZON_DAYS", "14"))
+AVAILABILITY_SWEEP_SECONDS = int(os.getenv("AVAILABILITY_SWEEP_SECONDS", "60"))
+AVAILABILITY_MAX_AGE_SECONDS = int(os.getenv("AVAILABILITY_MAX_AGE_SECONDS", "900"))
+AVAILABILITY_BATCH_SIZE = int(os.getenv("AVAILABILITY_BATCH_SIZE", "500"))
+
+# Used when a doctor has no schedule configured (matches the published working hours).
+DEFAULT_AVAILABLE_DAYS = [1, 2, 3, 4, 5, 6]
+DEFAULT_AVAILABLE_FROM = time(9, 0)
+DEFAULT_AVAILABLE_TO = time(17, 0)
+
+# Arbitrary constant key so only one process runs a sweep at a time.
+_SWEEP_LOCK_KEY = 7_340_033
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def slot_start(slot_date: date, slot_time: time) -> datetime:
+    return datetime.combine(slot_date, slot_time, tzinfo=HOSPITAL_TIMEZONE)
+
+def is_available_today(next_slot_at: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    if next_slot_at is None:
+        return False
+    today = (now or _utcnow()).astimezone(HOSPITAL_TIMEZONE).date()
+    return next_slot_at.astimezone(HOSPITAL_TIMEZONE).date() == today
+
+def next_free_slot(
+    available_days: Optional[List[int]],
+    available_from: Optional[time],
+    available_to: Optional[time],
+    duration_minutes: Optional[int],
+    booked: Set[Tuple[date, time]],
+    now: datetime,
+    horizon_days: int = AVAILABILITY_HORIZON_DAYS
+) -> Optional[datetime]:
+    """Earliest slot start after `now` that is inside working hours and not booked."""
+    days = set(available_days if available_days else DEFAULT_AVAILABLE_DAYS)
+    opens = available_from or DEFAULT_AVAILABLE_FROM
+    closes = available_to or DEFAULT_AVAILABLE_TO
+    step = timedelta(minutes=duration_minutes or 30)
+
+    local_now = now.astimezone(HOSPITAL_TIMEZONE)
+    for offset in range(horizon_days + 1):
+        day = local_now.date() + timedelta(days=offset)
+        # available_days counts from Sunday = 0
+        if day.isoweekday() % 7 not in days:
+            continue
+        start = slot_start(day, opens)
+        end = slot_start(day, closes)
+        while start + step <= end:
+            if start > local_now and (day, start.time()) not in booked:
+                return start
+            start += step
+    return None
+
+def is_bookable_slot(
+    available_days: Optional[List[int]],
+    available_from: Optional[time],
+    available_to: Optional[time],
+    duration_minutes: Optional[int],
+    slot_date: date,
+    slot_time: time,
+    now: datetime
+) -> bool:
+    """Whether the slot is in the future and on the doctor's grid, as next_free_slot walks it."""
+    days = set(available_days if available_days else DEFAULT_AVAILABLE_DAYS)
+    opens = available_from or DEFAULT_AVAILABLE_FROM
+    closes = available_to or DEFAULT_AVAILABLE_TO
+    step = timedelta(minutes=duration_minutes or 30)
+
+    start = slot_start(slot_date, slot_time)
+    day_opens = slot_start(slot_date, opens)
+    return (
+        start > now
+        and slot_date.isoweekday() % 7 in days
+        and start >= day_opens
+        and start + step <= slot_start(slot_date, closes)
+        and (start - day_opens) % step == timedelta(0)
+    )
+
+class AvailabilityService:
+    def __init__(self, db: Session, horizon_days: int = AVAILABILITY_HORIZON_DAYS):
+        self.db = db
+        self.horizon_days = horizon_days
+
+    def refresh_doctors(self, doctor_ids: Collection[int], skip_locked: bool = False) -> int:
+        """Recompute the next free slot for the given doctors; the caller commits.
+
+        Existing rows are locked first so a refresh racing with another booking
+        for the same doctor waits and then sees that booking.
+        """
+        if not doctor_ids:
+            return 0
+        locked = set(self.db.execute(
+            select(DoctorNextSlot.doctor_id)
+            .where(DoctorNextSlot.doctor_id.in_(doctor_ids))
+            .with_for_update(skip_locked=skip_locked)
+        ).scalars())
+        existing = locked
+        if skip_locked:
+            existing = set(self.db.execute(
+                select(DoctorNextSlot.doctor_id).where(DoctorNextSlot.doctor_id.in_(doctor_ids))
+            ).scalars())
+        busy = existing - locked
+        doctor_ids = [doctor_id for doctor_id in doctor_ids if doctor_id not in busy]
+        if not doctor_ids:
+            return 0
+
+        now = _utcnow()
+        today = now.astimezone(HOSPITAL_TIMEZONE).date()
+        booked: Dict[int, Set[Tuple[date, time]]] = {}
+        for doctor_id, slot_date, slot_time in self.db.query(
+            Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time
+        ).filter(
+            Appointment.doctor_id.in_(doctor_ids),
+            Appointment.appointment_date.between(today, today + timedelta(days=self.horizon_days)),
+            Appointment.status != AppointmentStatus.CANCELLED
+        ):
+            booked.setdefault(doctor_id, set()).add((slot_date, slot_time))
+
+        rows = []
+        for doctor in self.db.query(
+            Doctor.id, Doctor.available_days, Doctor.available_from, Doctor.available_to,
+            Doctor.consultation_duration, Doctor.is_available
+        ).filter(Doctor.id.in_(doctor_ids)):
+            next_slot_at = None
+            if doctor.is_available:
+                next_slot_at = next_free_slot(
+                    doctor.available_days, doctor.available_from, doctor.available_to,
+                    doctor.consultation_duration, booked.get(doctor.id, set()), now, self.horizon_days
+                )
+            rows.append({"doctor_id": doctor.id, "next_slot_at": next_slot_at, "computed_at": now})
+        if not rows:
+            return 0
+
+        stmt = insert(DoctorNextSlot).values(rows)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[DoctorNextSlot.doctor_id],
+            set_={"next_slot_at": stmt.excluded.next_slot_at, "computed_at": stmt.excluded.computed_at}
+        ))
+        return len(rows)
+
+    def slot_booked(self, doctor_id: int, slot_date: date, slot_time: time) -> None:
+        """Call after flushing a new appointment; the caller commits."""
+        current = self.db.query(DoctorNextSlot.next_slot_at).filter(DoctorNextSlot.doctor_id == doctor_id).first()
+        # Booking any slot after the cached one cannot change the doctor's next free slot.
+        if current is None or current.next_slot_at is None or slot_start(slot_date, slot_time) <= current.next_slot_at:
+            self.refresh_doctors([doctor_id])
+
+    def slot_freed(self, doctor_id: int, slot_date: date, slot_time: time) -> None:
+        """Call when an appointment stops occupying its slot; the caller commits."""
+        self.slots_freed([(doctor_id, slot_date, slot_time)])
+
+    def slots_freed(self, slots: Iterable[Tuple[int, date, time]]) -> None:
+        """Batch form of slot_freed: one UPDATE for any number of freed slots."""
+        now = _utcnow()
+        earliest: Dict[int, datetime] = {}
+        for doctor_id, slot_date, slot_time in slots:
+            start = slot_start(slot_date, slot_time)
+            if start > now and (doctor_id not in earliest or start < earliest[doctor_id]):
+                earliest[doctor_id] = start
+        if not earliest:
+            return
+
+        # A freed slot becomes the next one only if it is earlier than what is cached.
+        freed = values(
+            column("doctor_id", Integer), column("start", DateTime(timezone=True)), name="freed"
+        ).data(list(earliest.items()))
+        self.db.execute(
+            update(DoctorNextSlot)
+            .where(
+                DoctorNextSlot.doctor_id == freed.c.doctor_id,
+                or_(DoctorNextSlot.next_slot_at.is_(None), DoctorNextSlot.next_slot_at > freed.c.start)
+            )
+            .values(next_slot_at=freed.c.start, computed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    def stale_doctor_ids(self, limit: int = AVAILABILITY_BATCH_SIZE, max_age_seconds: int = AVAILABILITY_MAX_AGE_SECONDS) -> List[int]:
+        """Doctors whose cached slot has passed, is too old, or was never computed."""
+        now = _utcnow()
+        return [row.id for row in self.db.query(Doctor.id).outerjoin(DoctorNextSlot).filter(
+            or_(
+                DoctorNextSlot.doctor_id.is_(None),
+                DoctorNextSlot.next_slot_at <= now,
+                DoctorNextSlot.computed_at < now - timedelta(seconds=max_age_seconds)
+            )
+        ).order_by(Doctor.id).limit(limit).all()]
+
+    def sweep(self, batch_size: int = AVAILABILITY_BATCH_SIZE) -> int:
+        refreshed = 0
+        while True:
+            if not self.db.execute(select(func.pg_try_advisory_xact_lock(_SWEEP_LOCK_KEY))).scalar():
+                self.db.rollback()
+                return refreshed
+            doctor_ids = self.stale_doctor_ids(batch_size)
+            if not doctor_ids:
+                self.db.commit()
+                return refreshed
+            count = self.refresh_doctors(doctor_ids, skip_locked=True)
+            self.db.commit()
+            refreshed += count
+            # Everything in this batch was locked by bookings; they refresh those rows themselves.
+            if count == 0 or len(doctor_ids) < batch_size:
+                return refreshed
+
+class AvailabilitySweeper:
+    """Background thread that keeps doctor_next_slots current.
+
+    Bookings and cancellations update the table incrementally; the sweep
+    catches slots that have simply passed, day rollovers, schedule edits and
+    doctors that have never been computed. Without a session factory it
+    sweeps every branch database in turn.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        sweep_seconds: int = AVAILABILITY_SWEEP_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.sweep_seconds = sweep_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="availability-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _session_factories(self) -> Dict[str, Callable[[], Session]]:
+        if self.session_factory is not None:
+            return {shard_router.default_branch: self.session_factory}
+        return {branch: branch_session_factory(branch, scoped=False) for branch in shard_router.database_branches()}
+
+    def _run(self) -> None:
+        while True:
+            for branch, session_factory in self._session_factories().items():
+                try:
+                    with session_factory() as db:
+                        refreshed = AvailabilityService(db).sweep()
+                    if refreshed:
+                        logger.info(f"Refreshed next available slot for {refreshed} doctors in {branch}")
+                except Exception as e:
+                    logger.error(f"Availability sweep failed for {branch}: {e}")
+            if self._stop.wait(self.sweep_seconds):
+                return
+
+availability_sweeper = AvailabilitySweeper()
@@ -1,15 +1,44 @@
-from sqlalchemy.orm import Session, joinedload
-from app.models import Doctor, User, Specialty
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from app.models import Doctor, User, Specialty, DoctorNextSlot
+from app.services.reminder_service import HOSPITAL_TIMEZONE
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+DOCTOR_SORT_OPTIONS = ("next_available", "rating")
+
+_NO_SLOT = datetime.max.replace(tzinfo=timezone.utc)
+
+def _desc(value) -> tuple:
+    # PostgreSQL sorts NULL first under DESC.
+    return (0,) if value is None else (1, -value)
+
+def doctor_sort_key(doctor: Doctor, sort: str = "next_available") -> tuple:
+    """The listing order of get_all_doctors as a Python key, for merging branch results.
+
+    Must match the SQL ordering exactly, or the per-branch top rows are not
+    the ones the merge expects and pages skip or repeat doctors.
+    """
+    if sort == "next_available":
+        next_slot_at = doctor.next_slot.next_slot_at if doctor.next_slot else None
+        return (next_slot_at or _NO_SLOT, _desc(doctor.rating), doctor.branch, doctor.id)
+    return (_desc(doctor.rating), _desc(doctor.total_reviews), doctor.branch, doctor.id)
 
 class DoctorService:
     def __init__(self, db: Session):
         self.db = db
     
-    def get_all_doctors(self, specialty_id: Optional[int] = None, limit: int = 10, offset: int = 0) -> List[Doctor]:
-        query = self.db.query(Doctor).join(User).options(
+    def get_all_doctors(
+        self,
+        specialty_id: Optional[int] = None,
+        limit: Optional[int] = 10,
+        offset: int = 0,
+        sort: str = "next_available",
+        available_today: bool = False
+    ) -> List[Doctor]:
+        query = self.db.query(Doctor).join(User).outerjoin(Doctor.next_slot).options(
             joinedload(Doctor.user),
-            joinedload(Doctor.specialty)
+            joinedload(Doctor.specialty),
+            contains_eager(Doctor.next_slot)
         ).filter(
             User.is_active == True,
             Doctor.is_available == True
@@ -17,13 +46,42 @@ class DoctorService:
         
         if specialty_id:
             query = query.filter(Doctor.specialty_id == specialty_id)
+        
+        if available_today:
+            # A range on idx_doctor_next_slots_next: anything free before local midnight.
+            tomorrow = datetime.now(timezone.utc).astimezone(HOSPITAL_TIMEZONE).date() + timedelta(days=1)
+            query = query.filter(
+                DoctorNextSlot.next_slot_at < datetime.combine(tomorrow, datetime.min.time(), tzinfo=HOSPITAL_TIMEZONE)
+            )
+        
+        if sort == "next_available":
+            query = query.order_by(DoctorNextSlot.next_slot_at.asc().nulls_last(), Doctor.rating.desc(), Doctor.id)
+        else:
+            query = query.order_by(Doctor.rating.desc(), Doctor.total_reviews.desc(), Doctor.id)
             
-        return query.order_by(Doctor.rating.desc(), Doctor.total_reviews.desc()).offset(offset).limit(limit).all()
+        return query.offset(offset).limit(limit).all()
+    
+    def next_available_page(
+        self,
+        specialty_id: Optional[int] = None,
+        limit: Optional[int] = 10,
+        offset: int = 0
+    ) -> List[Tuple[int, Optional[datetime]]]:
+        """(doctor id, next free slot) for one page of the default listing, without loading the doctors."""
+        query = self.db.query(Doctor.id, DoctorNextSlot.next_slot_at).join(User).outerjoin(Doctor.next_slot).filter(
+            User.is_active == True,
+            Doctor.is_available == True
+        )
+        if specialty_id:
+            query = query.filter(Doctor.specialty_id == specialty_id)
+        query = query.order_by(DoctorNextSlot.next_slot_at.asc().nulls_last(), Doctor.rating.desc(), Doctor.id)
+        return [(row.id, row.next_slot_at) for row in query.offset(offset).limit(limit)]
     
     def get_doctor_by_id(self, doctor_id: int) -> Optional[Doctor]:
         return self.db.query(Doctor).join(User).options(
             joinedload(Doctor.user),
-            joinedload(Doctor.specialty)
+            joinedload(Doctor.specialty),
+            joinedload(Doctor.next_slot)
         ).filter(
             Doctor.id == doctor_id,
             User.is_active == True
@@ -32,7 +90,8 @@ class DoctorService:
     def search_doctors(self, query: str, specialty_id: Optional[int] = None) -> List[Doctor]:
         search_query = self.db.query(Doctor).join(User).options(
             joinedload(Doctor.user),
-            joinedload(Doctor.specialty)
+            joinedload(Doctor.specialty),
+            joinedload(Doctor.next_slot)
         ).filter(
             User.is_active == True,
             Doctor.is_available == True,
@@ -42,4 +101,4 @@ class DoctorService:
         if specialty_id:
             search_query = search_query.filter(Doctor.specialty_id == specialty_id)
             
-        return search_query.order_by(Doctor.rating.desc()).all()
\ No newline at end of file
+        return search_query.order_by(Doctor.rating.desc(), Doctor.total_reviews.desc(), Doctor.id).all()
\ No newline at end of file
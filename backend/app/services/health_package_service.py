@@ -1,13 +1,149 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import event, func, and_, case, cast, literal, select, union_all, String
+from sqlalchemy.orm import Session, object_session
 from app.models import HealthPackage
-from typing import List, Optional
+from app.schemas.health_package import HealthPackageFilters
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+import time
+
+FACET_CACHE_TTL = int(os.getenv("FACET_CACHE_TTL", "300"))
+FACET_CACHE_MAX_ENTRIES = 256
+
+# (lower bound, upper bound, label); upper bound is exclusive, None means open-ended.
+PRICE_BUCKETS = [
+    (0, 1000, "0-1000"),
+    (1000, 2500, "1000-2500"),
+    (2500, 5000, "2500-5000"),
+    (5000, None, "5000+"),
+]
+
+# key -> (expires at, catalog version, facets)
+_facet_cache: Dict[Tuple, Tuple[float, Tuple, dict]] = {}
+_facet_cache_lock = threading.Lock()
+
+def invalidate_facet_cache() -> None:
+    with _facet_cache_lock:
+        _facet_cache.clear()
+
+def _mark_packages_changed(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info["health_packages_changed"] = True
+
+def _invalidate_after_commit(session) -> None:
+    if session.info.pop("health_packages_changed", False):
+        invalidate_facet_cache()
+
+# Invalidate only after the change is committed so a concurrent reader cannot
+# re-cache the pre-commit catalog. This only reaches the current process; other
+# workers notice the change through the catalog version checked on every read.
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(HealthPackage, _event_name, _mark_packages_changed)
+event.listen(Session, "after_commit", _invalidate_after_commit)
 
 class HealthPackageService:
     def __init__(self, db: Session):
         self.db = db
-    
-    def get_all_packages(self) -> List[HealthPackage]:
-        return self.db.query(HealthPackage).filter(HealthPackage.is_active == True).order_by(HealthPackage.is_popular.desc(), HealthPackage.price).all()
-    
+
+    def get_all_packages(self, filters: Optional[HealthPackageFilters] = None) -> List[HealthPackage]:
+        query = self.db.query(HealthPackage).filter(*self._filter_clauses(filters))
+        return query.order_by(HealthPackage.is_popular.desc(), HealthPackage.price).all()
+
     def get_package_by_id(self, package_id: int) -> Optional[HealthPackage]:
-        return self.db.query(HealthPackage).filter(HealthPackage.id == package_id, HealthPackage.is_active == True).first()
\ No newline at end of file
+        return self.db.query(HealthPackage).filter(HealthPackage.id == package_id, HealthPackage.is_active == True).first()
+
+    def get_facets(self, filters: Optional[HealthPackageFilters] = None) -> dict:
+        key = self._cache_key(filters)
+        now = time.monotonic()
+        version = self._catalog_version()
+        with _facet_cache_lock:
+            cached = _facet_cache.get(key)
+        if cached and cached[0] > now and cached[1] == version:
+            return cached[2]
+
+        facets = self._compute_facets(filters)
+        with _facet_cache_lock:
+            if len(_facet_cache) >= FACET_CACHE_MAX_ENTRIES:
+                _facet_cache.clear()
+            _facet_cache[key] = (now + FACET_CACHE_TTL, version, facets)
+        return facets
+
+    def _catalog_version(self) -> Tuple:
+        """Changes whenever a package is added, edited or removed, in any process.
+
+        Inserts and updates move max(updated_at) and deletes move the count;
+        the catalog is small, so this costs far less than recomputing facets.
+        """
+        return tuple(self.db.execute(select(func.count(), func.max(HealthPackage.updated_at)).select_from(HealthPackage)).one())
+
+    def _compute_facets(self, filters: Optional[HealthPackageFilters]) -> dict:
+        clauses = self._filter_clauses(filters)
+        price_bucket = case(
+            *[
+                (HealthPackage.price >= low if high is None else and_(HealthPackage.price >= low, HealthPackage.price < high), label)
+                for low, high, label in PRICE_BUCKETS
+            ],
+            else_="other"
+        )
+        discounted = case(
+            (HealthPackage.original_price > HealthPackage.price, "yes"),
+            else_="no"
+        )
+        tests = select(func.unnest(HealthPackage.tests_included).label("value")).where(*clauses).subquery()
+
+        category = func.coalesce(HealthPackage.category, "uncategorized")
+        duration = cast(HealthPackage.duration_hours, String)
+
+        # Every facet is a branch of one UNION ALL so the whole summary is a single round trip.
+        facet_queries = [
+            select(literal("total").label("facet"), literal("").label("value"), func.count().label("count")).where(*clauses),
+            select(literal("category"), category, func.count()).where(*clauses).group_by(category),
+            select(literal("priceRange"), price_bucket, func.count()).where(*clauses).group_by(price_bucket),
+            select(literal("discounted"), discounted, func.count()).where(*clauses).group_by(discounted),
+            select(literal("durationHours"), duration, func.count())
+                .where(*clauses, HealthPackage.duration_hours.isnot(None)).group_by(duration),
+            select(literal("tests"), tests.c.value, func.count()).group_by(tests.c.value),
+        ]
+        rows = self.db.execute(union_all(*facet_queries)).all()
+
+        facets = {"total": 0, "category": [], "priceRange": [], "discounted": [], "durationHours": [], "tests": []}
+        for facet, value, count in rows:
+            if facet == "total":
+                facets["total"] = count
+            else:
+                facets[facet].append({"value": value, "count": count})
+        for facet, values in facets.items():
+            if facet != "total":
+                values.sort(key=lambda item: (-item["count"], item["value"]))
+        return facets
+
+    def _filter_clauses(self, filters: Optional[HealthPackageFilters]) -> list:
+        clauses = [HealthPackage.is_active == True]
+        if not filters:
+            return clauses
+        if filters.category:
+            clauses.append(HealthPackage.category == filters.category)
+        if filters.minPrice is not None:
+            clauses.append(HealthPackage.price >= filters.minPrice)
+        if filters.maxPrice is not None:
+            clauses.append(HealthPackage.price <= filters.maxPrice)
+        if filters.minDiscountPercent is not None:
+            clauses.append(HealthPackage.original_price > 0)
+            clauses.append(
+                (HealthPackage.original_price - HealthPackage.price) * 100
+                >= HealthPackage.original_price * filters.minDiscountPercent
+            )
+        if filters.maxDurationHours is not None:
+            clauses.append(HealthPackage.duration_hours <= filters.maxDurationHours)
+        if filters.tests:
+            # Array containment (@>) is served by the GIN index on tests_included.
+            clauses.append(HealthPackage.tests_included.contains(filters.tests))
+        return clauses
+
+    def _cache_key(self, filters: Optional[HealthPackageFilters]) -> Tuple:
+        if not filters:
+            return ()
+        data = filters.model_dump()
+        data["tests"] = tuple(sorted(data["tests"]))
+        return tuple(sorted(data.items()))
@@ -0,0 +1,92 @@
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, undefer_group
+from app.models import MedicalRecord, Doctor, User
+from app.models.medical_record import DIAGNOSIS_SUMMARY_LENGTH
+from app.schemas.medical_record import MedicalRecordCreate
+from typing import Optional, Tuple
+from datetime import date, datetime
+
+def summarize(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    text = " ".join(text.split())
+    if len(text) <= DIAGNOSIS_SUMMARY_LENGTH:
+        return text
+    return text[:DIAGNOSIS_SUMMARY_LENGTH - 3].rstrip() + "..."
+
+def encode_cursor(visit_date: date, record_id: int) -> str:
+    return f"{visit_date.isoformat()}_{record_id}"
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    visit_date, record_id = cursor.split("_", 1)
+    return datetime.strptime(visit_date, "%Y-%m-%d").date(), int(record_id)
+
+class MedicalRecordService:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_record(self, data: MedicalRecordCreate, doctor_id: int) -> MedicalRecord:
+        record = MedicalRecord(
+            patient_id=data.patientId,
+            doctor_id=doctor_id,
+            appointment_id=data.appointmentId,
+            visit_date=datetime.strptime(data.visitDate, "%Y-%m-%d").date(),
+            chief_complaint=data.chiefComplaint,
+            history_of_present_illness=data.historyOfPresentIllness,
+            physical_examination=data.physicalExamination,
+            diagnosis=data.diagnosis,
+            diagnosis_summary=summarize(data.diagnosis),
+            treatment_plan=data.treatmentPlan,
+            prescription=data.prescription,
+            blood_pressure=data.bloodPressure,
+            heart_rate=data.heartRate,
+            temperature=data.temperature,
+            respiratory_rate=data.respiratoryRate,
+            oxygen_saturation=data.oxygenSaturation,
+            follow_up_required=data.followUpRequired,
+            follow_up_date=datetime.strptime(data.followUpDate, "%Y-%m-%d").date() if data.followUpDate else None,
+            follow_up_notes=data.followUpNotes
+        )
+        
+        self.db.add(record)
+        self.db.commit()
+        self.db.refresh(record)
+        return record
+    
+    def get_timeline(self, patient_id: int, limit: int = 20, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        # Only columns held in idx_medical_records_timeline are read from the
+        # table side, so each page is an index-only range scan; doctor names
+        # are a primary-key lookup per row on the page.
+        page = self.db.query(
+            MedicalRecord.id,
+            MedicalRecord.visit_date,
+            MedicalRecord.doctor_id,
+            MedicalRecord.diagnosis_summary,
+            MedicalRecord.blood_pressure,
+            MedicalRecord.heart_rate,
+            MedicalRecord.temperature,
+            MedicalRecord.respiratory_rate,
+            MedicalRecord.oxygen_saturation
+        ).filter(MedicalRecord.patient_id == patient_id)
+        
+        if cursor:
+            visit_date, record_id = decode_cursor(cursor)
+            page = page.filter(tuple_(MedicalRecord.visit_date, MedicalRecord.id) < (visit_date, record_id))
+        
+        page = page.order_by(MedicalRecord.visit_date.desc(), MedicalRecord.id.desc()).limit(limit + 1).subquery()
+        rows = self.db.query(page, User.full_name.label("doctor_name")).join(
+            Doctor, Doctor.id == page.c.doctor_id
+        ).join(
+            User, User.id == Doctor.user_id
+        ).order_by(page.c.visit_date.desc(), page.c.id.desc()).all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].visit_date, rows[-1].id)
+        return rows, next_cursor
+    
+    def get_record(self, record_id: int) -> Optional[MedicalRecord]:
+        return self.db.query(MedicalRecord).options(
+            undefer_group("narrative")
+        ).filter(MedicalRecord.id == record_id).first()
@@ -0,0 +1,125 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, joinedload
+from app.models import HealthPackage, PackageBooking, PackageCapacityShard
+from app.models.appointment import AppointmentStatus
+from typing import List, Optional
+from datetime import date
+import os
+
+PACKAGE_CAPACITY_SHARDS = int(os.getenv("PACKAGE_CAPACITY_SHARDS", "8"))
+
+class PackageBookingService:
+    def __init__(self, db: Session, shards: int = PACKAGE_CAPACITY_SHARDS):
+        self.db = db
+        self.shards = shards
+
+    def ensure_capacity(self, package: HealthPackage, scheduled_date: date) -> None:
+        """Create the day's capacity shards on first use; a no-op once they exist."""
+        shard_count = max(1, min(self.shards, package.daily_capacity))
+        base, extra = divmod(package.daily_capacity, shard_count)
+        rows = [
+            {
+                "package_id": package.id,
+                "scheduled_date": scheduled_date,
+                "shard": shard,
+                "capacity": base + (1 if shard < extra else 0),
+                "booked": 0
+            }
+            for shard in range(shard_count)
+        ]
+        self.db.execute(insert(PackageCapacityShard).values(rows).on_conflict_do_nothing())
+
+    def get_remaining_capacity(self, package: HealthPackage, scheduled_date: date) -> int:
+        totals = self.db.query(
+            func.sum(PackageCapacityShard.capacity),
+            func.sum(PackageCapacityShard.booked)
+        ).filter(
+            PackageCapacityShard.package_id == package.id,
+            PackageCapacityShard.scheduled_date == scheduled_date
+        ).first()
+        if totals[0] is None:
+            return package.daily_capacity
+        return int(totals[0] - totals[1])
+
+    def _reserve_shard(self, package_id: int, scheduled_date: date, skip_locked: bool) -> Optional[int]:
+        # Pick any shard with room, in random order so concurrent bookings
+        # spread out; the guarded increment cannot exceed the shard's capacity.
+        candidate = select(PackageCapacityShard.shard).where(
+            PackageCapacityShard.package_id == package_id,
+            PackageCapacityShard.scheduled_date == scheduled_date,
+            PackageCapacityShard.booked < PackageCapacityShard.capacity
+        ).order_by(func.random()).limit(1).with_for_update(skip_locked=skip_locked).scalar_subquery()
+
+        return self.db.execute(
+            update(PackageCapacityShard)
+            .where(
+                PackageCapacityShard.package_id == package_id,
+                PackageCapacityShard.scheduled_date == scheduled_date,
+                PackageCapacityShard.shard == candidate,
+                PackageCapacityShard.booked < PackageCapacityShard.capacity
+            )
+            .values(booked=PackageCapacityShard.booked + 1)
+            .returning(PackageCapacityShard.shard)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+
+    def book_package(self, package: HealthPackage, patient_id: int, scheduled_date: date) -> Optional[PackageBooking]:
+        """Book a lab slot, or return None when the day is fully booked."""
+        self.ensure_capacity(package, scheduled_date)
+
+        shard = self._reserve_shard(package.id, scheduled_date, skip_locked=True)
+        for _ in range(self.shards):
+            # Every shard with room may just be locked by in-flight bookings;
+            # wait for one instead of reporting the day as full.
+            if shard is not None or self.get_remaining_capacity(package, scheduled_date) <= 0:
+                break
+            shard = self._reserve_shard(package.id, scheduled_date, skip_locked=False)
+        if shard is None:
+            self.db.rollback()
+            return None
+
+        booking = PackageBooking(
+            patient_id=patient_id,
+            package_id=package.id,
+            booking_date=date.today(),
+            scheduled_date=scheduled_date,
+            status=AppointmentStatus.PENDING,
+            capacity_shard=shard,
+            amount_paid=package.price
+        )
+        self.db.add(booking)
+        self.db.commit()
+        self.db.refresh(booking)
+        return booking
+
+    def cancel_booking(self, booking_id: int, patient_id: Optional[int] = None) -> bool:
+        query = self.db.query(PackageBooking).filter(
+            PackageBooking.id == booking_id,
+            PackageBooking.status != AppointmentStatus.CANCELLED
+        )
+        if patient_id is not None:
+            query = query.filter(PackageBooking.patient_id == patient_id)
+        booking = query.with_for_update().first()
+        if not booking:
+            return False
+
+        booking.status = AppointmentStatus.CANCELLED
+        if booking.capacity_shard is not None:
+            self.db.execute(
+                update(PackageCapacityShard)
+                .where(
+                    PackageCapacityShard.package_id == booking.package_id,
+                    PackageCapacityShard.scheduled_date == booking.scheduled_date,
+                    PackageCapacityShard.shard == booking.capacity_shard
+                )
+                .values(booked=PackageCapacityShard.booked - 1)
+                .execution_options(synchronize_session=False)
+            )
+        self.db.commit()
+        return True
+
+    def get_bookings_by_patient(self, patient_id: int) -> List[PackageBooking]:
+        return self.db.query(PackageBooking).options(
+            joinedload(PackageBooking.package)
+        ).filter(PackageBooking.patient_id == patient_id).order_by(PackageBooking.scheduled_date.desc()).all()
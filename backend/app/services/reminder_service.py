@@ -0,0 +1,67 @@
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models import Appointment, Reminder
+from app.models.appointment import AppointmentStatus
+from app.models.reminder import ReminderKind
+from typing import List
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import os
+
+HOSPITAL_TIMEZONE = ZoneInfo(os.getenv("HOSPITAL_TIMEZONE", "Asia/Kolkata"))
+PAYMENT_NUDGE_HOURS = int(os.getenv("PAYMENT_NUDGE_HOURS", "2"))
+
+REMINDER_OFFSETS = {
+    ReminderKind.APPOINTMENT_24H: timedelta(hours=24),
+    ReminderKind.APPOINTMENT_1H: timedelta(hours=1),
+}
+
+def appointment_start(appointment: Appointment) -> datetime:
+    return datetime.combine(appointment.appointment_date, appointment.appointment_time, tzinfo=HOSPITAL_TIMEZONE)
+
+class ReminderService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def schedule_for_appointment(self, appointment: Appointment) -> None:
+        """Queue reminder rows for an appointment; the caller commits."""
+        self.schedule_for_appointments([appointment])
+
+    def schedule_for_appointments(self, appointments: List[Appointment]) -> int:
+        now = datetime.now(timezone.utc)
+        rows = []
+        for appointment in appointments:
+            start = appointment_start(appointment)
+            for kind, offset in REMINDER_OFFSETS.items():
+                if start - offset > now:
+                    rows.append({"appointment_id": appointment.id, "kind": kind, "due_at": start - offset})
+            nudge_at = max(appointment.created_at or now, now) + timedelta(hours=PAYMENT_NUDGE_HOURS)
+            if nudge_at < start:
+                rows.append({"appointment_id": appointment.id, "kind": ReminderKind.PAYMENT_PENDING, "due_at": nudge_at})
+        if not rows:
+            return 0
+
+        # ON CONFLICT keeps re-scheduling (retries, backfills, restarts) idempotent.
+        result = self.db.execute(
+            insert(Reminder).values(rows).on_conflict_do_nothing(constraint="uq_reminder_appointment_kind")
+        )
+        return result.rowcount
+
+    def backfill_upcoming(self, horizon: timedelta = timedelta(days=2), batch_size: int = 1000) -> int:
+        """Create missing reminders for appointments booked before the scheduler ran."""
+        today = datetime.now(HOSPITAL_TIMEZONE).date()
+        last_day = (datetime.now(HOSPITAL_TIMEZONE) + horizon).date()
+        created = 0
+        last_id = 0
+        while True:
+            appointments = self.db.query(Appointment).filter(
+                Appointment.id > last_id,
+                Appointment.appointment_date.between(today, last_day),
+                Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.RESCHEDULED])
+            ).order_by(Appointment.id).limit(batch_size).all()
+            if not appointments:
+                break
+            created += self.schedule_for_appointments(appointments)
+            self.db.commit()
+            last_id = appointments[-1].id
+        return created
@@ -0,0 +1,221 @@
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session, joinedload
+from app.models import Doctor, User, Specialty
+from typing import Dict, List, Tuple
+from collections import Counter, defaultdict
+from functools import lru_cache
+import json
+import math
+import os
+import re
+import urllib.request
+
+# Symptom vocabulary per specialty. Names match the seeded `specialties` rows.
+SYMPTOM_VOCABULARY: Dict[str, List[str]] = {
+    "Cardiology": [
+        "chest pain", "chest tightness", "palpitations", "irregular heartbeat", "racing heart",
+        "shortness of breath", "breathlessness", "high blood pressure", "hypertension",
+        "swollen ankles", "leg swelling", "fainting", "dizziness on exertion", "cholesterol",
+    ],
+    "Neurology": [
+        "headache", "migraine", "seizure", "fits", "numbness", "tingling", "weakness in limbs",
+        "memory loss", "confusion", "tremor", "vertigo", "dizziness", "slurred speech",
+        "fainting", "loss of balance", "paralysis",
+    ],
+    "Orthopedics": [
+        "joint pain", "knee pain", "back pain", "lower back pain", "neck pain", "shoulder pain",
+        "fracture", "broken bone", "sprain", "swollen joint", "stiffness", "hip pain",
+        "muscle pain", "arthritis", "injury",
+    ],
+    "Pediatrics": [
+        "child fever", "baby", "infant", "toddler", "child cough", "rash in child",
+        "vaccination", "growth delay", "poor feeding", "crying", "kid", "newborn",
+    ],
+    "Oncology": [
+        "lump", "unexplained weight loss", "night sweats", "persistent fatigue", "tumor",
+        "cancer", "abnormal bleeding", "swollen lymph nodes", "mole changes", "chemotherapy",
+    ],
+    "Dermatology": [
+        "rash", "itching", "itchy skin", "acne", "pimples", "eczema", "psoriasis", "hair loss",
+        "dandruff", "skin infection", "hives", "blisters", "dry skin", "mole", "nail infection",
+    ],
+    "Gynecology": [
+        "irregular periods", "missed period", "menstrual pain", "heavy bleeding", "pregnancy",
+        "vaginal discharge", "pelvic pain", "menopause", "hot flashes", "fertility", "pcos",
+    ],
+    "Psychiatry": [
+        "anxiety", "depression", "panic attack", "insomnia", "trouble sleeping", "mood swings",
+        "stress", "hallucinations", "suicidal thoughts", "low mood", "addiction", "irritability",
+    ],
+    "Ophthalmology": [
+        "blurred vision", "eye pain", "red eye", "watery eyes", "itchy eyes", "double vision",
+        "vision loss", "floaters", "eye infection", "cataract", "dry eyes", "light sensitivity",
+    ],
+    "ENT": [
+        "ear pain", "earache", "hearing loss", "ringing in ears", "tinnitus", "sore throat",
+        "blocked nose", "nasal congestion", "sinus", "nosebleed", "hoarse voice", "snoring",
+        "tonsils", "difficulty swallowing", "ear discharge",
+    ],
+}
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "the", "i", "im", "my", "me", "have", "has", "having", "had", "with",
+    "of", "in", "on", "at", "for", "to", "is", "am", "are", "been", "feel", "feeling", "some",
+    "since", "from", "very", "also", "days", "day", "weeks", "week", "lot", "bit", "it", "when",
+})
+
+TRIAGE_CACHE_SIZE = int(os.getenv("TRIAGE_CACHE_SIZE", "4096"))
+TRIAGE_LLM_TIMEOUT = float(os.getenv("TRIAGE_LLM_TIMEOUT", "4"))
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+class SymptomIndex:
+    """BM25 inverted index over the symptom vocabulary, one document per specialty."""
+
+    def __init__(self, vocabulary: Dict[str, List[str]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.specialties = list(vocabulary)
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.phrases: Dict[int, List[Tuple[str, ...]]] = {}
+        lengths = []
+        for doc_id, name in enumerate(self.specialties):
+            terms = Counter()
+            phrases = []
+            for phrase in vocabulary[name]:
+                tokens = tokenize(phrase)
+                terms.update(tokens)
+                if len(tokens) > 1:
+                    phrases.append(tuple(tokens))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+            self.phrases[doc_id] = phrases
+            lengths.append(sum(terms.values()))
+        self.doc_lengths = lengths
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        n = len(self.specialties)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def score(self, tokens: Tuple[str, ...]) -> List[Tuple[str, float, List[str]]]:
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, List[str]] = defaultdict(list)
+        for term in set(tokens):
+            for doc_id, tf in self.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_id].append(term)
+
+        # Multi-word symptoms ("chest pain") outrank their individual words.
+        joined = " " + " ".join(tokens) + " "
+        for doc_id in list(scores):
+            for phrase in self.phrases[doc_id]:
+                if " " + " ".join(phrase) + " " in joined:
+                    scores[doc_id] += sum(self.idf[t] for t in phrase)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.specialties[doc_id], round(score, 4), sorted(matched[doc_id])) for doc_id, score in ranked]
+
+# Built once at import time so every worker starts with a warm index.
+_INDEX = SymptomIndex(SYMPTOM_VOCABULARY)
+
+@lru_cache(maxsize=TRIAGE_CACHE_SIZE)
+def _rank_cached(tokens: Tuple[str, ...]) -> Tuple[Tuple[str, float, Tuple[str, ...]], ...]:
+    return tuple((name, score, tuple(terms)) for name, score, terms in _INDEX.score(tokens))
+
+def rank_specialties(symptoms: str) -> List[Tuple[str, float, List[str]]]:
+    tokens = tuple(tokenize(symptoms))
+    return [(name, score, list(terms)) for name, score, terms in _rank_cached(tokens)]
+
+def _llm_rank_specialties(symptoms: str) -> List[str]:
+    """Slow path: ask Gemini to pick specialties when the index has no match."""
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_GENAI_API_KEY")
+    if not api_key:
+        return []
+
+    model = os.getenv("TRIAGE_LLM_MODEL", "gemini-1.5-flash")
+    prompt = (
+        "Pick the most relevant medical specialties for these symptoms from this list: "
+        f"{', '.join(_INDEX.specialties)}. Reply with a JSON array of names only.\n"
+        f"Symptoms: {symptoms}"
+    )
+    request = urllib.request.Request(
+        f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}",
+        data=json.dumps({"contents": [{"parts": [{"text": prompt}]}]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=TRIAGE_LLM_TIMEOUT) as response:
+            payload = json.loads(response.read())
+        text = payload["candidates"][0]["content"]["parts"][0]["text"]
+        names = json.loads(text[text.index("["):text.rindex("]") + 1])
+    except Exception:
+        return []
+    return [name for name in names if name in SYMPTOM_VOCABULARY]
+
+class TriageService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def triage(self, symptoms: str, max_specialties: int = 3, doctor_limit: int = 5, use_llm: bool = True) -> dict:
+        ranked = rank_specialties(symptoms)[:max_specialties]
+        source = "index"
+        if not ranked and use_llm:
+            ranked = [(name, 0.0, []) for name in _llm_rank_specialties(symptoms)[:max_specialties]]
+            source = "llm"
+        if not ranked:
+            return {"source": "none", "specialties": [], "doctors": []}
+
+        names = [name for name, _, _ in ranked]
+        rows = {
+            specialty.name: specialty
+            for specialty in self.db.query(Specialty).filter(Specialty.name.in_(names), Specialty.is_active == True).all()
+        }
+        specialties = [
+            {"specialty": rows[name], "score": score, "matchedTerms": terms}
+            for name, score, terms in ranked if name in rows
+        ]
+        doctors = self.get_doctors_for_specialties([item["specialty"].id for item in specialties], doctor_limit)
+        return {"source": source, "specialties": specialties, "doctors": doctors}
+
+    def get_doctors_for_specialties(self, specialty_ids: List[int], limit: int) -> List[Doctor]:
+        if not specialty_ids:
+            return []
+        # Rank within each specialty so one crowded specialty cannot crowd the
+        # best-matching one out of the candidate rows.
+        ranked = self.db.query(
+            Doctor.id.label("doctor_id"),
+            func.row_number().over(
+                partition_by=Doctor.specialty_id,
+                order_by=(Doctor.rating.desc(), Doctor.total_reviews.desc(), Doctor.id)
+            ).label("specialty_rank")
+        ).join(User).filter(
+            User.is_active == True,
+            Doctor.is_available == True,
+            Doctor.specialty_id.in_(specialty_ids)
+        ).subquery()
+
+        # Keep the specialty ranking: best-matching specialty's doctors come first.
+        order = {specialty_id: position for position, specialty_id in enumerate(specialty_ids)}
+        return self.db.query(Doctor).join(ranked, ranked.c.doctor_id == Doctor.id).options(
+            joinedload(Doctor.user),
+            joinedload(Doctor.specialty),
+            joinedload(Doctor.next_slot)
+        ).filter(
+            ranked.c.specialty_rank <= limit
+        ).order_by(
+            case(order, value=Doctor.specialty_id),
+            ranked.c.specialty_rank
+        ).limit(limit).all()
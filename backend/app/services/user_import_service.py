@@ -0,0 +1,243 @@
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.database import session_branch
+from pydantic import ValidationError
+from app.models import User, Patient, Doctor, Specialty
+from app.models.user import UserType
+from app.schemas.user_import import UserImportRow
+from app.services.auth_service import AuthService
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+import csv
+import io
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    messages = []
+    for item in error.errors():
+        field = ".".join(str(part) for part in item["loc"])
+        messages.append(f"{field}: {item['msg']}" if field else item["msg"])
+    return messages
+
+class UserImportService:
+    """Bulk-creates users with their patient or doctor profiles.
+
+    Rows are read and validated one at a time from the uploaded stream and
+    collected into chunks; each chunk is written with one multi-row INSERT
+    ... RETURNING per table inside a single transaction. A failure only
+    affects its own row or, for unexpected database errors, its own chunk.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = IMPORT_CHUNK_SIZE, max_errors: int = IMPORT_MAX_ERRORS):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self._specialties: Dict[str, int] = {}
+        self._errors: List[dict] = []
+        self._failed = 0
+
+    def import_stream(self, stream: BinaryIO, fmt: str, dry_run: bool = False) -> dict:
+        self._specialties = {
+            name.lower(): specialty_id for specialty_id, name in self.db.query(Specialty.id, Specialty.name)
+        }
+        self._errors = []
+        self._failed = 0
+        processed = created = 0
+        seen: Dict[str, Set[str]] = {"email": set(), "phone": set(), "licenseNumber": set()}
+        chunk: List[Tuple[int, UserImportRow]] = []
+
+        for row_number, raw, parse_error in self._read_rows(stream, fmt):
+            processed += 1
+            if parse_error:
+                self._reject(row_number, None, [parse_error])
+                continue
+            row, errors = self._validate(raw, seen)
+            if errors:
+                self._reject(row_number, raw.get("email"), errors)
+                continue
+            chunk.append((row_number, row))
+            if len(chunk) >= self.chunk_size:
+                created += self._write_chunk(chunk, dry_run)
+                chunk = []
+        if chunk:
+            created += self._write_chunk(chunk, dry_run)
+
+        self._errors.sort(key=lambda error: error["row"])
+        return {
+            "processed": processed,
+            "created": created,
+            "failed": self._failed,
+            "dryRun": dry_run,
+            "errors": self._errors,
+            "errorsTruncated": self._failed > len(self._errors)
+        }
+
+    def _read_rows(self, stream: BinaryIO, fmt: str) -> Iterator[Tuple[int, dict, Optional[str]]]:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        if fmt == "csv":
+            for row_number, raw in enumerate(csv.DictReader(text), start=1):
+                if None in raw:
+                    yield row_number, {}, "too many columns"
+                    continue
+                yield row_number, {key: value.strip() or None for key, value in raw.items() if value is not None}, None
+            return
+
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                yield row_number, {}, f"invalid JSON: {e}"
+                continue
+            if not isinstance(raw, dict):
+                yield row_number, {}, "each line must be a JSON object"
+                continue
+            yield row_number, raw, None
+
+    def _validate(self, raw: dict, seen: Dict[str, Set[str]]) -> Tuple[Optional[UserImportRow], List[str]]:
+        try:
+            row = UserImportRow.model_validate(raw)
+        except ValidationError as e:
+            return None, _validation_messages(e)
+
+        errors = []
+        if row.role == UserType.doctor and row.specialty and row.specialty.lower() not in self._specialties:
+            errors.append(f"specialty: unknown specialty '{row.specialty}'")
+        for field in ("email", "phone", "licenseNumber"):
+            value = getattr(row, field)
+            if value is None or (field == "licenseNumber" and row.role != UserType.doctor):
+                continue
+            if value in seen[field]:
+                errors.append(f"{field}: duplicate of an earlier row")
+            else:
+                seen[field].add(value)
+        return row, errors
+
+    def _reject(self, row_number: int, email: Optional[str], errors: List[str]) -> None:
+        self._failed += 1
+        if len(self._errors) < self.max_errors:
+            self._errors.append({"row": row_number, "email": email, "errors": errors})
+
+    def _existing(self, column, values: List[str]) -> Set[str]:
+        if not values:
+            return set()
+        return set(self.db.execute(select(column).where(column.in_(values))).scalars())
+
+    def _write_chunk(self, chunk: List[Tuple[int, UserImportRow]], dry_run: bool) -> int:
+        try:
+            created, rejected = self._insert_chunk(chunk, dry_run)
+            if dry_run:
+                self.db.rollback()
+            else:
+                self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            message = str(getattr(e, "orig", e)).strip().splitlines()[0]
+            logger.error(f"User import chunk of {len(chunk)} rows failed: {message}")
+            for row_number, row in chunk:
+                self._reject(row_number, row.email, [f"chunk failed: {message}"])
+            return 0
+        for row_number, email, errors in rejected:
+            self._reject(row_number, email, errors)
+        return created
+
+    def _insert_chunk(self, chunk: List[Tuple[int, UserImportRow]], dry_run: bool) -> Tuple[int, List[tuple]]:
+        # Existing accounts are reported per row instead of failing the whole chunk.
+        rejected: List[tuple] = []
+        taken_emails = self._existing(User.email, [row.email for _, row in chunk])
+        taken_phones = self._existing(User.phone, [row.phone for _, row in chunk if row.phone])
+        taken_licenses = self._existing(
+            Doctor.license_number, [row.licenseNumber for _, row in chunk if row.role == UserType.doctor]
+        )
+
+        pending: List[Tuple[int, UserImportRow]] = []
+        for row_number, row in chunk:
+            errors = []
+            if row.email in taken_emails:
+                errors.append("email: already registered")
+            if row.phone and row.phone in taken_phones:
+                errors.append("phone: already registered")
+            if row.role == UserType.doctor and row.licenseNumber in taken_licenses:
+                errors.append("licenseNumber: already registered")
+            if errors:
+                rejected.append((row_number, row.email, errors))
+            else:
+                pending.append((row_number, row))
+        if not pending or dry_run:
+            return len(pending), rejected
+
+        hash_password = AuthService(self.db).get_password_hash
+        user_ids = dict(self.db.execute(
+            insert(User).values([
+                {
+                    "email": row.email,
+                    "password_hash": hash_password(row.password),
+                    "full_name": row.fullName,
+                    "phone": row.phone,
+                    "user_type": row.role,
+                    "is_active": True
+                }
+                for _, row in pending
+            ]).on_conflict_do_nothing().returning(User.email, User.id)
+        ).all())
+
+        # Rows registered concurrently since the pre-check lose the race quietly.
+        inserted = []
+        for row_number, row in pending:
+            if row.email in user_ids:
+                inserted.append((row_number, row))
+            else:
+                rejected.append((row_number, row.email, ["email or phone: already registered"]))
+
+        patients = [self._patient_values(user_ids[row.email], row) for _, row in inserted if row.role == UserType.patient]
+        if patients:
+            self.db.execute(insert(Patient).values(patients))
+
+        doctors = [self._doctor_values(user_ids[row.email], row) for _, row in inserted if row.role == UserType.doctor]
+        if doctors:
+            doctor_users = set(self.db.execute(
+                insert(Doctor).values(doctors).on_conflict_do_nothing().returning(Doctor.user_id)
+            ).scalars())
+            orphaned = [row for _, row in inserted if row.role == UserType.doctor and user_ids[row.email] not in doctor_users]
+            if orphaned:
+                self.db.execute(delete(User).where(User.id.in_([user_ids[row.email] for row in orphaned])))
+                orphaned_emails = {row.email for row in orphaned}
+                for row_number, row in inserted:
+                    if row.email in orphaned_emails:
+                        rejected.append((row_number, row.email, ["licenseNumber: already registered"]))
+                inserted = [(row_number, row) for row_number, row in inserted if row.email not in orphaned_emails]
+
+        return len(inserted), rejected
+
+    def _patient_values(self, user_id: int, row: UserImportRow) -> dict:
+        return {
+            "user_id": user_id,
+            "branch": session_branch(self.db),
+            "date_of_birth": row.dateOfBirth,
+            "gender": row.gender,
+            "blood_group": row.bloodGroup,
+            "city": row.city
+        }
+
+    def _doctor_values(self, user_id: int, row: UserImportRow) -> dict:
+        return {
+            "user_id": user_id,
+            "branch": session_branch(self.db),
+            "license_number": row.licenseNumber,
+            "specialty_id": self._specialties.get(row.specialty.lower()) if row.specialty else None,
+            "experience_years": row.experienceYears or 0,
+            "consultation_fee_onsite": row.consultationFee,
+            "is_available": True,
+            "is_verified": False
+        }
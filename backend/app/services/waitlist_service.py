@@ -0,0 +1,341 @@
+from sqlalchemy import select, update, func, or_, and_, values, column, Integer
+from sqlalchemy.orm import Session
+from app.database import ShardRouter, shard_router, session_branch
+from app.models import Appointment, WaitlistEntry
+from app.models.appointment import AppointmentStatus
+from app.models.waitlist import WaitlistStatus
+from app.schemas.waitlist import WaitlistCreate
+from app.services.reminder_service import ReminderService
+from app.services.availability_service import AvailabilityService
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, date, time, timedelta, timezone
+import heapq
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+WAITLIST_HOLD_MINUTES = int(os.getenv("WAITLIST_HOLD_MINUTES", "15"))
+WAITLIST_SWEEP_SECONDS = int(os.getenv("WAITLIST_SWEEP_SECONDS", "60"))
+WAITLIST_RESCAN_HOURS = int(os.getenv("WAITLIST_RESCAN_HOURS", "24"))
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class WaitlistService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def join_waitlist(self, data: WaitlistCreate, patient_id: int, priority: int = 0) -> WaitlistEntry:
+        entry = WaitlistEntry(
+            patient_id=patient_id,
+            doctor_id=data.doctorId,
+            desired_date=datetime.strptime(data.desiredDate, "%Y-%m-%d").date(),
+            preferred_time_from=datetime.strptime(data.preferredTimeFrom, "%H:%M").time() if data.preferredTimeFrom else None,
+            preferred_time_to=datetime.strptime(data.preferredTimeTo, "%H:%M").time() if data.preferredTimeTo else None,
+            priority=priority,
+            reason_for_visit=data.reason,
+            status=WaitlistStatus.WAITING
+        )
+
+        self.db.add(entry)
+        self.db.commit()
+        self.db.refresh(entry)
+        return entry
+
+    def get_entries_by_patient(self, patient_id: int) -> List[WaitlistEntry]:
+        return self.db.query(WaitlistEntry).filter(
+            WaitlistEntry.patient_id == patient_id,
+            WaitlistEntry.status.in_([WaitlistStatus.WAITING, WaitlistStatus.OFFERED])
+        ).order_by(WaitlistEntry.desired_date).all()
+
+    def leave_waitlist(self, entry_id: int, patient_id: int) -> Optional[WaitlistEntry]:
+        entry = self.db.execute(
+            update(WaitlistEntry)
+            .where(
+                WaitlistEntry.id == entry_id,
+                WaitlistEntry.patient_id == patient_id,
+                WaitlistEntry.status.in_([WaitlistStatus.WAITING, WaitlistStatus.OFFERED])
+            )
+            .values(status=WaitlistStatus.CANCELLED)
+            .returning(WaitlistEntry.doctor_id, WaitlistEntry.desired_date, WaitlistEntry.offered_time)
+        ).first()
+        self.db.commit()
+        if entry is None:
+            return None
+        # An abandoned hold goes straight to the next patient in line.
+        if entry.offered_time is not None:
+            waitlist_worker.notify_slot_freed(entry.doctor_id, entry.desired_date, entry.offered_time, session_branch(self.db))
+        return self.db.get(WaitlistEntry, entry_id)
+
+    def claim_offer(self, entry_id: int, patient_id: int) -> Optional[Appointment]:
+        # The conditional UPDATE is the atomic claim: only one caller can move
+        # an unexpired offer to claimed, and the row lock is held until commit.
+        claimed = self.db.execute(
+            update(WaitlistEntry)
+            .where(
+                WaitlistEntry.id == entry_id,
+                WaitlistEntry.patient_id == patient_id,
+                WaitlistEntry.status == WaitlistStatus.OFFERED,
+                WaitlistEntry.offer_expires_at > _utcnow()
+            )
+            .values(status=WaitlistStatus.CLAIMED)
+            .returning(
+                WaitlistEntry.doctor_id,
+                WaitlistEntry.desired_date,
+                WaitlistEntry.offered_time,
+                WaitlistEntry.reason_for_visit
+            )
+        ).first()
+        if claimed is None:
+            self.db.rollback()
+            return None
+
+        lock_slot(self.db, claimed.doctor_id, claimed.desired_date, claimed.offered_time)
+        if not slot_is_free(self.db, claimed.doctor_id, claimed.desired_date, claimed.offered_time):
+            self.db.rollback()
+            return None
+
+        appointment = Appointment(
+            patient_id=patient_id,
+            doctor_id=claimed.doctor_id,
+            appointment_date=claimed.desired_date,
+            appointment_time=claimed.offered_time,
+            reason_for_visit=claimed.reason_for_visit
+        )
+        self.db.add(appointment)
+        self.db.flush()
+        ReminderService(self.db).schedule_for_appointment(appointment)
+        AvailabilityService(self.db).slot_booked(claimed.doctor_id, claimed.desired_date, claimed.offered_time)
+        self.db.execute(
+            update(WaitlistEntry).where(WaitlistEntry.id == entry_id).values(appointment_id=appointment.id)
+        )
+        self.db.commit()
+        self.db.refresh(appointment)
+        return appointment
+
+def _slot_key(slot_date: date, slot_time: time) -> int:
+    return slot_date.toordinal() * 1440 + slot_time.hour * 60 + slot_time.minute
+
+def lock_slot(db: Session, doctor_id: int, slot_date: date, slot_time: time) -> None:
+    """Serialize offers and claims for one doctor slot until the transaction ends."""
+    db.execute(select(func.pg_advisory_xact_lock(doctor_id, _slot_key(slot_date, slot_time))))
+
+def lock_slots(db: Session, slots: Iterable[Tuple[int, date, time]]) -> None:
+    """Take several slot locks in one round trip, in a fixed order to avoid deadlocks."""
+    keys = sorted({(doctor_id, _slot_key(slot_date, slot_time)) for doctor_id, slot_date, slot_time in slots})
+    if not keys:
+        return
+    slot_keys = values(column("doctor_id", Integer), column("slot_key", Integer), name="slot_keys").data(keys)
+    db.execute(
+        select(func.pg_advisory_xact_lock(slot_keys.c.doctor_id, slot_keys.c.slot_key))
+        .order_by(slot_keys.c.doctor_id, slot_keys.c.slot_key)
+    ).all()
+
+def slot_is_free(db: Session, doctor_id: int, slot_date: date, slot_time: time) -> bool:
+    """True when the slot has no live appointment and no unexpired waitlist hold."""
+    booked = db.query(Appointment.id).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.appointment_date == slot_date,
+        Appointment.appointment_time == slot_time,
+        Appointment.status != AppointmentStatus.CANCELLED
+    ).exists()
+    held = db.query(WaitlistEntry.id).filter(
+        WaitlistEntry.doctor_id == doctor_id,
+        WaitlistEntry.desired_date == slot_date,
+        WaitlistEntry.offered_time == slot_time,
+        WaitlistEntry.status == WaitlistStatus.OFFERED,
+        WaitlistEntry.offer_expires_at > _utcnow()
+    ).exists()
+    return not db.query(or_(booked, held)).scalar()
+
+def cancelled_slots_with_waiters(db: Session, since: datetime) -> List[Tuple[int, date, time]]:
+    """Upcoming slots cancelled since `since` for which someone is still waiting.
+
+    Lets the sweep re-offer slots whose freed-slot notification was lost, e.g.
+    because the process restarted before the worker got to it. offer_slot
+    re-checks each one, so slots already rebooked or held are skipped there.
+    """
+    waiting = db.query(WaitlistEntry.id).filter(
+        WaitlistEntry.doctor_id == Appointment.doctor_id,
+        WaitlistEntry.desired_date == Appointment.appointment_date,
+        WaitlistEntry.status == WaitlistStatus.WAITING
+    ).exists()
+    rows = db.query(Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time).filter(
+        Appointment.status == AppointmentStatus.CANCELLED,
+        Appointment.cancelled_at >= since,
+        Appointment.appointment_date >= _utcnow().date(),
+        waiting
+    ).distinct().all()
+    return [(row.doctor_id, row.appointment_date, row.appointment_time) for row in rows]
+
+def offer_slot(db: Session, doctor_id: int, slot_date: date, slot_time: time, hold_minutes: int = WAITLIST_HOLD_MINUTES) -> Optional[WaitlistEntry]:
+    """Hold a freed slot for the highest-priority eligible waiting patient."""
+    if slot_date < _utcnow().date():
+        return None
+
+    lock_slot(db, doctor_id, slot_date, slot_time)
+    if not slot_is_free(db, doctor_id, slot_date, slot_time):
+        db.rollback()
+        return None
+
+    # One live offer per slot at a time.
+    already_offered = db.query(WaitlistEntry.id).filter(
+        WaitlistEntry.doctor_id == doctor_id,
+        WaitlistEntry.desired_date == slot_date,
+        WaitlistEntry.offered_time == slot_time,
+        WaitlistEntry.status == WaitlistStatus.OFFERED
+    ).first()
+    if already_offered:
+        db.rollback()
+        return None
+
+    # Walks idx_waitlist_queue in order; SKIP LOCKED lets several workers pop concurrently.
+    entry = db.query(WaitlistEntry).filter(
+        WaitlistEntry.doctor_id == doctor_id,
+        WaitlistEntry.desired_date == slot_date,
+        WaitlistEntry.status == WaitlistStatus.WAITING,
+        or_(WaitlistEntry.preferred_time_from.is_(None), WaitlistEntry.preferred_time_from <= slot_time),
+        or_(WaitlistEntry.preferred_time_to.is_(None), WaitlistEntry.preferred_time_to >= slot_time),
+        ~db.query(Appointment.id).filter(
+            Appointment.patient_id == WaitlistEntry.patient_id,
+            Appointment.doctor_id == doctor_id,
+            Appointment.appointment_date == slot_date,
+            Appointment.status != AppointmentStatus.CANCELLED
+        ).exists()
+    ).order_by(
+        WaitlistEntry.priority.desc(),
+        WaitlistEntry.created_at
+    ).with_for_update(skip_locked=True).first()
+    if entry is None:
+        db.rollback()
+        return None
+
+    entry.status = WaitlistStatus.OFFERED
+    entry.offered_time = slot_time
+    entry.offer_expires_at = _utcnow() + timedelta(minutes=hold_minutes)
+    db.commit()
+    db.refresh(entry)
+    logger.info(f"Offered slot {slot_date} {slot_time} with doctor {doctor_id} to waitlist entry {entry.id}")
+    return entry
+
+def expire_offers(db: Session, entry_ids: Optional[List[int]] = None) -> List[Tuple[int, date, time]]:
+    """Expire lapsed holds and return the slots they were holding."""
+    criteria = [
+        WaitlistEntry.status == WaitlistStatus.OFFERED,
+        WaitlistEntry.offer_expires_at <= _utcnow()
+    ]
+    if entry_ids is not None:
+        criteria.append(WaitlistEntry.id.in_(entry_ids))
+    rows = db.execute(
+        update(WaitlistEntry)
+        .where(and_(*criteria))
+        .values(status=WaitlistStatus.EXPIRED)
+        .returning(WaitlistEntry.doctor_id, WaitlistEntry.desired_date, WaitlistEntry.offered_time)
+    ).all()
+    db.commit()
+    return [(row.doctor_id, row.desired_date, row.offered_time) for row in rows]
+
+class WaitlistWorker:
+    """Background thread that backfills freed slots from the waitlist.
+
+    Freed slots arrive on a queue from the cancellation path, tagged with the
+    branch whose database they belong to. Holds handed out by this process sit
+    in a min-heap keyed by expiry so the worker wakes exactly when the next
+    one lapses; a periodic sweep of every branch database covers holds created
+    by other processes or before a restart, and re-offers slots cancelled in
+    the last WAITLIST_RESCAN_HOURS that still have waiting patients, since the
+    in-memory queue does not survive a restart.
+    """
+
+    def __init__(
+        self,
+        router: ShardRouter = shard_router,
+        hold_minutes: int = WAITLIST_HOLD_MINUTES,
+        sweep_seconds: int = WAITLIST_SWEEP_SECONDS,
+        rescan_hours: int = WAITLIST_RESCAN_HOURS
+    ):
+        self.router = router
+        self.hold_minutes = hold_minutes
+        self.sweep_seconds = sweep_seconds
+        self.rescan_hours = rescan_hours
+        self._slots: "queue.Queue[Optional[Tuple[str, int, date, time]]]" = queue.Queue()
+        self._holds: List[Tuple[datetime, str, int]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._next_sweep = _utcnow()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="waitlist-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread and self._thread.is_alive():
+            self._slots.put(None)
+            self._thread.join(timeout)
+        self._thread = None
+
+    def notify_slot_freed(self, doctor_id: int, slot_date: date, slot_time: time, branch: Optional[str] = None) -> None:
+        self._slots.put((branch or self.router.default_branch, doctor_id, slot_date, slot_time))
+
+    def _session(self, branch: str) -> Session:
+        # Doctor and entry ids are unique per database, so the worker does not filter by branch.
+        return self.router.session(branch, scoped=False)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                slot = self._slots.get(timeout=self._seconds_until_next_wakeup())
+            except queue.Empty:
+                slot = ()
+            if slot is None:
+                return
+            try:
+                if slot:
+                    branch, doctor_id, slot_date, slot_time = slot
+                    with self._session(branch) as db:
+                        self._offer(db, branch, doctor_id, slot_date, slot_time)
+                self._expire_due_holds()
+            except Exception as e:
+                logger.error(f"Waitlist worker error: {e}")
+
+    def _seconds_until_next_wakeup(self) -> float:
+        wakeup = self._next_sweep
+        if self._holds and self._holds[0][0] < wakeup:
+            wakeup = self._holds[0][0]
+        return max(0.0, (wakeup - _utcnow()).total_seconds())
+
+    def _offer(self, db: Session, branch: str, doctor_id: int, slot_date: date, slot_time: time) -> None:
+        entry = offer_slot(db, doctor_id, slot_date, slot_time, self.hold_minutes)
+        if entry is not None:
+            heapq.heappush(self._holds, (entry.offer_expires_at, branch, entry.id))
+
+    def _expire_due_holds(self) -> None:
+        now = _utcnow()
+        due: Dict[str, List[int]] = {}
+        while self._holds and self._holds[0][0] <= now:
+            _, branch, entry_id = heapq.heappop(self._holds)
+            due.setdefault(branch, []).append(entry_id)
+
+        sweep = now >= self._next_sweep
+        branches = self.router.database_branches() if sweep else []
+        # One unreachable database must not hold up the others; its lapsed holds
+        # are picked up by a later sweep.
+        for branch in dict.fromkeys([*due, *branches]):
+            try:
+                with self._session(branch) as db:
+                    freed = expire_offers(db, due[branch]) if branch in due else []
+                    if branch in branches:
+                        freed += expire_offers(db)
+                        freed += cancelled_slots_with_waiters(db, now - timedelta(hours=self.rescan_hours))
+                    for doctor_id, slot_date, slot_time in dict.fromkeys(freed):
+                        self._offer(db, branch, doctor_id, slot_date, slot_time)
+            except Exception as e:
+                logger.error(f"Waitlist expiry failed for {branch}: {e}")
+        if sweep:
+            self._next_sweep = now + timedelta(seconds=self.sweep_seconds)
+
+waitlist_worker = WaitlistWorker()
@@ -0,0 +1,163 @@
+"""
+Read-mostly catalog snapshot shared by all server workers.
+
+Specialties, health packages and the doctor directory are pre-encoded as JSON
+into one file (on tmpfs in production) that every worker maps read-only, so
+the data lives once in the page cache instead of once per process and hot
+listing endpoints return bytes without touching the database or re-encoding.
+"""
+
+from sqlalchemy.orm import Session
+from typing import Dict, Optional, Tuple
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "")
+SNAPSHOT_REFRESH_SECONDS = int(os.getenv("SNAPSHOT_REFRESH_SECONDS", "30"))
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "1"))
+
+_MAGIC = b"HSNAP001"
+_HEADER = struct.Struct("<8sQ")
+
+def _encode(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def with_fields(blob: bytes, fields: dict) -> bytes:
+    """Append live fields to a snapshot-encoded JSON object without decoding it."""
+    return blob[:-1] + b"," + _encode(fields)[1:]
+
+def build_snapshot(db: Session) -> bytes:
+    # Imported lazily: the endpoint modules import this module for reads.
+    from app.api.endpoints.doctors import AVAILABILITY_FIELDS, doctor_to_response
+    from app.api.endpoints.health_packages import package_to_response
+    from app.schemas import SpecialtyResponse
+    from app.services import SpecialtyService, HealthPackageService, DoctorService
+
+    payload = bytearray()
+    blobs: Dict[str, Tuple[int, int]] = {}
+
+    def append(data: bytes) -> Tuple[int, int]:
+        offset = len(payload)
+        payload.extend(data)
+        return offset, len(data)
+
+    specialties = SpecialtyService(db).get_all_specialties()
+    blobs["specialties"] = append(_encode([SpecialtyResponse.model_validate(s).model_dump() for s in specialties]))
+    blobs["health_packages"] = append(_encode([package_to_response(p) for p in HealthPackageService(db).get_all_packages()]))
+
+    # One blob per doctor so any page is a byte join. Availability changes with
+    # every booking, so it is left out here and filled in live by the listing.
+    for doctor in DoctorService(db).get_all_doctors(limit=None):
+        response = doctor_to_response(doctor)
+        for field in AVAILABILITY_FIELDS:
+            del response[field]
+        blobs[f"doctor:{doctor.id}"] = append(_encode(response))
+
+    header = _encode({"builtAt": time.time(), "blobs": blobs})
+    return _HEADER.pack(_MAGIC, len(header)) + header + bytes(payload)
+
+def write_snapshot(db: Session, path: str = SNAPSHOT_PATH) -> int:
+    data = build_snapshot(db)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    # Atomic swap: readers holding the old mapping keep a consistent view.
+    os.replace(tmp_path, path)
+    return len(data)
+
+class SharedSnapshot:
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        self.path = path
+        self._mapping: Optional[mmap.mmap] = None
+        self._index: dict = {}
+        self._base = 0
+        self._inode: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def ready(self) -> bool:
+        return self._ensure_mapped()
+
+    def get(self, key: str) -> Optional[bytes]:
+        if not self._ensure_mapped():
+            return None
+        mapping, index, base = self._mapping, self._index, self._base
+        location = index["blobs"].get(key)
+        if location is None:
+            return None
+        offset, length = location
+        return mapping[base + offset:base + offset + length]
+
+    def _ensure_mapped(self) -> bool:
+        if not self.path:
+            return False
+        now = time.monotonic()
+        if self._mapping is not None and now - self._checked_at < SNAPSHOT_CHECK_SECONDS:
+            return True
+        with self._lock:
+            self._checked_at = now
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                return self._mapping is not None
+            if inode != self._inode:
+                self._map(inode)
+        return self._mapping is not None
+
+    def _map(self, inode: int) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, header_length = _HEADER.unpack_from(mapping, 0)
+            if magic != _MAGIC:
+                raise ValueError("bad snapshot header")
+            index = json.loads(mapping[_HEADER.size:_HEADER.size + header_length])
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not map catalog snapshot {self.path}: {e}")
+            return
+        # Swap in order so a concurrent reader never pairs a new index with an old mapping.
+        self._mapping, self._index, self._base = mapping, index, _HEADER.size + header_length
+        self._inode = inode
+
+    def start_refresher(self, session_factory) -> None:
+        """Rebuild the snapshot periodically; a file lock elects one worker per round."""
+        if not self.path or (self._refresher and self._refresher.is_alive()):
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_loop, args=(session_factory,), name="snapshot-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refresher(self) -> None:
+        self._stop.set()
+
+    def _refresh_loop(self, session_factory) -> None:
+        while not self._stop.wait(SNAPSHOT_REFRESH_SECONDS):
+            try:
+                with open(f"{self.path}.lock", "w") as lock_file:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    try:
+                        if time.time() - os.stat(self.path).st_mtime < SNAPSHOT_REFRESH_SECONDS:
+                            continue
+                    except FileNotFoundError:
+                        pass
+                    with session_factory() as db:
+                        write_snapshot(db, self.path)
+            except Exception as e:
+                logger.error(f"Catalog snapshot refresh failed: {e}")
+
+shared_snapshot = SharedSnapshot()
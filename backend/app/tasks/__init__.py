@@ -0,0 +1,9 @@
+from .channels import ReminderChannel, ReminderMessage, LogChannel, register_channel, get_channel
+
+__all__ = [
+    "ReminderChannel",
+    "ReminderMessage",
+    "LogChannel",
+    "register_channel",
+    "get_channel"
+]
@@ -0,0 +1,341 @@
+"""
+Offline columnar export of appointments and package bookings for reporting.
+
+Facts are written as Parquet partitioned by month (`month=YYYY-MM`, Hive
+style) under ANALYTICS_EXPORT_DIR; doctors, specialties and health packages
+are small dimension files rewritten on every run, so reports join against
+current names instead of values frozen into old partitions.
+
+Runs are incremental: rows whose updated_at is past the stored watermark
+mark their month as dirty, together with the month an earlier export put
+them in (a rescheduled appointment can move between months). Each dirty
+partition is re-read whole and swapped in atomically by a pool of worker
+processes, so a partition never holds two versions of a row.
+
+The export reads from ANALYTICS_DATABASE_URL (a replica). Without one it
+falls back to the default branch's primary only outside ANALYTICS_BUSINESS_HOURS.
+
+Usage:
+    python -m app.tasks.analytics_export [--full] [--workers 4] [--output DIR] [--force]
+"""
+
+from sqlalchemy import create_engine, select, func, text
+from sqlalchemy.engine import Engine
+from app.database import shard_router
+from app.models import Appointment, Doctor, HealthPackage, PackageBooking, Specialty, User
+from app.services.reminder_service import HOSPITAL_TIMEZONE
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import date, datetime, time, timedelta, timezone
+import argparse
+import enum
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DATABASE_URL = os.getenv("ANALYTICS_DATABASE_URL", "")
+ANALYTICS_EXPORT_DIR = os.getenv("ANALYTICS_EXPORT_DIR", "analytics_export")
+ANALYTICS_BUSINESS_HOURS = os.getenv("ANALYTICS_BUSINESS_HOURS", "08:00-20:00")
+ANALYTICS_EXPORT_WORKERS = int(os.getenv("ANALYTICS_EXPORT_WORKERS", "4"))
+ANALYTICS_BATCH_ROWS = int(os.getenv("ANALYTICS_BATCH_ROWS", "50000"))
+# Rows committed by transactions that started before the watermark are still picked up.
+ANALYTICS_WATERMARK_LAG_SECONDS = int(os.getenv("ANALYTICS_WATERMARK_LAG_SECONDS", "600"))
+
+STATE_FILE = "_state.json"
+MONEY = pa.decimal128(10, 2)
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+LABEL = pa.dictionary(pa.int32(), pa.string())
+
+@dataclass
+class ExportTable:
+    name: str
+    columns: List[Tuple[str, object, pa.DataType]]
+    partition_column: object = None  # a Date column; None for dimensions
+    updated_column: object = None
+    joins: Tuple = ()
+
+    @property
+    def schema(self) -> pa.Schema:
+        return pa.schema([(name, arrow_type) for name, _, arrow_type in self.columns])
+
+    def select(self):
+        stmt = select(*[column.label(name) for name, column, _ in self.columns])
+        for target, onclause in self.joins:
+            stmt = stmt.outerjoin(target, onclause)
+        return stmt
+
+APPOINTMENTS = ExportTable(
+    "appointments",
+    [
+        ("id", Appointment.id, pa.int32()),
+        ("patient_id", Appointment.patient_id, pa.int32()),
+        ("doctor_id", Appointment.doctor_id, pa.int32()),
+        ("appointment_date", Appointment.appointment_date, pa.date32()),
+        ("appointment_time", Appointment.appointment_time, pa.time64("us")),
+        ("duration", Appointment.duration, pa.int32()),
+        ("appointment_type", Appointment.appointment_type, LABEL),
+        ("consultation_mode", Appointment.consultation_mode, LABEL),
+        ("status", Appointment.status, LABEL),
+        ("consultation_fee", Appointment.consultation_fee, MONEY),
+        ("payment_status", Appointment.payment_status, LABEL),
+        ("created_at", Appointment.created_at, TIMESTAMP),
+        ("updated_at", Appointment.updated_at, TIMESTAMP),
+        ("cancelled_at", Appointment.cancelled_at, TIMESTAMP),
+        ("completed_at", Appointment.completed_at, TIMESTAMP),
+    ],
+    partition_column=Appointment.appointment_date,
+    updated_column=Appointment.updated_at
+)
+
+PACKAGE_BOOKINGS = ExportTable(
+    "package_bookings",
+    [
+        ("id", PackageBooking.id, pa.int32()),
+        ("patient_id", PackageBooking.patient_id, pa.int32()),
+        ("package_id", PackageBooking.package_id, pa.int32()),
+        ("booking_date", PackageBooking.booking_date, pa.date32()),
+        ("scheduled_date", PackageBooking.scheduled_date, pa.date32()),
+        ("status", PackageBooking.status, LABEL),
+        ("amount_paid", PackageBooking.amount_paid, MONEY),
+        ("payment_status", PackageBooking.payment_status, LABEL),
+        ("created_at", PackageBooking.created_at, TIMESTAMP),
+        ("updated_at", PackageBooking.updated_at, TIMESTAMP),
+    ],
+    partition_column=PackageBooking.booking_date,
+    updated_column=PackageBooking.updated_at
+)
+
+DIMENSIONS = [
+    ExportTable(
+        "doctors",
+        [
+            ("doctor_id", Doctor.id, pa.int32()),
+            ("doctor_name", User.full_name, pa.string()),
+            ("specialty_id", Doctor.specialty_id, pa.int32()),
+            ("experience_years", Doctor.experience_years, pa.int32()),
+            ("consultation_fee_onsite", Doctor.consultation_fee_onsite, MONEY),
+            ("consultation_fee_online", Doctor.consultation_fee_online, MONEY),
+        ],
+        joins=((User, User.id == Doctor.user_id),)
+    ),
+    ExportTable(
+        "specialties",
+        [("specialty_id", Specialty.id, pa.int32()), ("specialty_name", Specialty.name, pa.string())]
+    ),
+    ExportTable(
+        "health_packages",
+        [
+            ("package_id", HealthPackage.id, pa.int32()),
+            ("package_name", HealthPackage.name, pa.string()),
+            ("category", HealthPackage.category, pa.string()),
+            ("price", HealthPackage.price, MONEY),
+        ]
+    ),
+]
+
+FACTS = {table.name: table for table in (APPOINTMENTS, PACKAGE_BOOKINGS)}
+
+def month_range(key: str) -> Tuple[date, date]:
+    start = datetime.strptime(key, "%Y-%m").date()
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+def within_business_hours(now: datetime, hours: str = ANALYTICS_BUSINESS_HOURS) -> bool:
+    opens, closes = (time.fromisoformat(part.strip()) for part in hours.split("-"))
+    local = now.astimezone(HOSPITAL_TIMEZONE).time()
+    return opens <= local < closes
+
+def source_url(now: Optional[datetime] = None, force: bool = False) -> str:
+    """The replica if configured; the primary only outside business hours."""
+    if ANALYTICS_DATABASE_URL:
+        return ANALYTICS_DATABASE_URL
+    if not force and within_business_hours(now or datetime.now(timezone.utc)):
+        raise SystemExit(
+            "ANALYTICS_DATABASE_URL is not set and it is business hours; "
+            "point the export at a replica or run it after hours"
+        )
+    return shard_router.engine().url.render_as_string(hide_password=False)
+
+def _source_engine(url: str) -> Engine:
+    return create_engine(url, pool_size=1, max_overflow=0, connect_args={"options": "-c default_transaction_read_only=on"})
+
+def _column(values: list, arrow_type: pa.DataType) -> pa.Array:
+    if arrow_type == LABEL:
+        return pa.array([value.value if isinstance(value, enum.Enum) else value for value in values], pa.string()).dictionary_encode()
+    return pa.array(values, arrow_type)
+
+def stream_batches(engine: Engine, table: ExportTable, stmt, batch_rows: int = ANALYTICS_BATCH_ROWS):
+    """Yield record batches from a server-side cursor without loading the result."""
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=batch_rows).execute(stmt)
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [_column(list(values), arrow_type) for values, (_, _, arrow_type) in zip(columns, table.columns)],
+                schema=table.schema
+            )
+
+def _write(path: str, schema: pa.Schema, batches) -> int:
+    """Write batches to a Parquet file; returns the row count (no file if zero)."""
+    rows = 0
+    writer = None
+    try:
+        for batch in batches:
+            if batch.num_rows == 0:
+                continue
+            if writer is None:
+                writer = pq.ParquetWriter(path, schema, compression="zstd")
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def _swap_in(staging: str, final: str) -> None:
+    """Replace a directory in two renames; readers skip dot-prefixed names."""
+    parent, name = os.path.split(final)
+    retired = os.path.join(parent, f".{name}.old")
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(final):
+        os.rename(final, retired)
+    if os.path.exists(staging):
+        os.rename(staging, final)
+    shutil.rmtree(retired, ignore_errors=True)
+
+_worker_engine: Optional[Engine] = None
+
+def _init_worker(url: str) -> None:
+    global _worker_engine
+    _worker_engine = _source_engine(url)
+
+def export_partition(table_name: str, month: str, root: str) -> Tuple[str, str, int]:
+    """Worker entry point: re-read one month of a fact table and swap it in."""
+    table = FACTS[table_name]
+    start, end = month_range(month)
+    stmt = table.select().where(table.partition_column >= start, table.partition_column < end).order_by(table.columns[0][1])
+
+    final = os.path.join(root, table.name, f"month={month}")
+    staging = os.path.join(root, table.name, f".month={month}.{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    rows = _write(os.path.join(staging, "part-0.parquet"), table.schema, stream_batches(_worker_engine, table, stmt))
+    if rows == 0:
+        shutil.rmtree(staging)
+    _swap_in(staging, final)
+    return table_name, month, rows
+
+def partition_months(root: str, table: ExportTable) -> Set[str]:
+    """Every month partition currently on disk for a fact table."""
+    path = os.path.join(root, table.name)
+    if not os.path.isdir(path):
+        return set()
+    return {name[len("month="):] for name in os.listdir(path) if name.startswith("month=")}
+
+def exported_months(root: str, table: ExportTable, ids: List[int]) -> Set[str]:
+    """Months an earlier run wrote these ids to, read from the id column only."""
+    path = os.path.join(root, table.name)
+    if not ids or not os.path.isdir(path):
+        return set()
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    found = dataset.to_table(columns=["month"], filter=ds.field("id").isin(ids))
+    return set(found.column("month").to_pylist())
+
+class AnalyticsExporter:
+    def __init__(self, url: str, root: str = ANALYTICS_EXPORT_DIR, workers: int = ANALYTICS_EXPORT_WORKERS):
+        self.url = url
+        self.root = root
+        self.workers = workers
+        self.engine = _source_engine(url)
+
+    def load_state(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.root, STATE_FILE)) as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self, state: Dict[str, dict]) -> None:
+        path = os.path.join(self.root, STATE_FILE)
+        with open(f"{path}.tmp", "w") as state_file:
+            json.dump(state, state_file, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def dirty_months(self, table: ExportTable, since: Optional[datetime]) -> Set[str]:
+        month = func.to_char(table.partition_column, "YYYY-MM")
+        with self.engine.connect() as connection:
+            if since is None:
+                # Partitions whose rows have all moved or been deleted are re-exported
+                # as empty, which removes them instead of leaving them to be double-counted.
+                return set(connection.execute(select(month).distinct()).scalars()) | partition_months(self.root, table)
+            changed = connection.execute(
+                select(table.columns[0][1], month).where(table.updated_column > since)
+            ).all()
+        months = {row[1] for row in changed}
+        months |= exported_months(self.root, table, [row[0] for row in changed])
+        return months
+
+    def export_dimensions(self) -> None:
+        for table in DIMENSIONS:
+            staging = os.path.join(self.root, f".{table.name}.{os.getpid()}")
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            rows = _write(os.path.join(staging, "part-0.parquet"), table.schema, stream_batches(self.engine, table, table.select()))
+            if rows == 0:
+                pq.write_table(table.schema.empty_table(), os.path.join(staging, "part-0.parquet"))
+            _swap_in(staging, os.path.join(self.root, table.name))
+            logger.info(f"Exported {rows} {table.name}")
+
+    def run(self, full: bool = False) -> Dict[str, int]:
+        os.makedirs(self.root, exist_ok=True)
+        state = {} if full else self.load_state()
+        with self.engine.connect() as connection:
+            started = connection.execute(text("SELECT now()")).scalar()
+
+        self.export_dimensions()
+        work = []
+        for table in FACTS.values():
+            watermark = state.get(table.name, {}).get("watermark")
+            since = datetime.fromisoformat(watermark) if watermark else None
+            work += [(table.name, month) for month in sorted(self.dirty_months(table, since), reverse=True)]
+
+        exported: Dict[str, int] = {name: 0 for name in FACTS}
+        # Spawned, not forked: workers must not inherit this process's pooled connections.
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(self.url,)
+        ) as pool:
+            futures = [pool.submit(export_partition, name, month, self.root) for name, month in work]
+            for future in futures:
+                name, month, rows = future.result()
+                exported[name] += rows
+                logger.info(f"Exported {name} month={month}: {rows} rows")
+
+        watermark = (started - timedelta(seconds=ANALYTICS_WATERMARK_LAG_SECONDS)).isoformat()
+        for name in FACTS:
+            state[name] = {"watermark": watermark, "exportedAt": started.isoformat()}
+        self.save_state(state)
+        return exported
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export appointments and package bookings to partitioned Parquet.")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and rewrite every partition")
+    parser.add_argument("--workers", type=int, default=ANALYTICS_EXPORT_WORKERS)
+    parser.add_argument("--output", default=ANALYTICS_EXPORT_DIR)
+    parser.add_argument("--force", action="store_true", help="allow reading the primary during business hours")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    exporter = AnalyticsExporter(source_url(force=args.force), args.output, args.workers)
+    exported = exporter.run(full=args.full)
+    logger.info(f"Export finished: {exported}")
+
+if __name__ == "__main__":
+    main()
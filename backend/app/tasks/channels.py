@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ReminderMessage:
+    reminder_id: int
+    kind: str
+    recipient_name: str
+    email: Optional[str]
+    phone: Optional[str]
+    subject: str
+    body: str
+
+class ReminderChannel(ABC):
+    """Delivery backend. Implementations send a whole batch per call."""
+
+    name = "base"
+
+    @abstractmethod
+    def send_batch(self, messages: List[ReminderMessage]) -> List[int]:
+        """Send the batch and return the reminder ids that were delivered."""
+
+class LogChannel(ReminderChannel):
+    """Local stub channel: logs each message and keeps it in memory for tests."""
+
+    name = "log"
+
+    def __init__(self):
+        self.sent: List[ReminderMessage] = []
+
+    def send_batch(self, messages: List[ReminderMessage]) -> List[int]:
+        for message in messages:
+            logger.info(f"[reminder:{message.kind}] to {message.email or message.phone}: {message.subject}")
+        self.sent.extend(messages)
+        return [message.reminder_id for message in messages]
+
+_CHANNELS: Dict[str, ReminderChannel] = {"log": LogChannel()}
+
+def register_channel(channel: ReminderChannel) -> None:
+    _CHANNELS[channel.name] = channel
+
+def get_channel(name: str) -> ReminderChannel:
+    if name not in _CHANNELS:
+        raise KeyError(f"Unknown reminder channel: {name}")
+    return _CHANNELS[name]
@@ -0,0 +1,237 @@
+from sqlalchemy import update, or_
+from sqlalchemy.orm import Session, joinedload
+from app.database import DEFAULT_BRANCH, SessionLocal, branch_session_factory, shard_router
+from app.models import Appointment, Patient, Doctor, Reminder
+from app.models.appointment import AppointmentStatus, PaymentStatus
+from app.models.reminder import ReminderKind, ReminderStatus
+from app.services.reminder_service import ReminderService, appointment_start
+from app.tasks.channels import ReminderChannel, ReminderMessage, get_channel
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta, timezone
+import argparse
+import heapq
+import logging
+import os
+import signal
+import threading
+
+logger = logging.getLogger(__name__)
+
+REMINDER_CHANNELS = [name.strip() for name in os.getenv("REMINDER_CHANNELS", "log").split(",") if name.strip()]
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+REMINDER_POLL_SECONDS = int(os.getenv("REMINDER_POLL_SECONDS", "60"))
+REMINDER_LOOKAHEAD_SECONDS = int(os.getenv("REMINDER_LOOKAHEAD_SECONDS", "300"))
+REMINDER_LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "120"))
+REMINDER_MAX_ATTEMPTS = int(os.getenv("REMINDER_MAX_ATTEMPTS", "5"))
+REMINDER_MAX_LOADED = int(os.getenv("REMINDER_MAX_LOADED", "50000"))
+# How late a reminder may still go out; older ones (e.g. after an outage) are skipped.
+REMINDER_GRACE_SECONDS = int(os.getenv("REMINDER_GRACE_SECONDS", "900"))
+
+ACTIVE_STATUSES = (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.RESCHEDULED)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _chunks(items: List[int], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class ReminderScheduler:
+    """Pulls due reminders in windows and dispatches them in batches.
+
+    Every poll loads the reminders due within the lookahead window with one
+    range scan on idx_reminders_due and pushes them onto a min-heap keyed by
+    due time; between polls the loop sleeps until the heap head is due.
+    Batches are claimed with a lease before sending, so a restarted or second
+    scheduler cannot pick up a batch that is already being delivered.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        channels: Optional[List[ReminderChannel]] = None,
+        batch_size: int = REMINDER_BATCH_SIZE,
+        poll_seconds: int = REMINDER_POLL_SECONDS,
+        lookahead_seconds: int = REMINDER_LOOKAHEAD_SECONDS,
+        lease_seconds: int = REMINDER_LEASE_SECONDS,
+        max_attempts: int = REMINDER_MAX_ATTEMPTS,
+        grace_seconds: int = REMINDER_GRACE_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.channels = channels if channels is not None else [get_channel(name) for name in REMINDER_CHANNELS]
+        self.batch_size = batch_size
+        self.poll_interval = timedelta(seconds=poll_seconds)
+        self.lookahead = timedelta(seconds=lookahead_seconds)
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.grace = timedelta(seconds=grace_seconds)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._queued: Set[int] = set()
+        self._next_poll = datetime.min.replace(tzinfo=timezone.utc)
+
+    def load_window(self, db: Session, now: datetime) -> int:
+        rows = db.query(Reminder.id, Reminder.due_at).filter(
+            Reminder.status == ReminderStatus.PENDING,
+            Reminder.due_at <= now + self.lookahead,
+            or_(Reminder.locked_until.is_(None), Reminder.locked_until < now)
+        ).order_by(Reminder.due_at).limit(REMINDER_MAX_LOADED).all()
+
+        loaded = 0
+        for reminder_id, due_at in rows:
+            if reminder_id not in self._queued:
+                heapq.heappush(self._heap, (due_at, reminder_id))
+                self._queued.add(reminder_id)
+                loaded += 1
+        self._next_poll = now + self.poll_interval
+        return loaded
+
+    def pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            reminder_id = heapq.heappop(self._heap)[1]
+            self._queued.discard(reminder_id)
+            due.append(reminder_id)
+        return due
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        now = now or _utcnow()
+        with self.session_factory() as db:
+            if now >= self._next_poll:
+                self.load_window(db, now)
+            delivered = 0
+            for chunk in _chunks(self.pop_due(now), self.batch_size):
+                delivered += self.dispatch_batch(db, chunk, now)
+            return delivered
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        now = now or _utcnow()
+        wakeup = self._next_poll
+        if self._heap and self._heap[0][0] < wakeup:
+            wakeup = self._heap[0][0]
+        return max(0.0, (wakeup - now).total_seconds())
+
+    def dispatch_batch(self, db: Session, reminder_ids: List[int], now: datetime) -> int:
+        claimed = db.execute(
+            update(Reminder)
+            .where(
+                Reminder.id.in_(reminder_ids),
+                Reminder.status == ReminderStatus.PENDING,
+                or_(Reminder.locked_until.is_(None), Reminder.locked_until < now)
+            )
+            .values(locked_until=now + self.lease, attempts=Reminder.attempts + 1)
+            .returning(Reminder.id)
+        ).scalars().all()
+        db.commit()
+        if not claimed:
+            return 0
+
+        reminders = db.query(Reminder).options(
+            joinedload(Reminder.appointment).joinedload(Appointment.patient).joinedload(Patient.user),
+            joinedload(Reminder.appointment).joinedload(Appointment.doctor).joinedload(Doctor.user)
+        ).filter(Reminder.id.in_(claimed)).all()
+
+        skipped = []
+        messages = []
+        for reminder in reminders:
+            message = self._build_message(reminder, now)
+            if message is None:
+                skipped.append(reminder.id)
+            else:
+                messages.append(message)
+
+        delivered: Set[int] = set()
+        channel_names: Dict[int, List[str]] = {}
+        for channel in self.channels:
+            if not messages:
+                break
+            try:
+                for reminder_id in channel.send_batch(messages):
+                    delivered.add(reminder_id)
+                    channel_names.setdefault(reminder_id, []).append(channel.name)
+            except Exception as e:
+                logger.error(f"Reminder channel {channel.name} failed for batch of {len(messages)}: {e}")
+
+        sent_at = _utcnow()
+        by_channel: Dict[str, List[int]] = {}
+        for reminder_id in delivered:
+            by_channel.setdefault(",".join(channel_names[reminder_id]), []).append(reminder_id)
+        for channel, ids in by_channel.items():
+            db.execute(
+                update(Reminder).where(Reminder.id.in_(ids))
+                .values(status=ReminderStatus.SENT, sent_at=sent_at, locked_until=None, channel=channel)
+            )
+        if skipped:
+            db.execute(
+                update(Reminder).where(Reminder.id.in_(skipped))
+                .values(status=ReminderStatus.SKIPPED, locked_until=None)
+            )
+        undelivered = [message.reminder_id for message in messages if message.reminder_id not in delivered]
+        if undelivered:
+            # Leave retryable rows pending; the lease expiry is the retry backoff.
+            db.execute(
+                update(Reminder)
+                .where(Reminder.id.in_(undelivered), Reminder.attempts >= self.max_attempts)
+                .values(status=ReminderStatus.FAILED, locked_until=None, last_error="delivery failed")
+            )
+        db.commit()
+        return len(delivered)
+
+    def _build_message(self, reminder: Reminder, now: datetime) -> Optional[ReminderMessage]:
+        appointment = reminder.appointment
+        if appointment is None or appointment.status not in ACTIVE_STATUSES:
+            return None
+        # Stale after a backlog or retries: "in one hour" for a visit that has started is worse than nothing.
+        if appointment_start(appointment) <= now or reminder.due_at < now - self.grace:
+            return None
+        if reminder.kind == ReminderKind.PAYMENT_PENDING and appointment.payment_status != PaymentStatus.PENDING:
+            return None
+
+        user = appointment.patient.user
+        doctor_name = appointment.doctor.user.full_name if appointment.doctor and appointment.doctor.user else "your doctor"
+        when = appointment_start(appointment).strftime("%d %b %Y at %I:%M %p")
+        if reminder.kind == ReminderKind.PAYMENT_PENDING:
+            subject = "Payment pending for your appointment"
+            body = f"Hi {user.full_name}, payment for your appointment with {doctor_name} on {when} is still pending."
+        else:
+            lead = "tomorrow" if reminder.kind == ReminderKind.APPOINTMENT_24H else "in one hour"
+            subject = f"Appointment reminder: {when}"
+            body = f"Hi {user.full_name}, this is a reminder of your appointment with {doctor_name} {lead} ({when})."
+
+        return ReminderMessage(
+            reminder_id=reminder.id,
+            kind=reminder.kind.value,
+            recipient_name=user.full_name,
+            email=user.email,
+            phone=user.phone,
+            subject=subject,
+            body=body
+        )
+
+    def run_forever(self, stop_event: threading.Event) -> None:
+        with self.session_factory() as db:
+            created = ReminderService(db).backfill_upcoming()
+            logger.info(f"Reminder scheduler started; backfilled {created} reminders")
+        while not stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Reminder scheduler error: {e}")
+                self._next_poll = _utcnow() + self.poll_interval
+            stop_event.wait(self.seconds_until_next_run())
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dispatch appointment reminders.")
+    parser.add_argument(
+        "--branch", choices=shard_router.branches, default=DEFAULT_BRANCH,
+        help="serves every branch stored in this branch's database"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    ReminderScheduler(session_factory=branch_session_factory(args.branch, scoped=False)).run_forever(stop_event)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Latency of the appointment and doctor directory access paths before and after
+the composite/partial index set.
+
+Builds a synthetic dataset in a scratch schema (so the application tables are
+untouched), times each query shape with only the old single-column indexes,
+then swaps in the new indexes and times them again. Prints the median and
+p95 per query in milliseconds. Needs a reachable DATABASE_URL.
+
+Usage:
+    python benchmarks/appointment_indexes.py --doctors 5000 --patients 500000 --appointments 10000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+SCHEMA = "bench_indexes"
+
+SETUP = """
+DROP SCHEMA IF EXISTS {schema} CASCADE;
+CREATE SCHEMA {schema};
+SET search_path TO {schema};
+
+CREATE TABLE users (id SERIAL PRIMARY KEY, is_active BOOLEAN NOT NULL DEFAULT TRUE);
+CREATE TABLE doctors (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    rating DECIMAL(3,2),
+    total_reviews INTEGER,
+    is_available BOOLEAN
+);
+CREATE TABLE appointments (
+    id SERIAL PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    doctor_id INTEGER NOT NULL,
+    appointment_date DATE NOT NULL,
+    appointment_time TIME NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    reason_for_visit TEXT
+);
+
+INSERT INTO users (is_active) SELECT random() < 0.97 FROM generate_series(1, {doctors});
+INSERT INTO doctors (user_id, rating, total_reviews, is_available)
+SELECT g, round((2 + random() * 3)::numeric, 2), (random() * 500)::int, random() < 0.8
+FROM generate_series(1, {doctors}) g;
+
+INSERT INTO appointments (patient_id, doctor_id, appointment_date, appointment_time, status, reason_for_visit)
+SELECT
+    1 + (random() * ({patients} - 1))::int,
+    1 + (random() * ({doctors} - 1))::int,
+    CURRENT_DATE - 365 + (random() * 395)::int,
+    TIME '09:00' + ((random() * 15)::int * INTERVAL '30 minutes'),
+    (ARRAY['PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED'])[1 + (random() * 3)::int],
+    'Synthetic visit'
+FROM generate_series(1, {appointments});
+"""
+
+OLD_INDEXES = """
+SET search_path TO {schema};
+CREATE INDEX old_appointments_patient ON appointments(patient_id);
+CREATE INDEX old_appointments_doctor ON appointments(doctor_id);
+CREATE INDEX old_appointments_date ON appointments(appointment_date);
+CREATE INDEX old_appointments_status ON appointments(status);
+CREATE INDEX old_doctors_available ON doctors(is_available);
+ANALYZE users; ANALYZE doctors; ANALYZE appointments;
+"""
+
+# Mirrors the model declarations; the single-column doctor_id and date indexes stay.
+NEW_INDEXES = """
+SET search_path TO {schema};
+DROP INDEX old_appointments_patient;
+DROP INDEX old_doctors_available;
+CREATE INDEX idx_appointments_doctor_slot ON appointments(doctor_id, appointment_date, appointment_time) WHERE status <> 'CANCELLED';
+CREATE INDEX idx_appointments_patient_date ON appointments(patient_id, appointment_date DESC);
+CREATE INDEX idx_doctors_available_rating ON doctors(rating DESC, total_reviews DESC) WHERE is_available = TRUE;
+ANALYZE users; ANALYZE doctors; ANALYZE appointments;
+"""
+
+QUERIES = {
+    "patient history": (
+        "SELECT id, doctor_id, appointment_date, appointment_time, status FROM appointments "
+        "WHERE patient_id = %(patient_id)s ORDER BY appointment_date DESC"
+    ),
+    "slot conflict check": (
+        "SELECT id FROM appointments WHERE doctor_id = %(doctor_id)s AND appointment_date = %(day)s "
+        "AND appointment_time = %(slot)s AND status <> 'CANCELLED' LIMIT 1"
+    ),
+    "doctor schedule (14 days)": (
+        "SELECT appointment_date, appointment_time FROM appointments WHERE doctor_id = %(doctor_id)s "
+        "AND appointment_date BETWEEN CURRENT_DATE AND CURRENT_DATE + 14 AND status <> 'CANCELLED'"
+    ),
+    "directory by rating": (
+        "SELECT d.id FROM doctors d JOIN users u ON u.id = d.user_id "
+        "WHERE u.is_active AND d.is_available ORDER BY d.rating DESC, d.total_reviews DESC "
+        "LIMIT 10 OFFSET %(offset)s"
+    ),
+}
+
+def _params(args) -> dict:
+    return {
+        "patient_id": random.randint(1, args.patients),
+        "doctor_id": random.randint(1, args.doctors),
+        "day": date.today() + timedelta(days=random.randint(-30, 30)),
+        "slot": f"{9 + random.randint(0, 7):02d}:{random.choice(['00', '30'])}",
+        "offset": random.choice([0, 10, 20, 50]),
+    }
+
+def measure(connection, args) -> dict:
+    results = {}
+    cursor = connection.cursor()
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+    for name, sql in QUERIES.items():
+        timings = []
+        for _ in range(args.iterations):
+            params = _params(args)
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[name] = (statistics.median(timings), timings[int(len(timings) * 0.95) - 1])
+    cursor.close()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=5000)
+    parser.add_argument("--patients", type=int, default=500000)
+    parser.add_argument("--appointments", type=int, default=10000000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="leave the scratch schema in place")
+    args = parser.parse_args()
+
+    connection = engine.raw_connection()
+    try:
+        connection.autocommit = True
+        cursor = connection.cursor()
+        print(f"Loading {args.appointments} appointments, {args.doctors} doctors ...")
+        cursor.execute(SETUP.format(schema=SCHEMA, doctors=args.doctors, patients=args.patients, appointments=args.appointments))
+        cursor.execute(OLD_INDEXES.format(schema=SCHEMA))
+        before = measure(connection, args)
+        cursor.execute(NEW_INDEXES.format(schema=SCHEMA))
+        after = measure(connection, args)
+
+        print(f"{'query':<28} {'before p50':>11} {'before p95':>11} {'after p50':>10} {'after p95':>10} {'speedup':>8}")
+        for name in QUERIES:
+            (b50, b95), (a50, a95) = before[name], after[name]
+            print(f"{name:<28} {b50:>11.2f} {b95:>11.2f} {a50:>10.2f} {a95:>10.2f} {b50 / a50:>7.1f}x")
+    finally:
+        if not args.keep:
+            connection.cursor().execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Latency of a cross-branch doctor listing: parallel fan-out versus querying
+each branch database in turn.
+
+Runs the same directory query the `all_branches=true` listing runs against
+every branch in BRANCH_DATABASES, once through the shard router's thread
+pool and once sequentially, and prints the median and p95 in milliseconds.
+Needs every branch database to be reachable and seeded.
+
+Usage:
+    python benchmarks/branch_fanout.py --requests 200 --limit 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import shard_router
+from app.services.doctor_service import DoctorService
+
+def _report(name: str, timings) -> None:
+    timings = sorted(timings)
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    print(f"{name:<12} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cross-branch doctor listings.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    branches = shard_router.branches
+    print(f"Branches: {', '.join(branches)}")
+
+    def listing(db):
+        return DoctorService(db).get_all_doctors(limit=args.limit)
+
+    # Warm up every engine's pool so connection setup is not timed.
+    shard_router.fan_out(listing, branches)
+
+    sequential = []
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        for branch in branches:
+            with shard_router.session(branch) as db:
+                listing(db)
+        sequential.append((time.perf_counter() - started) * 1000)
+
+    parallel = []
+    for _ in range(args.requests):
+        started = time.perf_counter()
+        _, missing = shard_router.fan_out(listing, branches)
+        parallel.append((time.perf_counter() - started) * 1000)
+        if missing:
+            print(f"Missing branches: {', '.join(missing)}")
+
+    _report("sequential", sequential)
+    _report("fan-out", parallel)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Booking throughput for one health package on one day under contention.
+
+Every thread books the same package and date through PackageBookingService,
+once per shard count, and prints bookings/second plus how many requests were
+turned away. With a single shard every booking queues on one counter row;
+with more shards concurrent bookings update different rows. The run fails
+if any configuration books more than the package's daily capacity.
+Needs a reachable DATABASE_URL with seeded packages and patients.
+
+Usage:
+    python benchmarks/package_booking_contention.py --shards 1 4 8 16 --threads 32 --capacity 2000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func
+
+from app.database import SessionLocal
+from app.models import HealthPackage, PackageBooking, PackageCapacityShard, Patient
+from app.services.package_booking_service import PackageBookingService
+
+def _worker(package_id: int, patient_ids, scheduled_date: date, shards: int, attempts: int, results, lock) -> None:
+    booked = rejected = 0
+    with SessionLocal() as db:
+        package = db.get(HealthPackage, package_id)
+        service = PackageBookingService(db, shards=shards)
+        for i in range(attempts):
+            if service.book_package(package, patient_ids[i % len(patient_ids)], scheduled_date):
+                booked += 1
+            else:
+                rejected += 1
+    with lock:
+        results["booked"] += booked
+        results["rejected"] += rejected
+
+def _reset(package_id: int, scheduled_date: date) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(PackageBooking).where(
+            PackageBooking.package_id == package_id,
+            PackageBooking.scheduled_date == scheduled_date
+        ))
+        db.execute(delete(PackageCapacityShard).where(
+            PackageCapacityShard.package_id == package_id,
+            PackageCapacityShard.scheduled_date == scheduled_date
+        ))
+        db.commit()
+
+def measure(package_id: int, patient_ids, scheduled_date: date, shards: int, threads: int, attempts: int, capacity: int):
+    _reset(package_id, scheduled_date)
+    results = {"booked": 0, "rejected": 0}
+    lock = threading.Lock()
+    workers = [
+        threading.Thread(target=_worker, args=(package_id, patient_ids, scheduled_date, shards, attempts, results, lock))
+        for _ in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        stored = db.query(func.count(PackageBooking.id)).filter(
+            PackageBooking.package_id == package_id,
+            PackageBooking.scheduled_date == scheduled_date
+        ).scalar()
+    if stored > capacity or results["booked"] != stored:
+        raise SystemExit(f"overbooked: {stored} bookings for capacity {capacity} with {shards} shards")
+    return results["booked"], results["rejected"], elapsed
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=100, help="booking attempts per thread")
+    parser.add_argument("--capacity", type=int, default=2000)
+    parser.add_argument("--days-ahead", type=int, default=365)
+    args = parser.parse_args()
+
+    scheduled_date = date.today() + timedelta(days=args.days_ahead)
+    with SessionLocal() as db:
+        package = db.query(HealthPackage).filter(HealthPackage.is_active == True).first()
+        patient_ids = [row.id for row in db.query(Patient.id).limit(args.threads).all()]
+        if package is None or not patient_ids:
+            raise SystemExit("seed at least one active health package and one patient first")
+        package_id = package.id
+        original_capacity = package.daily_capacity
+        package.daily_capacity = args.capacity
+        db.commit()
+
+    try:
+        print(f"{'shards':>6} {'booked':>8} {'rejected':>9} {'seconds':>8} {'bookings/s':>11}")
+        for shards in args.shards:
+            booked, rejected, elapsed = measure(
+                package_id, patient_ids, scheduled_date, shards, args.threads, args.attempts, args.capacity
+            )
+            print(f"{shards:>6} {booked:>8} {rejected:>9} {elapsed:>8.2f} {booked / elapsed:>11.0f}")
+    finally:
+        _reset(package_id, scheduled_date)
+        with SessionLocal() as db:
+            db.get(HealthPackage, package_id).daily_capacity = original_capacity
+            db.commit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Throughput of the production server as the worker count grows.
+
+Starts `gunicorn -c gunicorn.conf.py main:app` once per worker count, drives it
+with keep-alive HTTP clients in separate processes, and prints requests/second
+and the scaling factor relative to one worker. Needs a reachable DATABASE_URL.
+
+Usage:
+    python benchmarks/serving_throughput.py --workers 1 2 4 8 --path /api/v1/doctors/
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _client(host: str, port: int, path: str, duration: float, results) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    count = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 200:
+            count += 1
+    results.put(count)
+
+def _wait_until_up(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+def measure(workers: int, port: int, path: str, duration: float, clients_per_worker: int) -> float:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}", ACCESS_LOG="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_until_up("127.0.0.1", port)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=_client, args=("127.0.0.1", port, path, duration, results))
+            for _ in range(workers * clients_per_worker)
+        ]
+        for client in clients:
+            client.start()
+        total = sum(results.get() for _ in clients)
+        for client in clients:
+            client.join()
+        return total / duration
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/api/v1/doctors/")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients-per-worker", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>10} {'scaling':>8}")
+    for workers in args.workers:
+        rps = measure(workers, args.port, args.path, args.duration, args.clients_per_worker)
+        baseline = baseline or rps / workers
+        print(f"{workers:>8} {rps:>10.0f} {rps / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
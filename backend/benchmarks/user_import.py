@@ -0,0 +1,86 @@
+"""
+Bulk user import throughput.
+
+Generates a synthetic CSV of patients and doctors with unique emails, phones
+and license numbers, runs it through UserImportService in one call and
+prints rows/second. Imported users are deleted again afterwards unless
+--keep is given. Needs a reachable DATABASE_URL with seeded specialties.
+
+Usage:
+    python benchmarks/user_import.py --rows 100000 --doctor-ratio 0.05
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, select
+
+from app.database import SessionLocal
+from app.models import Doctor, Patient, Specialty, User
+from app.services.user_import_service import UserImportService
+
+def build_csv(rows: int, doctor_ratio: float, specialties, run_id: str) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["email", "password", "fullName", "phone", "role", "licenseNumber", "specialty", "gender", "city"])
+    doctor_every = max(1, int(1 / doctor_ratio)) if doctor_ratio > 0 else 0
+    for i in range(rows):
+        is_doctor = doctor_every and i % doctor_every == 0
+        writer.writerow([
+            f"import-{run_id}-{i}@example.com",
+            "changeme",
+            f"Imported User {i}",
+            f"+9{int(run_id, 16) % 10000:04d}{i:09d}",
+            "doctor" if is_doctor else "patient",
+            f"LIC-{run_id}-{i}" if is_doctor else "",
+            specialties[i % len(specialties)] if is_doctor and specialties else "",
+            "" if is_doctor else ("female" if i % 2 else "male"),
+            "Chennai"
+        ])
+    return buffer.getvalue().encode("utf-8")
+
+def cleanup(run_id: str) -> None:
+    with SessionLocal() as db:
+        user_ids = select(User.id).where(User.email.like(f"import-{run_id}-%"))
+        db.execute(delete(Doctor).where(Doctor.user_id.in_(user_ids)))
+        db.execute(delete(Patient).where(Patient.user_id.in_(user_ids)))
+        db.execute(delete(User).where(User.email.like(f"import-{run_id}-%")))
+        db.commit()
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--doctor-ratio", type=float, default=0.05)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        specialties = [name for (name,) in db.query(Specialty.name).all()]
+    data = build_csv(args.rows, args.doctor_ratio, specialties, run_id)
+
+    try:
+        with SessionLocal() as db:
+            service = UserImportService(db) if args.chunk_size is None else UserImportService(db, chunk_size=args.chunk_size)
+            started = time.perf_counter()
+            result = service.import_stream(io.BytesIO(data), "csv", dry_run=args.dry_run)
+            elapsed = time.perf_counter() - started
+        print(f"processed={result['processed']} created={result['created']} failed={result['failed']}")
+        print(f"{elapsed:.2f}s, {result['processed'] / elapsed:.0f} rows/s")
+        for error in result["errors"][:10]:
+            print(f"  row {error['row']}: {'; '.join(error['errors'])}")
+    finally:
+        if not args.keep and not args.dry_run:
+            cleanup(run_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Production server configuration.
+
+Usage:
+    gunicorn -c gunicorn.conf.py main:app
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers fork with warm code and indexes.
+preload_app = True
+
+# Draining: on SIGTERM workers stop accepting and get this long to finish in-flight requests.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+# Recycle workers periodically; jitter keeps them from restarting together.
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Shared catalog snapshot lives on tmpfs so every worker maps the same pages.
+os.environ.setdefault("SNAPSHOT_PATH", "/dev/shm/hospital_catalog.snapshot")
+
+accesslog = os.getenv("ACCESS_LOG", "-")
+errorlog = "-"
+
+def when_ready(server):
+    from app.database import DEFAULT_BRANCH, branch_session_factory
+    from app.snapshot import write_snapshot
+
+    try:
+        # Scoped like the refresher's sessions so other branches sharing the database stay out.
+        with branch_session_factory(DEFAULT_BRANCH)() as db:
+            size = write_snapshot(db)
+        server.log.info(f"Catalog snapshot written ({size} bytes)")
+    except Exception as e:
+        server.log.error(f"Catalog snapshot build failed, workers will read from the database: {e}")
+
+def post_fork(server, worker):
+    from app.database import shard_router
+    from app.idempotency import key_engine
+
+    # Connections opened by the master (table creation, first snapshot) must not be shared across processes.
+    for engine in [*shard_router.engines(), key_engine]:
+        engine.dispose(close=False)
@@ -51,6 +51,7 @@ CREATE INDEX idx_users_active ON users(is_active);
 CREATE TABLE patients (
     id SERIAL PRIMARY KEY,
     user_id INTEGER UNIQUE NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    branch VARCHAR(50) NOT NULL DEFAULT 'chennai', -- hospital branch (BRANCH_DATABASES)
     
     -- Personal Information
     date_of_birth DATE,
@@ -104,6 +105,7 @@ CREATE TABLE specialties (
 CREATE TABLE doctors (
     id SERIAL PRIMARY KEY,
     user_id INTEGER UNIQUE NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    branch VARCHAR(50) NOT NULL DEFAULT 'chennai', -- hospital branch (BRANCH_DATABASES)
     
     -- Professional Information
     license_number VARCHAR(255) UNIQUE NOT NULL,
@@ -143,13 +145,43 @@ CREATE TABLE doctors (
 CREATE INDEX idx_doctors_user_id ON doctors(user_id);
 CREATE INDEX idx_doctors_specialty ON doctors(specialty_id);
 CREATE INDEX idx_doctors_license ON doctors(license_number);
-CREATE INDEX idx_doctors_available ON doctors(is_available);
+-- Directory listing: available doctors, best rated first
+CREATE INDEX idx_doctors_available_rating ON doctors(rating DESC, total_reviews DESC) WHERE is_available = TRUE;
+-- Per-branch listings when several branches share a database
+CREATE INDEX idx_doctors_branch_specialty ON doctors(branch, specialty_id);
+
+-- Precomputed earliest free slot per doctor (maintained by bookings, cancellations and a periodic sweep)
+CREATE TABLE doctor_next_slots (
+    doctor_id INTEGER PRIMARY KEY REFERENCES doctors(id) ON DELETE CASCADE,
+    next_slot_at TIMESTAMPTZ,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_doctor_next_slots_next ON doctor_next_slots(next_slot_at, doctor_id);
+CREATE INDEX idx_doctor_next_slots_computed ON doctor_next_slots(computed_at);
+
+-- Stored first responses for client Idempotency-Key retries (expired rows are swept)
+CREATE TABLE idempotency_keys (
+    id SERIAL PRIMARY KEY,
+    scope VARCHAR(64) NOT NULL,
+    key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    content_type VARCHAR(255),
+    response_body BYTEA,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    CONSTRAINT uq_idempotency_keys_scope_key UNIQUE (scope, key)
+);
+
+CREATE INDEX idx_idempotency_keys_expires ON idempotency_keys(expires_at);
 
 -- Appointments table
 CREATE TABLE appointments (
     id SERIAL PRIMARY KEY,
     patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
     doctor_id INTEGER NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+    branch VARCHAR(50) NOT NULL DEFAULT 'chennai', -- hospital branch (BRANCH_DATABASES)
     
     -- Appointment Details
     appointment_date DATE NOT NULL,
@@ -177,10 +209,73 @@ CREATE TABLE appointments (
 );
 
 -- Create indexes for appointments table
-CREATE INDEX idx_appointments_patient ON appointments(patient_id);
+CREATE INDEX idx_appointments_patient_date ON appointments(patient_id, appointment_date DESC);
 CREATE INDEX idx_appointments_doctor ON appointments(doctor_id);
+-- Slot conflict checks and per-doctor schedules only look at live appointments.
+-- The label matches this script's appointment_status type. Databases created by
+-- the application store enum names ('CANCELLED'); add indexes there with
+-- `python -m app.schema_upgrade`, which generates the DDL from the models.
+CREATE INDEX idx_appointments_doctor_slot ON appointments(doctor_id, appointment_date, appointment_time) WHERE status <> 'cancelled';
 CREATE INDEX idx_appointments_date ON appointments(appointment_date);
 CREATE INDEX idx_appointments_status ON appointments(status);
+CREATE INDEX idx_appointments_updated_at ON appointments(updated_at);
+
+-- Appointment waitlist (freed slots are offered in priority order with a timed hold)
+CREATE TYPE waitlist_status AS ENUM ('waiting', 'offered', 'claimed', 'expired', 'cancelled');
+
+CREATE TABLE appointment_waitlist (
+    id SERIAL PRIMARY KEY,
+    patient_id INTEGER NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    doctor_id INTEGER NOT NULL REFERENCES doctors(id) ON DELETE CASCADE,
+    
+    -- Requested slot window
+    desired_date DATE NOT NULL,
+    preferred_time_from TIME,
+    preferred_time_to TIME,
+    priority INTEGER NOT NULL DEFAULT 0,
+    reason_for_visit TEXT,
+    
+    -- Offer / hold state
+    status waitlist_status NOT NULL DEFAULT 'waiting',
+    offered_time TIME,
+    offer_expires_at TIMESTAMPTZ,
+    appointment_id INTEGER REFERENCES appointments(id),
+    
+    -- Timestamps
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create indexes for appointment waitlist table
+CREATE INDEX idx_waitlist_patient ON appointment_waitlist(patient_id);
+CREATE INDEX idx_waitlist_queue ON appointment_waitlist(doctor_id, desired_date, priority DESC, created_at) WHERE status = 'waiting';
+CREATE INDEX idx_waitlist_offer_expiry ON appointment_waitlist(offer_expires_at) WHERE status = 'offered';
+
+-- Appointment reminders (24h / 1h before the visit, pending-payment nudges)
+CREATE TYPE reminder_kind AS ENUM ('appointment_24h', 'appointment_1h', 'payment_pending');
+CREATE TYPE reminder_status AS ENUM ('pending', 'sent', 'skipped', 'failed');
+
+CREATE TABLE appointment_reminders (
+    id SERIAL PRIMARY KEY,
+    appointment_id INTEGER NOT NULL REFERENCES appointments(id) ON DELETE CASCADE,
+    kind reminder_kind NOT NULL,
+    due_at TIMESTAMPTZ NOT NULL,
+    
+    -- Delivery state
+    status reminder_status NOT NULL DEFAULT 'pending',
+    locked_until TIMESTAMPTZ,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    channel VARCHAR(50),
+    last_error VARCHAR(500),
+    sent_at TIMESTAMPTZ,
+    
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    
+    CONSTRAINT uq_reminder_appointment_kind UNIQUE (appointment_id, kind)
+);
+
+-- Create indexes for appointment reminders table
+CREATE INDEX idx_reminders_due ON appointment_reminders(due_at) WHERE status = 'pending';
 
 -- Medical Records table
 CREATE TABLE medical_records (
@@ -192,11 +287,14 @@ CREATE TABLE medical_records (
     -- Record Details
     visit_date DATE NOT NULL,
     chief_complaint TEXT,
-    history_of_present_illness TEXT,
-    physical_examination TEXT,
-    diagnosis TEXT,
-    treatment_plan TEXT,
-    prescription TEXT,
+    diagnosis_summary VARCHAR(160),
+    
+    -- Narrative fields (zlib-compressed by the application)
+    history_of_present_illness BYTEA,
+    physical_examination BYTEA,
+    diagnosis BYTEA,
+    treatment_plan BYTEA,
+    prescription BYTEA,
     
     -- Vital Signs
     blood_pressure VARCHAR(20),
@@ -208,7 +306,7 @@ CREATE TABLE medical_records (
     -- Follow-up
     follow_up_required BOOLEAN DEFAULT FALSE,
     follow_up_date DATE,
-    follow_up_notes TEXT,
+    follow_up_notes BYTEA,
     
     -- Timestamps
     created_at TIMESTAMPTZ DEFAULT NOW(),
@@ -216,7 +314,9 @@ CREATE TABLE medical_records (
 );
 
 -- Create indexes for medical records table
-CREATE INDEX idx_medical_records_patient ON medical_records(patient_id);
+-- Timeline index: covers the summary columns so timeline pages are index-only scans
+CREATE INDEX idx_medical_records_timeline ON medical_records(patient_id, visit_date DESC, id DESC)
+    INCLUDE (doctor_id, diagnosis_summary, blood_pressure, heart_rate, temperature, respiratory_rate, oxygen_saturation);
 CREATE INDEX idx_medical_records_doctor ON medical_records(doctor_id);
 CREATE INDEX idx_medical_records_date ON medical_records(visit_date);
 
@@ -233,6 +333,7 @@ CREATE TABLE health_packages (
     duration_hours INTEGER,
     category VARCHAR(100),
     is_popular BOOLEAN DEFAULT FALSE,
+    daily_capacity INTEGER NOT NULL DEFAULT 50,
     
     -- Status
     is_active BOOLEAN DEFAULT TRUE,
@@ -242,6 +343,10 @@ CREATE TABLE health_packages (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Create indexes for health packages table
+CREATE INDEX idx_health_packages_tests ON health_packages USING GIN (tests_included);
+CREATE INDEX idx_health_packages_active_category ON health_packages(is_active, category, price);
+
 -- Package Bookings table
 CREATE TABLE package_bookings (
     id SERIAL PRIMARY KEY,
@@ -252,6 +357,7 @@ CREATE TABLE package_bookings (
     booking_date DATE NOT NULL,
     scheduled_date DATE,
     status appointment_status DEFAULT 'pending',
+    capacity_shard INTEGER,
     
     -- Payment
     amount_paid DECIMAL(10,2),
@@ -267,6 +373,21 @@ CREATE TABLE package_bookings (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+CREATE INDEX idx_package_bookings_patient ON package_bookings(patient_id);
+CREATE INDEX idx_package_bookings_scheduled_date ON package_bookings(scheduled_date);
+CREATE INDEX idx_package_bookings_updated_at ON package_bookings(updated_at);
+
+-- Per-day lab capacity, split into shards so concurrent bookings update different rows
+CREATE TABLE package_capacity_shards (
+    package_id INTEGER NOT NULL REFERENCES health_packages(id) ON DELETE CASCADE,
+    scheduled_date DATE NOT NULL,
+    shard INTEGER NOT NULL,
+    capacity INTEGER NOT NULL,
+    booked INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (package_id, scheduled_date, shard),
+    CONSTRAINT ck_capacity_shard_bounds CHECK (booked >= 0 AND booked <= capacity)
+);
+
 -- Reviews table
 CREATE TABLE reviews (
     id SERIAL PRIMARY KEY,
@@ -383,6 +504,7 @@ CREATE TRIGGER update_appointments_updated_at BEFORE UPDATE ON appointments FOR
 CREATE TRIGGER update_medical_records_updated_at BEFORE UPDATE ON medical_records FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_health_packages_updated_at BEFORE UPDATE ON health_packages FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_package_bookings_updated_at BEFORE UPDATE ON package_bookings FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+CREATE TRIGGER update_appointment_waitlist_updated_at BEFORE UPDATE ON appointment_waitlist FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_reviews_updated_at BEFORE UPDATE ON reviews FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_specialties_updated_at BEFORE UPDATE ON specialties FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
@@ -6,11 +6,16 @@ Clean, professional backend with proper architecture
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
-from app.database import engine, Base
+from app.database import Base, DEFAULT_BRANCH, shard_router, branch_session_factory
+from app.snapshot import shared_snapshot
+from app.idempotency import IdempotencyMiddleware, idempotency_sweeper
+from app.services.waitlist_service import waitlist_worker
+from app.services.availability_service import availability_sweeper
 import os
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables in every branch database
+for branch_engine in shard_router.engines():
+    Base.metadata.create_all(bind=branch_engine)
 
 # FastAPI App
 app = FastAPI(
@@ -19,6 +24,10 @@ app = FastAPI(
     description="Professional hospital management system API"
 )
 
+# Idempotency-Key replay for endpoints mobile clients retry; added before CORS so
+# replayed responses still get CORS headers.
+app.add_middleware(IdempotencyMiddleware, paths=["/api/v1/appointments", "/api/v1/auth/register"])
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +40,21 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix="/api/v1")
 
+# Background workers
+@app.on_event("startup")
+def start_background_workers():
+    waitlist_worker.start()
+    availability_sweeper.start()
+    idempotency_sweeper.start()
+    shared_snapshot.start_refresher(branch_session_factory(DEFAULT_BRANCH))
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    shared_snapshot.stop_refresher()
+    idempotency_sweeper.stop()
+    availability_sweeper.stop()
+    waitlist_worker.stop()
+
 # Root endpoints
 @app.get("/")
 async def root():
@@ -40,6 +64,7 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+# Development server; production runs `gunicorn -c gunicorn.conf.py main:app`
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file